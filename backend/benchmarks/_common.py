@@ -0,0 +1,134 @@
+"""Shared helpers for the backend benchmark scripts.
+
+Benchmarks are plain scripts, run from the repository root:
+
+    python backend/benchmarks/bench_layout_storage.py
+"""
+
+import contextlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+def use_backend_src() -> None:
+    """Make the backend modules importable the way main.py sees them."""
+    if str(SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(SRC_DIR))
+
+
+@contextlib.contextmanager
+def scratch_dir() -> Iterator[Path]:
+    """Run inside a temporary directory, so the backend's relative data paths
+    (backend/data/*.db) point at throwaway databases."""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="atlas-bench-") as tmp:
+        os.chdir(tmp)
+        try:
+            yield Path(tmp)
+        finally:
+            os.chdir(previous)
+
+
+PART_FAMILIES = (
+    ("Sensor", "temperature sensor", "Digital temperature and humidity sensor with a single-wire interface."),
+    ("Sensor", "distance sensor", "Ultrasonic distance sensor measuring 2 to 400 cm."),
+    ("Board", "development board", "Microcontroller development board with USB programming and GPIO headers."),
+    ("Wireless", "bluetooth module", "Serial Bluetooth module for wireless UART links."),
+    ("Wireless", "wifi module", "WiFi module with an integrated TCP/IP stack."),
+    ("Display", "oled display", "Monochrome OLED display driven over I2C."),
+    ("Actuator", "servo motor", "Micro servo motor with metal gears and 180 degree travel."),
+    ("Power", "voltage regulator", "Low-dropout voltage regulator for 3.3 V logic."),
+)
+PLATFORMS = ("Arduino", "Raspberry Pi", "Cross-platform")
+
+
+def synthetic_parts(count: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield catalog-shaped parts with varied names, descriptions and specs."""
+    for index in range(count):
+        number = index * 7919 + seed
+        category, kind, description = PART_FAMILIES[number % len(PART_FAMILIES)]
+        yield {
+            "name": f"{kind.title()} {chr(65 + number % 26)}{index}",
+            "platform": PLATFORMS[number % len(PLATFORMS)],
+            "category": category,
+            "description": description,
+            "specs": {"voltage": (3.3, 5.0, 12.0)[number % 3], "flash_kb": 2 ** (number % 8), "pins": number % 40},
+            "source": "bench",
+            "source_url": f"https://components.example/part-{index}",
+        }
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5, number: int = 1) -> Dict[str, float]:
+    """Time fn, returning the best and median milliseconds per call."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) * 1000 / number)
+    return {"min_ms": round(min(samples), 3), "median_ms": round(statistics.median(samples), 3)}
+
+
+def print_table(rows: List[Dict[str, Any]], columns: Sequence[str]) -> None:
+    widths = {col: max(len(col), *(len(str(row.get(col, ""))) for row in rows)) for col in columns}
+    print("  ".join(col.ljust(widths[col]) for col in columns))
+    print("  ".join("-" * widths[col] for col in columns))
+    for row in rows:
+        print("  ".join(str(row.get(col, "")).ljust(widths[col]) for col in columns))
+
+
+def emit(rows: List[Dict[str, Any]], columns: Sequence[str], as_json: bool) -> None:
+    """Print results as a table, or as JSON for scripts that compare runs."""
+    if as_json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table(rows, columns)
+
+
+def load_baseline(path: Path) -> Optional[List[Dict[str, Any]]]:
+    """Rows saved by save_baseline(), or None if there is no baseline yet."""
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def save_baseline(path: Path, rows: List[Dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(rows, indent=2) + "\n")
+
+
+def compare_to_baseline(
+    rows: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]],
+    key: str,
+    metrics: Sequence[str],
+    tolerance: float = 0.25,
+    slack: float = 5.0,
+) -> List[str]:
+    """Describe every metric that got worse than its baseline.
+
+    Rows are matched on `key`; a metric regresses when it exceeds the
+    baseline by more than `tolerance` (a fraction) plus `slack` (absolute, so
+    tiny timings don't fail on noise). Lower is better for every metric.
+    """
+    previous = {row[key]: row for row in baseline}
+    regressions = []
+    for row in rows:
+        old = previous.get(row[key])
+        if old is None:
+            continue
+        for metric in metrics:
+            new_value, old_value = row.get(metric), old.get(metric)
+            if new_value is None or old_value is None:
+                continue
+            if new_value > old_value * (1 + tolerance) + slack:
+                regressions.append(f"{row[key]}: {metric} {old_value} -> {new_value}")
+    return regressions
@@ -0,0 +1,106 @@
+"""Measure circuit saves and listings with hundreds of saved circuits.
+
+Seeds a scratch catalog with parts, then for each count in --circuits saves
+that many designer-shaped circuits (see bench_layout_storage) and times:
+
+- save_new: creating a circuit with 20 part links and a 30-component layout
+- save_autosave: re-saving one circuit with one component moved (a delta revision)
+- save_links: re-saving with one part link changed
+- list / list_warm: list_circuits with a cold and a warm result cache
+- load: get_circuit, layout included
+
+    python backend/benchmarks/bench_circuits.py [--circuits 100,500] [--json]
+"""
+
+import argparse
+import random
+from typing import List
+
+from _common import emit, measure, scratch_dir, synthetic_parts, use_backend_src
+from bench_layout_storage import make_layout
+
+use_backend_src()
+
+import hardware_service  # noqa: E402
+
+CATALOG_PARTS = 2000
+LAYOUT_COMPONENTS = 30
+LINKS_PER_CIRCUIT = 20
+
+
+def new_circuit(rng: random.Random, index: int) -> dict:
+    return {
+        "name": f"Schakeling {index}",
+        "platform": rng.choice(["Arduino", "Raspberry Pi"]),
+        "description": "Benchmark schakeling",
+        "notes": None,
+        "part_ids": [
+            {"id": part_id, "quantity": rng.randint(1, 4)}
+            for part_id in rng.sample(range(1, CATALOG_PARTS + 1), LINKS_PER_CIRCUIT)
+        ],
+        "layout": make_layout(LAYOUT_COMPONENTS, index),
+    }
+
+
+def run(counts: List[int], repeat: int) -> list:
+    rows = []
+    rng = random.Random(7)
+    with scratch_dir():
+        try:
+            hardware_service.bulk_import_parts(synthetic_parts(CATALOG_PARTS))
+            saved = 0
+            for count in counts:
+                while saved < count:
+                    hardware_service.save_circuit(**new_circuit(rng, saved))
+                    saved += 1
+
+                ids = [circuit["id"] for circuit in hardware_service.list_circuits()]
+                target = new_circuit(rng, saved)
+                circuit = hardware_service.save_circuit(**target)
+                saved += 1
+
+                def save_new() -> None:
+                    nonlocal saved
+                    hardware_service.save_circuit(**new_circuit(rng, saved))
+                    saved += 1
+
+                def save_autosave() -> None:
+                    nonlocal circuit
+                    component = rng.choice(target["layout"]["components"])
+                    component["x"] += 10
+                    circuit = hardware_service.save_circuit(**target, circuit_id=circuit["id"])
+
+                def save_links() -> None:
+                    nonlocal circuit
+                    target["part_ids"][0]["quantity"] = target["part_ids"][0]["quantity"] % 4 + 1
+                    circuit = hardware_service.save_circuit(**target, circuit_id=circuit["id"])
+
+                operations = {
+                    "save_new": (save_new, 10),
+                    "save_autosave": (save_autosave, 20),
+                    "save_links": (save_links, 20),
+                    "list": (lambda: (hardware_service._circuits_changed(), hardware_service.list_circuits()), 1),
+                    "list_warm": (hardware_service.list_circuits, 20),
+                    "load": (lambda: hardware_service.get_circuit(rng.choice(ids)), 20),
+                }
+                for name, (fn, number) in operations.items():
+                    timing = measure(fn, repeat=repeat, number=number)
+                    rows.append({"case": f"circuits/{name}@{count}", "circuits": count, "op": name, **timing})
+        finally:
+            hardware_service.release_resources()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--circuits", default="100,500", help="comma-separated numbers of saved circuits")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repetitions per operation")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    rows = run([int(count) for count in args.circuits.split(",")], args.repeat)
+    emit(rows, ["case", "min_ms", "median_ms"], args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Compare websocket encoders on real handler payloads.
+
+Fills a temporary hardware database, builds the payloads the handlers send
+(a 500-part page, the circuit list, a metrics frame) and times:
+
+- json_default: json.dumps(message), what the server used before
+- json_compact: the stdlib fallback in message_encoding
+- orjson: the fast path, when orjson is installed
+- cached: encode_message for a value that was already encoded, i.e. the
+  same page sent to another client or request
+- msgpack / msgpack_decode: the atlas.msgpack codec, when msgpack is installed
+
+Sizes are reported raw and deflated (what permessage-deflate sends).
+
+    python backend/benchmarks/bench_encoders.py [--parts 500] [--json]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import zlib
+
+from _common import emit, measure, use_backend_src
+
+use_backend_src()
+
+import message_encoding  # noqa: E402
+
+
+def build_payloads(parts: int) -> dict:
+    import hardware_service
+
+    hardware_service.bulk_import_parts(
+        {
+            "name": f"Part {index}",
+            "platform": ("Arduino", "Raspberry Pi", "Cross-platform")[index % 3],
+            "category": ("Board", "Sensor", "Wireless", "Display")[index % 4],
+            "description": "Digital temp/humidity sensor usable with Arduino and Raspberry Pi.",
+            "specs": {"voltage": "3.3-6V", "flash_kb": 32, "pins": index % 40},
+            "source": "bench",
+            "source_url": f"https://components.example/part-{index}",
+        }
+        for index in range(max(parts, 500))
+    )
+    for index in range(50):
+        hardware_service.save_circuit(
+            name=f"Circuit {index}", platform="Arduino", description="Bench circuit", notes=None,
+            part_ids=[{"id": part_id} for part_id in range(1 + index, 11 + index)],
+            layout={"components": [{"id": f"comp-{n}", "x": n, "y": n} for n in range(20)]},
+        )
+
+    page = hardware_service.list_parts_page(limit=parts)
+    return {
+        "parts_page": (
+            {"type": "hardware/parts/list", "meta": {"limit": parts, "next_cursor": page["next_cursor"]}},
+            "parts",
+            page["parts"],
+        ),
+        "circuit_list": ({"type": "hardware/circuits/list"}, "circuits", hardware_service.list_circuits()),
+        "metrics": (
+            {"type": "system_info", "topic": "system/metrics"},
+            "data",
+            {"cpu_percent": 12.5, "memory": {"percent": 41.2, "available_gb": 9.1, "used_gb": 6.3, "total_gb": 15.4},
+             "disk_percent": 63.0, "processes": 312, "timestamp": 1760000000.0},
+        ),
+    }
+
+
+def _deflated_kb(data: bytes) -> float:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -12, 5)
+    return round(len(compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)) / 1024, 1)
+
+
+def run(parts: int) -> list:
+    rows = []
+    payloads = build_payloads(parts)
+    msgpack_codec = message_encoding.CODECS.get(message_encoding.MSGPACK_SUBPROTOCOL)
+    for name, (envelope, field, body) in payloads.items():
+        message = {**envelope, field: body}
+        text = message_encoding.encode(message).encode("utf-8")
+        cached = message_encoding.encode_message(envelope, **{field: body})
+        cached.render(request_id=1)
+        row = {
+            "payload": name,
+            "json_kb": round(len(text) / 1024, 1),
+            "json_deflate_kb": _deflated_kb(text),
+            "msgpack_kb": None,
+            "msgpack_deflate_kb": None,
+            "json_default_ms": measure(lambda: json.dumps(message), number=20)["median_ms"],
+            "json_compact_ms": measure(
+                lambda: json.dumps(message, default=str, ensure_ascii=False, separators=(",", ":")), number=20
+            )["median_ms"],
+            "orjson_ms": None,
+            "cached_ms": measure(lambda: cached.render(request_id=1), number=20)["median_ms"],
+            "json_decode_ms": measure(lambda: message_encoding.decode(text), number=20)["median_ms"],
+            "msgpack_ms": None,
+            "msgpack_decode_ms": None,
+        }
+        if message_encoding.orjson is not None:
+            row["orjson_ms"] = measure(lambda: message_encoding.encode(message), number=20)["median_ms"]
+        if msgpack_codec is not None:
+            packed = msgpack_codec.encode(message)
+            row["msgpack_kb"] = round(len(packed) / 1024, 1)
+            row["msgpack_deflate_kb"] = _deflated_kb(packed)
+            row["msgpack_ms"] = measure(lambda: msgpack_codec.encode(message), number=20)["median_ms"]
+            row["msgpack_decode_ms"] = measure(lambda: msgpack_codec.decode(packed), number=20)["median_ms"]
+        rows.append(row)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--parts", type=int, default=500, help="parts in the page payload")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    # The hardware database lives under the working directory
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        rows = run(args.parts)
+    emit(rows, list(rows[0].keys()), args.json)
+
+
+if __name__ == "__main__":
+    main()
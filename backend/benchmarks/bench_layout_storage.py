@@ -0,0 +1,156 @@
+"""Compare layout history in circuit_revisions with the old plain layout column.
+
+Builds designer-shaped layouts (placed components carrying their part, pins
+and wires) and, for each layout size, saves --circuits circuits through
+save_circuit followed by --edits autosaves each that move one component.
+Reports:
+
+- plain_kb: the current layouts as plain JSON, i.e. what the old layout
+  column held (no history at all)
+- plain_history_kb: the same history kept as plain JSON copies
+- revisions_kb, keyframes/deltas and their average sizes: what
+  circuit_revisions actually stores for that history
+- autosave_ms: one more autosave (diff against the head, write a delta)
+- load_ms / load_plain_ms: get_circuit with a cold cache (keyframe plus
+  deltas) against reading one plain JSON column
+- restore_ms: restoring the oldest revision
+
+    python backend/benchmarks/bench_layout_storage.py [--circuits 50] [--edits 20] [--json]
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+
+from _common import emit, measure, scratch_dir, use_backend_src
+
+use_backend_src()
+
+import hardware_service  # noqa: E402
+from hardware_database import get_hardware_database  # noqa: E402
+
+
+def make_layout(components: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    placed = []
+    for index in range(components):
+        placed.append({
+            "id": f"comp-{1700000000000 + index}",
+            "part": {
+                "id": rng.randint(1, 5000),
+                "name": f"Part {rng.randint(1, 5000)}",
+                "platform": rng.choice(["Arduino", "Raspberry Pi", "Cross-platform"]),
+                "category": rng.choice(["Board", "Sensor", "Wireless"]),
+                "description": "Digital temp/humidity sensor usable with Arduino and Raspberry Pi.",
+                "specs": {"voltage": "3.3-6V", "flash_kb": 32},
+                "source": "mock-rpi",
+            },
+            "x": rng.uniform(0, 2000),
+            "y": rng.uniform(0, 2000),
+            "rotation": rng.choice([0, 90, 180, 270]),
+            "pins": [
+                {"id": f"pin-{pin}", "name": name, "x": pin * 12, "y": 0}
+                for pin, name in enumerate(["VCC", "GND", "D0", "D1", "A0", "SDA", "SCL", "TX"])
+            ],
+        })
+    wires = [
+        {
+            "id": f"wire-{index}",
+            "from": {"componentId": placed[index]["id"], "pinId": "pin-0"},
+            "to": {"componentId": placed[(index + 1) % components]["id"], "pinId": "pin-1"},
+        }
+        for index in range(components)
+    ]
+    return {"components": placed, "wires": wires, "zoom": 1, "pan": {"x": 0, "y": 0}}
+
+
+def move_component(layout: dict, rng: random.Random) -> None:
+    component = rng.choice(layout["components"])
+    component["x"] += rng.uniform(-50, 50)
+    component["y"] += rng.uniform(-50, 50)
+
+
+def run(circuits: int, edits: int) -> list:
+    rows = []
+    rng = random.Random(3)
+    for components in (10, 50, 200):
+        with scratch_dir():
+            try:
+                layouts, ids = [], []
+                plain_history = 0
+                for seed in range(circuits):
+                    layout = make_layout(components, seed)
+                    circuit = hardware_service.save_circuit(f"Schakeling {seed}", "Arduino", None, None, [], layout)
+                    plain_history += len(json.dumps(layout).encode("utf-8"))
+                    for _ in range(edits):
+                        move_component(layout, rng)
+                        hardware_service.save_circuit(
+                            f"Schakeling {seed}", "Arduino", None, None, [], layout, circuit_id=circuit["id"]
+                        )
+                        plain_history += len(json.dumps(layout).encode("utf-8"))
+                    layouts.append(layout)
+                    ids.append(circuit["id"])
+
+                stored = {
+                    row["kind"]: row
+                    for row in get_hardware_database().execute(
+                        "SELECT kind, COUNT(*) AS count, SUM(length(data)) AS size FROM circuit_revisions GROUP BY kind"
+                    )
+                }
+                keyframes = stored.get("keyframe", {"count": 0, "size": 0})
+                deltas = stored.get("delta", {"count": 0, "size": 0})
+
+                plain = [json.dumps(layout) for layout in layouts]
+                conn = sqlite3.connect("plain.db")
+                conn.execute("CREATE TABLE plain (id INTEGER PRIMARY KEY, layout TEXT)")
+                conn.executemany("INSERT INTO plain (layout) VALUES (?)", [(text,) for text in plain])
+                conn.commit()
+
+                target, layout = ids[0], layouts[0]
+
+                def autosave() -> None:
+                    move_component(layout, rng)
+                    hardware_service.save_circuit("Schakeling 0", "Arduino", None, None, [], layout, circuit_id=target)
+
+                def load() -> None:
+                    hardware_service._circuits_changed()
+                    hardware_service.get_circuit(target)
+
+                def load_plain() -> None:
+                    json.loads(conn.execute("SELECT layout FROM plain WHERE id = 1").fetchone()[0])
+
+                oldest = hardware_service.list_circuit_revisions(target)["revisions"][-1]["revision"]
+                rows.append({
+                    "components": components,
+                    "plain_kb": round(sum(len(text.encode("utf-8")) for text in plain) / 1024, 1),
+                    "plain_history_kb": round(plain_history / 1024, 1),
+                    "revisions_kb": round((keyframes["size"] + deltas["size"]) / 1024, 1),
+                    "keyframes": keyframes["count"],
+                    "keyframe_avg_b": keyframes["size"] // max(1, keyframes["count"]),
+                    "deltas": deltas["count"],
+                    "delta_avg_b": deltas["size"] // max(1, deltas["count"]),
+                    "autosave_ms": measure(autosave, number=10)["median_ms"],
+                    "load_ms": measure(load, number=10)["median_ms"],
+                    "load_plain_ms": measure(load_plain, number=20)["median_ms"],
+                    "restore_ms": measure(lambda: hardware_service.restore_circuit_revision(target, oldest))["median_ms"],
+                })
+                conn.close()
+            finally:
+                hardware_service.release_resources()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--circuits", type=int, default=50, help="circuits saved per layout size")
+    parser.add_argument("--edits", type=int, default=20, help="autosaves per circuit after the first save")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    rows = run(args.circuits, args.edits)
+    emit(rows, list(rows[0].keys()), args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Measure LLM worker latency: first token, tokens/sec, queueing and cancellation.
+
+Runs the language model worker with the stub model at a simulated cost per
+token (and per prompt word for prefill), so the numbers reflect the worker
+plumbing plus a known model cost:
+
+- first_token_ms: submit until the first token reached the event loop
+- tokens_per_s: tokens after the first, per second of streaming
+- queued_first_ms: first-token latency of the last of --concurrent jobs
+  submitted at once (they run one after another)
+- cancel_ms: cancel() until the job reported done
+
+Pass --backend transformers --model <name> to measure a real model instead.
+
+    python backend/benchmarks/bench_llm_worker.py [--token-ms 5] [--json]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from _common import emit, use_backend_src
+
+use_backend_src()
+
+from language_model import LanguageModelWorker  # noqa: E402
+
+PROMPT = (
+    "Welke sensoren kan ik gebruiken om de temperatuur en de luchtvochtigheid "
+    "in mijn werkplaats te meten met een Arduino, en hoe sluit ik ze aan? "
+) * 2
+
+
+async def time_job(worker: LanguageModelWorker, job_id: int, started: float) -> dict:
+    first = None
+    tokens = 0
+    async for kind, value in worker.events(job_id):
+        if kind == "token":
+            if first is None:
+                first = time.perf_counter()
+            tokens += 1
+    end = time.perf_counter()
+    return {"first_ms": (first - started) * 1000, "end": end, "first": first, "stats": value}
+
+
+async def run(backend: str, model: str, token_ms: float, repeats: int, concurrent: int) -> list:
+    worker = LanguageModelWorker(backend, {
+        "model": model,
+        "stub_seconds_per_token": token_ms / 1000,
+        "stub_prefill_seconds_per_word": token_ms / 1000 / 4,
+    })
+    started = time.perf_counter()
+    worker.start()
+    await worker.wait_ready(600)
+    ready_s = round(time.perf_counter() - started, 3)
+
+    firsts, rates = [], []
+    for _ in range(repeats):
+        submitted = time.perf_counter()
+        result = await time_job(worker, worker.submit(PROMPT, max_new_tokens=128), submitted)
+        firsts.append(result["first_ms"])
+        tokens = result["stats"]["tokens"]
+        if tokens > 1 and result["end"] > result["first"]:
+            rates.append((tokens - 1) / (result["end"] - result["first"]))
+
+    submitted = time.perf_counter()
+    jobs = [worker.submit(PROMPT, max_new_tokens=32) for _ in range(concurrent)]
+    queued = await asyncio.gather(*(time_job(worker, job_id, submitted) for job_id in jobs))
+
+    job_id = worker.submit(PROMPT, max_new_tokens=128)
+    events = worker.events(job_id)
+    async for kind, _ in events:
+        if kind == "token":
+            break
+    cancelling = time.perf_counter()
+    worker.cancel(job_id)
+    async for kind, stats in events:
+        if kind == "done":
+            break
+    cancel_ms = (time.perf_counter() - cancelling) * 1000
+    worker.stop()
+
+    return [{
+        "backend": worker.ready_info.get("backend", backend),
+        "token_ms": token_ms,
+        "ready_s": ready_s,
+        "first_token_ms": round(statistics.median(firsts), 1),
+        "tokens_per_s": round(statistics.median(rates), 1) if rates else None,
+        "queued_first_ms": round(queued[-1]["first_ms"], 1),
+        "cancel_ms": round(cancel_ms, 1),
+        "cancelled_after": stats["tokens"],
+    }]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default="stub", help="stub or transformers")
+    parser.add_argument("--model", default="Qwen/Qwen2.5-0.5B-Instruct", help="model for the transformers backend")
+    parser.add_argument("--token-ms", type=float, default=5.0, help="stub cost per generated token")
+    parser.add_argument("--repeats", type=int, default=5, help="timed requests for first-token latency")
+    parser.add_argument("--concurrent", type=int, default=3, help="jobs submitted at once for queueing")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args.backend, args.model, args.token_ms, args.repeats, args.concurrent))
+    emit(rows, list(rows[0].keys()), args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Measure note CRUD through data_service at realistic note counts.
+
+Grows one scratch database to each size in --sizes (seeded in bulk, not
+timed) and times every data_service operation the notes module uses:
+
+- add / update / delete / get: single-note operations, one transaction each
+- page_first / page_deep: keyset pages of 100, newest first and 50 pages in
+- all: get_all_notes (the unpaginated notes/list)
+- changes: get_note_changes for the last 100 versions (notes/sync)
+
+    python backend/benchmarks/bench_notes.py [--sizes 10000,100000] [--json]
+"""
+
+import argparse
+import random
+from typing import List
+
+from _common import emit, measure, scratch_dir, use_backend_src
+
+use_backend_src()
+
+import data_service  # noqa: E402
+from database import get_database  # noqa: E402
+
+WORDS = "arduino sensor led weerstand breadboard relais motor servo display knop batterij".split()
+SEED_BATCH = 10_000
+
+
+def seed_notes(count: int, rng: random.Random) -> None:
+    """Insert notes in large transactions (the version triggers still run per row)."""
+    db = get_database()
+    while count > 0:
+        batch = min(count, SEED_BATCH)
+        rows = [
+            (" ".join(rng.choices(WORDS, k=rng.randint(3, 30))), f"2026-01-01T00:00:{index:012d}Z")
+            for index in range(batch)
+        ]
+        with db.get_connection() as conn:
+            conn.executemany("INSERT INTO notes (text, created_at) VALUES (?, ?)", rows)
+        count -= batch
+
+
+def run(sizes: List[int], repeat: int) -> list:
+    rows = []
+    rng = random.Random(42)
+    with scratch_dir():
+        seeded = 0
+        for size in sizes:
+            seed_notes(size - seeded, rng)
+            seeded = size
+            ids = [row["id"] for row in get_database().execute("SELECT id FROM notes")]
+
+            def add() -> None:
+                data_service.add_note("Benchmark notitie over een sensor")
+
+            def update() -> None:
+                data_service.update_note(rng.choice(ids), "Bijgewerkte notitie")
+
+            def get() -> None:
+                data_service.get_note_by_id(rng.choice(ids))
+
+            def delete() -> None:
+                note = data_service.add_note("Wordt verwijderd")
+                data_service.delete_note(note["id"])
+
+            def page_deep() -> None:
+                cursor = None
+                for _ in range(50):
+                    cursor = data_service.get_notes_page(100, cursor)["next_cursor"]
+
+            version = data_service.get_notes_version()
+            operations = {
+                "add": (add, 200),
+                "update": (update, 200),
+                "get": (get, 500),
+                "delete": (delete, 100),
+                "page_first": (lambda: data_service.get_notes_page(100), 50),
+                "page_deep": (page_deep, 1),
+                "all": (data_service.get_all_notes, 1),
+                "changes": (lambda: data_service.get_note_changes(version - 100), 20),
+            }
+            for name, (fn, number) in operations.items():
+                timing = measure(fn, repeat=repeat, number=number)
+                rows.append({"case": f"notes/{name}@{size}", "notes": size, "op": name, **timing})
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000", help="comma-separated note counts")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repetitions per operation")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    rows = run([int(size) for size in args.sizes.split(",")], args.repeat)
+    emit(rows, ["case", "min_ms", "median_ms"], args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Measure catalog import and part listing at realistic catalog sizes.
+
+For each size in --sizes, imports that many synthetic parts into an empty
+scratch catalog with bulk_import_parts (timed once, reported as import_ms and
+rows_per_s), then times the reads behind hardware/parts/*, each with the
+result cache cleared first (cold) unless noted:
+
+- list_first: first page of 200, no filters; list_warm: the same, cached
+- list_deep: following 20 page cursors
+- search: full-text search for a two-word query
+- filter: platform + category
+- specs: a numeric spec filter
+- count / facets: part count and facet counts
+
+    python backend/benchmarks/bench_parts.py [--sizes 10000,100000,1000000] [--json]
+"""
+
+import argparse
+import time
+from typing import List
+
+from _common import emit, measure, scratch_dir, synthetic_parts, use_backend_src
+
+use_backend_src()
+
+import hardware_service  # noqa: E402
+
+
+def cold(fn):
+    """Wrap fn so every call starts from an empty result cache."""
+    def call():
+        hardware_service._parts_changed()
+        return fn()
+    return call
+
+
+def run(sizes: List[int], repeat: int) -> list:
+    rows = []
+    for size in sizes:
+        with scratch_dir():
+            try:
+                started = time.perf_counter()
+                summary = hardware_service.bulk_import_parts(synthetic_parts(size))
+                elapsed = time.perf_counter() - started
+                rows.append({
+                    "case": f"parts/import@{size}",
+                    "parts": size,
+                    "op": "import",
+                    "min_ms": round(elapsed * 1000, 1),
+                    "median_ms": round(elapsed * 1000, 1),
+                    "rows_per_s": round(summary["imported"] / elapsed),
+                })
+
+                def list_deep() -> None:
+                    cursor = None
+                    for _ in range(20):
+                        cursor = hardware_service.list_parts_page(limit=200, cursor=cursor)["next_cursor"]
+
+                operations = {
+                    "list_first": cold(lambda: hardware_service.list_parts_page(limit=200)),
+                    "list_warm": lambda: hardware_service.list_parts_page(limit=200),
+                    "list_deep": cold(list_deep),
+                    "search": cold(lambda: hardware_service.list_parts_page(query="temperature sensor", limit=200)),
+                    "filter": cold(lambda: hardware_service.list_parts_page(platform="Arduino", category="Sensor", limit=200)),
+                    "specs": cold(lambda: hardware_service.list_parts_page(specs={"flash_kb": {">=": 64}}, limit=200)),
+                    "count": cold(hardware_service.count_parts),
+                    "facets": cold(hardware_service.get_part_facets),
+                }
+                for name, fn in operations.items():
+                    timing = measure(fn, repeat=repeat)
+                    rows.append({"case": f"parts/{name}@{size}", "parts": size, "op": name, **timing})
+            finally:
+                # The next size starts from a fresh database in a new scratch dir
+                hardware_service.release_resources()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated catalog sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repetitions per read")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    rows = run([int(size) for size in args.sizes.split(",")], args.repeat)
+    emit(rows, ["case", "min_ms", "median_ms", "rows_per_s"], args.json)
+
+
+if __name__ == "__main__":
+    main()
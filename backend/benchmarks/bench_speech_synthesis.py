@@ -0,0 +1,93 @@
+"""Measure time to first audio for spoken replies.
+
+Runs the synthesis worker with the stub engine at a simulated synthesis cost
+and compares, for a multi-sentence reply:
+
+- whole_ms: synthesizing the full text before sending anything (the old API)
+- first_audio_ms: streaming sentence by sentence, until the first sentence
+- cached_first_ms: the same reply again, its short sentences now cached
+- total_ms: streaming until the last sentence
+
+    python backend/benchmarks/bench_speech_synthesis.py [--cost 0.2] [--json]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+from _common import emit, use_backend_src
+
+use_backend_src()
+
+from speech_synthesis import PhraseCache, SynthesisWorker  # noqa: E402
+
+REPLIES = {
+    "confirmation": "Oké. De LED staat nu aan.",
+    "answer": (
+        "Goedemorgen! Ik heb drie sensoren gevonden die met een Arduino werken. "
+        "De DHT22 meet temperatuur en luchtvochtigheid en werkt op 3,3 tot 6 volt. "
+        "De BME280 meet daarnaast ook luchtdruk en praat via I2C. "
+        "Zal ik ze aan je schakeling toevoegen?"
+    ),
+}
+
+
+async def time_reply(worker: SynthesisWorker, text: str) -> dict:
+    started = time.perf_counter()
+    first = None
+    async for _ in worker.stream(text):
+        if first is None:
+            first = (time.perf_counter() - started) * 1000
+    return {"first": round(first, 1), "total": round((time.perf_counter() - started) * 1000, 1)}
+
+
+async def run(cost: float) -> list:
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        worker = SynthesisWorker("stub", {"stub_seconds_per_audio_second": cost}, PhraseCache(tmp))
+        worker.start()
+        await worker.wait_ready(30)
+        for name, text in REPLIES.items():
+            started = time.perf_counter()
+            whole = await synthesize_whole(worker, text)
+            whole_ms = round((time.perf_counter() - started) * 1000, 1)
+
+            streamed = await time_reply(worker, text)
+            await asyncio.sleep(0.2)  # let cache writes land
+            cached = await time_reply(worker, text)
+            rows.append({
+                "reply": name,
+                "audio_s": round(whole, 2),
+                "whole_ms": whole_ms,
+                "first_audio_ms": streamed["first"],
+                "cached_first_ms": cached["first"],
+                "total_ms": streamed["total"],
+                "cached_total_ms": cached["total"],
+            })
+        worker.stop()
+    return rows
+
+
+async def synthesize_whole(worker: SynthesisWorker, text: str) -> float:
+    """Synthesize text as one piece, like the old one-blob API; returns audio seconds."""
+    future = asyncio.get_running_loop().create_future()
+    worker._jobs[0] = {0: future}
+    worker.send(("speak", 0, [(0, text)]))
+    pcm, sample_rate = await future
+    worker._jobs.pop(0, None)
+    return len(pcm) / 2 / sample_rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cost", type=float, default=0.2, help="synthesis seconds per second of audio")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args.cost))
+    emit(rows, list(rows[0].keys()), args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Measure backend startup: time to first connection and import cost.
+
+Starts main.py in a scratch directory on a free port (ATLAS_WS_PORT) and
+reports, as medians over --runs starts:
+
+- connect_ms: process start until the websocket handshake and welcome message
+- first_response_ms: process start until the answer to get_system_info
+- loading_reply: what a voice message sent right after connecting got back
+  ('system/loading' while the voice component loads in the background)
+- components_ms: process start until every background component is loaded
+
+and, from `python -X importtime -c "import main"`, the total import time
+and the slowest modules main imports directly. Any of the heavy ML packages
+(backends.HEAVY_MODULES) showing up in that import is a failure.
+
+With a baseline (saved with --update-baseline) the run exits non-zero when
+a metric regressed by more than --tolerance:
+
+    python backend/benchmarks/bench_startup.py [--runs 3] [--update-baseline] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import websockets
+
+from _common import SRC_DIR, compare_to_baseline, emit, load_baseline, print_table, save_baseline, use_backend_src
+
+use_backend_src()
+
+from backends import HEAVY_MODULES  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "startup.json"
+METRICS = ("connect_ms", "first_response_ms", "components_ms", "import_ms")
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def backend_env(**extra: str) -> dict:
+    return {**os.environ, "PYTHONPATH": str(SRC_DIR), **extra}
+
+
+async def time_startup(workdir: str, timeout: float) -> dict:
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(SRC_DIR / "main.py")],
+        cwd=workdir,
+        env=backend_env(ATLAS_WS_PORT=str(port)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"backend exited with code {process.returncode}")
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError("backend did not accept a connection in time")
+            try:
+                websocket = await websockets.connect(f"ws://localhost:{port}")
+                break
+            except OSError:
+                await asyncio.sleep(0.005)
+
+        try:
+            await websocket.recv()  # welcome message
+            connect = time.perf_counter()
+            await websocket.send(json.dumps({"type": "get_system_info", "request_id": 1}))
+            await websocket.send(json.dumps({"type": "voice/status", "request_id": 2}))
+            await websocket.send(json.dumps({"type": "subscribe", "topics": ["system/components"]}))
+            await websocket.send(json.dumps({"type": "system/components", "request_id": 3}))
+            first_response = components = None
+            loading_reply = None
+            while components is None:
+                remaining = timeout - (time.perf_counter() - started)
+                message = json.loads(await asyncio.wait_for(websocket.recv(), max(remaining, 0.1)))
+                if message.get("request_id") == 1:
+                    first_response = time.perf_counter()
+                elif message.get("request_id") == 2:
+                    loading_reply = message["type"]
+                elif message.get("type") == "system/components":
+                    states = [component["state"] for component in message["components"].values()]
+                    if all(state in ("ready", "failed") for state in states):
+                        components = time.perf_counter()
+        finally:
+            await websocket.close()
+    finally:
+        process.terminate()
+        process.wait(10)
+
+    return {
+        "connect_ms": (connect - started) * 1000,
+        "first_response_ms": ((first_response or components) - started) * 1000,
+        "components_ms": (components - started) * 1000,
+        "loading_reply": loading_reply,
+    }
+
+
+def import_breakdown(workdir: str, top: int) -> dict:
+    """Run `-X importtime -c "import main"` and summarize it."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=workdir,
+        env=backend_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            entries.append((match.group(4), int(match.group(1)), int(match.group(2)), depth))
+
+    total = next(cumulative for name, _, cumulative, depth in entries if name == "main" and depth == 0)
+    # Direct imports of main: the depth-1 entries after the previous top-level import
+    main_index = next(index for index, entry in enumerate(entries) if entry[0] == "main" and entry[3] == 0)
+    start = max((index for index in range(main_index) if entries[index][3] == 0), default=-1) + 1
+    direct = [entry for entry in entries[start:main_index] if entry[3] == 1]
+    imported = {name.split(".")[0] for name, *_ in entries}
+    return {
+        "import_ms": round(total / 1000, 1),
+        "heavy": sorted(imported & set(HEAVY_MODULES)),
+        "slowest": [
+            {"module": name, "cumulative_ms": round(cumulative / 1000, 1), "self_ms": round(own / 1000, 1)}
+            for name, own, cumulative, _ in sorted(direct, key=lambda entry: -entry[2])[:top]
+        ],
+    }
+
+
+async def run(runs: int, timeout: float, top: int) -> tuple:
+    samples = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for _ in range(runs):
+            samples.append(await time_startup(workdir, timeout))
+        imports = import_breakdown(workdir, top)
+
+    def median(metric: str) -> float:
+        return round(statistics.median(sample[metric] for sample in samples), 1)
+
+    row = {
+        "case": "startup",
+        "connect_ms": median("connect_ms"),
+        "first_response_ms": median("first_response_ms"),
+        "components_ms": median("components_ms"),
+        "import_ms": imports["import_ms"],
+        "loading_reply": samples[-1]["loading_reply"],
+    }
+    return [row], imports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="backend starts to take the median of")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for each start")
+    parser.add_argument("--top", type=int, default=10, help="slowest direct imports of main to list")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="save this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown as a fraction")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    rows, imports = asyncio.run(run(args.runs, args.timeout, args.top))
+
+    failures = [f"heavy module imported at startup: {name}" for name in imports["heavy"]]
+    baseline = load_baseline(args.baseline)
+    if args.update_baseline:
+        save_baseline(args.baseline, rows)
+    elif baseline is not None:
+        # Absolute slack of 20 ms: process start times are noisy
+        failures += compare_to_baseline(rows, baseline, "case", METRICS, args.tolerance, slack=20.0)
+
+    if args.json:
+        print(json.dumps({"results": rows, "imports": imports, "failures": failures}, indent=2))
+    else:
+        emit(rows, list(rows[0].keys()), False)
+        print()
+        print_table(imports["slowest"], ["module", "cumulative_ms", "self_ms"])
+        if baseline is None and not args.update_baseline:
+            print(f"\nNo baseline at {args.baseline}; save one with --update-baseline")
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Run the backend hot-path benchmarks and compare them against a baseline.
+
+Runs each benchmark script in its own process (so one's caches and database
+connections don't affect the next) with --json, merges their rows and
+optionally writes them to --output:
+
+- bench_websocket: round-trip latency per message type
+- bench_notes: note CRUD at 10k and 100k notes
+- bench_parts: catalog import and listing at 10k and 100k parts (--full adds 1M)
+- bench_circuits: circuit saves and listings with 100 and 500 circuits
+
+With a baseline (saved with --update-baseline) the run exits non-zero when a
+case's median got more than --tolerance slower. Baselines are machine
+specific; save one per machine before comparing.
+
+    python backend/benchmarks/bench_suite.py [--full] [--output results.json] [--update-baseline]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from _common import compare_to_baseline, load_baseline, print_table, save_baseline
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / "baselines" / "suite.json"
+METRICS = ["median_ms"]
+
+SUITE = {
+    "bench_websocket": [],
+    "bench_notes": ["--sizes", "10000,100000"],
+    "bench_parts": ["--sizes", "10000,100000"],
+    "bench_circuits": ["--circuits", "100,500"],
+}
+FULL_ARGS = {"bench_parts": ["--sizes", "10000,100000,1000000"]}
+
+
+def run_script(name: str, arguments: List[str]) -> list:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, str(BENCH_DIR / f"{name}.py"), *arguments, "--json"],
+        stdout=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    print(f"{name}: {time.perf_counter() - started:.1f} s", file=sys.stderr)
+    return json.loads(result.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--full", action="store_true", help="include the 1M-part catalog (slow)")
+    parser.add_argument("--only", help="comma-separated scripts to run, e.g. bench_notes,bench_parts")
+    parser.add_argument("--output", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="save this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown as a fraction")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(SUITE)
+    rows = []
+    for name in names:
+        arguments = FULL_ARGS.get(name, SUITE[name]) if args.full else SUITE[name]
+        rows.extend(run_script(name, arguments))
+    if args.output:
+        args.output.write_text(json.dumps(rows, indent=2) + "\n")
+
+    failures = []
+    baseline = load_baseline(args.baseline)
+    if args.update_baseline:
+        if baseline is not None:
+            # Keep cases this run skipped (e.g. the 1M catalog without --full)
+            ran = {row["case"] for row in rows}
+            rows_to_save = [row for row in baseline if row["case"] not in ran] + rows
+        else:
+            rows_to_save = rows
+        save_baseline(args.baseline, rows_to_save)
+    elif baseline is not None:
+        # Absolute slack of 1 ms: sub-millisecond cases jitter more than 25%
+        failures = compare_to_baseline(rows, baseline, "case", METRICS, args.tolerance, slack=1.0)
+
+    if args.json:
+        print(json.dumps({"results": rows, "failures": failures}, indent=2))
+    else:
+        print_table(rows, ["case", "min_ms", "median_ms", "p95_ms", "rows_per_s"])
+        if baseline is None and not args.update_baseline:
+            print(f"\nNo baseline at {args.baseline}; save one with --update-baseline")
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Measure streaming transcription latency through the worker process.
+
+Streams synthetic speech (tone bursts separated by pauses) into a
+TranscriptionWorker in real time and reports, per simulated decode cost:
+
+- ready_s: worker spawn until the recognizer reported ready
+- partial_ms: delay between sending the audio a partial covers and receiving it
+- final_ms: delay between the end of a pause and its final transcript
+- close_ms: voice/stop until the last final transcript
+
+Uses the stub recognizer, so no model download is needed:
+
+    python backend/benchmarks/bench_transcription.py [--seconds 6] [--speed 1] [--json]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import numpy as np
+
+from _common import emit, use_backend_src
+
+use_backend_src()
+
+from transcription import MODEL_SAMPLE_RATE, SILENCE_SECONDS, TranscriptionWorker  # noqa: E402
+
+CHUNK_SECONDS = 0.02
+
+
+def make_speech(seconds: float) -> np.ndarray:
+    rng = np.random.default_rng(7)
+    parts, total = [], 0.0
+    while total < seconds:
+        burst, gap = rng.uniform(0.3, 1.5), rng.choice([0.2, 0.3, 0.9])
+        t = np.arange(int(MODEL_SAMPLE_RATE * burst)) / MODEL_SAMPLE_RATE
+        parts.append((np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16))
+        parts.append(np.zeros(int(MODEL_SAMPLE_RATE * gap), dtype=np.int16))
+        total += burst + gap
+    return np.concatenate(parts)
+
+
+async def run_once(cost: float, seconds: float, speed: float) -> dict:
+    worker = TranscriptionWorker("stub", {"stub_seconds_per_audio_second": cost})
+    started = time.perf_counter()
+    worker.start()
+    await worker.wait_ready(30)
+    ready = time.perf_counter() - started
+
+    audio = make_speech(seconds)
+    sent_at = {}  # audio seconds -> wall time the chunk ending there was sent
+    partials, finals = [], []
+
+    def on_event(event: dict) -> None:
+        now = time.perf_counter()
+        position = round(event["audio_seconds"] / CHUNK_SECONDS)
+        sent = sent_at.get(position)
+        if sent is None:
+            return
+        if event["final"]:
+            # A final is due once the pause after the segment is long enough
+            due = sent_at.get(position + round(SILENCE_SECONDS / CHUNK_SECONDS), sent)
+            finals.append((now - due) * 1000)
+        else:
+            partials.append((now - sent) * 1000)
+
+    stream_id = worker.open_stream(MODEL_SAMPLE_RATE, on_event)
+    chunk = int(MODEL_SAMPLE_RATE * CHUNK_SECONDS)
+    begin = time.perf_counter()
+    for index, offset in enumerate(range(0, len(audio), chunk)):
+        worker.feed(stream_id, audio[offset:offset + chunk])
+        sent_at[index + 1] = time.perf_counter()
+        # Pace the audio like a microphone would deliver it
+        delay = begin + (index + 1) * CHUNK_SECONDS / speed - time.perf_counter()
+        await asyncio.sleep(max(0.0, delay))
+
+    closing = time.perf_counter()
+    await worker.close_stream(stream_id)
+    close_ms = (time.perf_counter() - closing) * 1000
+    worker.stop()
+
+    def p50(values: list) -> float:
+        return round(statistics.median(values), 1) if values else None
+
+    return {
+        "decode_cost": cost,
+        "ready_s": round(ready, 3),
+        "partials": len(partials),
+        "partial_ms_p50": p50(partials),
+        "partial_ms_max": round(max(partials), 1) if partials else None,
+        "finals": len(finals),
+        "final_ms_p50": p50(finals),
+        "close_ms": round(close_ms, 1),
+    }
+
+
+async def run(seconds: float, speed: float) -> list:
+    # Decode cost in seconds per second of audio: free, fast CPU model, slow CPU model
+    return [await run_once(cost, seconds, speed) for cost in (0.0, 0.05, 0.2)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=6.0, help="seconds of speech per run")
+    parser.add_argument("--speed", type=float, default=1.0, help="feed speed relative to real time")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args.seconds, args.speed))
+    emit(rows, list(rows[0].keys()), args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Measure WebSocketServer round-trip latency per message type.
+
+Runs the server with the notes and hardware modules (loaded through the
+ModuleRegistry, as main.py does) on a free port, over a scratch database
+seeded with notes, parts and circuits. A client on the same event loop sends
+--requests messages of each type one after another and times each reply
+(matched on request_id), once per wire format (atlas.json, and
+atlas.msgpack when msgpack is installed):
+
+- bench/echo: an empty handler, i.e. the server's own per-message overhead
+- notes/*, hardware/*: the module handlers the frontend uses most
+
+    python backend/benchmarks/bench_websocket.py [--requests 200] [--json]
+"""
+
+import argparse
+import asyncio
+import socket
+import statistics
+import time
+from typing import Any, Dict, List
+
+import websockets
+
+from _common import emit, scratch_dir, synthetic_parts, use_backend_src
+
+use_backend_src()
+
+import data_service  # noqa: E402
+import hardware_service  # noqa: E402
+from message_encoding import available_subprotocols, codec_for  # noqa: E402
+from module_registry import ModuleRegistry  # noqa: E402
+from websocket_server import WebSocketServer  # noqa: E402
+
+SEED_NOTES = 1000
+SEED_PARTS = 10_000
+SEED_CIRCUITS = 50
+
+MESSAGES: Dict[str, Dict[str, Any]] = {
+    "bench/echo": {},
+    "notes/list": {"limit": 50},
+    "notes/add": {"text": "Benchmark notitie"},
+    "hardware/parts/list": {"limit": 50},
+    "hardware/parts/search": {"query": "temperature sensor", "limit": 50},
+    "hardware/parts/facets": {},
+    "hardware/circuits/list": {},
+}
+
+
+def seed() -> None:
+    for index in range(SEED_NOTES):
+        data_service.add_note(f"Notitie {index}")
+    hardware_service.bulk_import_parts(synthetic_parts(SEED_PARTS))
+    for index in range(SEED_CIRCUITS):
+        hardware_service.save_circuit(
+            name=f"Schakeling {index}", platform="Arduino", description=None, notes=None,
+            part_ids=[{"id": part_id} for part_id in range(1 + index, 11 + index)],
+            layout={"components": [{"id": f"comp-{n}", "x": n, "y": n} for n in range(20)]},
+        )
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+async def round_trips(port: int, subprotocol: str, requests: int) -> List[Dict[str, Any]]:
+    codec = codec_for(subprotocol)
+    rows = []
+    websocket = await websockets.connect(f"ws://localhost:{port}", subprotocols=[subprotocol], max_size=None)
+    try:
+        await websocket.recv()  # welcome message
+        request_id = 0
+        for message_type, payload in MESSAGES.items():
+            samples = []
+            # A few untimed requests first, so module loading isn't measured
+            for index in range(requests + 5):
+                request_id += 1
+                started = time.perf_counter()
+                await websocket.send(codec.encode({"type": message_type, "request_id": request_id, **payload}))
+                while codec.decode(await websocket.recv()).get("request_id") != request_id:
+                    pass
+                if index >= 5:
+                    samples.append((time.perf_counter() - started) * 1000)
+            samples.sort()
+            rows.append({
+                "case": f"ws/{message_type}/{codec.name}",
+                "protocol": codec.name,
+                "op": message_type,
+                "min_ms": round(samples[0], 3),
+                "median_ms": round(statistics.median(samples), 3),
+                "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+            })
+    finally:
+        await websocket.close()
+    return rows
+
+
+async def serve_and_measure(requests: int) -> list:
+    port = free_port()
+    server = WebSocketServer(port=port)
+    registry = ModuleRegistry(server, context={"publish": server.publish})
+    registry.discover()
+
+    async def echo(data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"type": "bench/echo"}
+
+    server.register_handler("bench/echo", echo)
+    serving = asyncio.create_task(server.start())
+    await server.listening.wait()
+    try:
+        rows = []
+        for subprotocol in available_subprotocols():
+            rows.extend(await round_trips(port, subprotocol, requests))
+        return rows
+    finally:
+        serving.cancel()
+
+
+def run(requests: int) -> list:
+    with scratch_dir():
+        try:
+            seed()
+            return asyncio.run(serve_and_measure(requests))
+        finally:
+            hardware_service.release_resources()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per message type")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    rows = run(args.requests)
+    emit(rows, ["case", "min_ms", "median_ms", "p95_ms"], args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Async access to the SQLite databases for ATLAS Assistant.
+
+sqlite3 calls block, so awaiting code must not run them on the websocket
+event loop. AsyncDatabase runs them on dedicated threads instead:
+
+- Writes go through one writer thread fed by a queue, so they are applied
+  one at a time in submission order (SQLite allows a single writer anyway).
+- Reads run on a small thread pool next to it.
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from database import get_database
+from hardware_database import get_hardware_database
+
+logger = logging.getLogger(__name__)
+
+
+def _resolve_future(future: asyncio.Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+    """Complete a future from the event loop thread, unless it was cancelled."""
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class AsyncDatabase:
+    """Awaitable facade over a Database or HardwareDatabase."""
+
+    def __init__(self, db_factory: Callable[[], Any], name: str, readers: int = 2) -> None:
+        """Initialize the facade.
+
+        Args:
+            db_factory: Returns the wrapped database (called lazily, off the event loop)
+            name: Prefix for the worker thread names
+            readers: Number of threads serving read queries
+        """
+        self._db_factory = db_factory
+        self._db: Any = None
+        self._init_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._run_writer, name=f"{name}-writer", daemon=True)
+        self._writer.start()
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix=f"{name}-reader")
+
+    @property
+    def db(self) -> Any:
+        """The wrapped database, created on first use."""
+        if self._db is None:
+            with self._init_lock:
+                if self._db is None:
+                    self._db = self._db_factory()
+        return self._db
+
+    def _call(self, fn: Callable, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        self.db  # make sure schema setup happened before the first query
+        return fn(*args, **kwargs)
+
+    def _run_writer(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            fn, args, kwargs, future, loop = item
+            if future.cancelled():
+                continue
+            try:
+                result = self._call(fn, args, kwargs)
+            except BaseException as e:
+                loop.call_soon_threadsafe(_resolve_future, future, None, e)
+            else:
+                loop.call_soon_threadsafe(_resolve_future, future, result)
+
+    async def run_write(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking callable on the writer thread and await its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((fn, args, kwargs, future, loop))
+        return await future
+
+    async def run_read(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking read-only callable on a reader thread and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, partial(self._call, fn, args, kwargs))
+
+    async def execute(self, query: str, params: Iterable[Any] = ()) -> List[Dict[str, Any]]:
+        """Execute a SELECT query off the event loop."""
+        return await self.run_read(lambda: self.db.execute(query, tuple(params)))
+
+    async def execute_write(self, query: str, params: Iterable[Any] = ()) -> int:
+        """Execute an INSERT/UPDATE/DELETE query on the writer thread."""
+        return await self.run_write(lambda: self.db.execute_write(query, tuple(params)))
+
+    async def transaction(self, fn: Callable[[Any], Any]) -> Any:
+        """Run fn(conn) inside a single transaction on the writer thread.
+
+        The transaction commits when fn returns and rolls back if it raises.
+        """
+        def run_in_transaction() -> Any:
+            with self.db.get_connection() as conn:
+                return fn(conn)
+
+        return await self.run_write(run_in_transaction)
+
+    def close(self) -> None:
+        """Stop the worker threads once queued work has finished."""
+        self._queue.put(None)
+        self._readers.shutdown(wait=False)
+
+
+# Global async facades
+_async_db: Optional[AsyncDatabase] = None
+_async_hardware_db: Optional[AsyncDatabase] = None
+
+
+def get_async_database() -> AsyncDatabase:
+    """Get or create the async facade over the core atlas.db."""
+    global _async_db
+    if _async_db is None:
+        _async_db = AsyncDatabase(get_database, "atlas-db")
+    return _async_db
+
+
+def get_async_hardware_database() -> AsyncDatabase:
+    """Get or create the async facade over the hardware catalog database."""
+    global _async_hardware_db
+    if _async_hardware_db is None:
+        _async_hardware_db = AsyncDatabase(get_hardware_database, "hardware-db")
+    return _async_hardware_db
+
+
+def close_async_hardware_database() -> None:
+    """Stop the hardware facade's threads; the next get_async_hardware_database() starts new ones."""
+    global _async_hardware_db
+    if _async_hardware_db is not None:
+        _async_hardware_db.close()
+        _async_hardware_db = None
@@ -0,0 +1,214 @@
+"""Binary audio framing and buffering for streamed voice input.
+
+Clients send microphone audio as binary websocket frames instead of base64
+inside JSON:
+
+    offset  size  field
+    0       4     magic b"ATAU"
+    4       4     stream id (uint32, little-endian), from 'voice/started'
+    8       4     sequence number (uint32, little-endian), starting at 0
+    12      ...   PCM samples, signed 16-bit little-endian, mono
+
+Synthesized speech goes the other way in the same layout, with magic
+b"ATTS" and the job id from 'voice/speech/start'.
+
+Samples are read straight out of the frame (np.frombuffer, no copy) into a
+preallocated ring buffer, from which the consumer takes contiguous views.
+"""
+
+import asyncio
+import logging
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+AUDIO_FRAME_MAGIC = b"ATAU"
+SPEECH_FRAME_MAGIC = b"ATTS"
+AUDIO_HEADER = struct.Struct("<4sII")
+SAMPLE_DTYPE = np.dtype("<i2")
+
+logger = logging.getLogger(__name__)
+
+
+def parse_audio_frame(frame: bytes) -> Tuple[int, int, np.ndarray]:
+    """Split an audio frame into (stream_id, sequence, samples).
+
+    The samples array is a read-only view on the frame's bytes.
+
+    Raises:
+        ValueError: If the frame is not a well-formed audio frame
+    """
+    if len(frame) < AUDIO_HEADER.size or frame[:4] != AUDIO_FRAME_MAGIC:
+        raise ValueError("Not an audio frame")
+    if (len(frame) - AUDIO_HEADER.size) % SAMPLE_DTYPE.itemsize:
+        raise ValueError("Audio frame ends in a partial sample")
+    _, stream_id, sequence = AUDIO_HEADER.unpack_from(frame)
+    samples = np.frombuffer(frame, dtype=SAMPLE_DTYPE, offset=AUDIO_HEADER.size)
+    return stream_id, sequence, samples
+
+
+def pack_audio_frame(stream_id: int, sequence: int, samples: Any, magic: bytes = AUDIO_FRAME_MAGIC) -> bytes:
+    """Build an audio frame from int16 samples (or raw s16le bytes)."""
+    if isinstance(samples, (bytes, bytearray, memoryview)):
+        payload = bytes(samples)
+    else:
+        payload = np.asarray(samples, dtype=SAMPLE_DTYPE).tobytes()
+    return AUDIO_HEADER.pack(magic, stream_id, sequence & 0xFFFFFFFF) + payload
+
+
+class AudioRingBuffer:
+    """Fixed-size single-producer/single-consumer ring of int16 samples.
+
+    Not thread-safe; the producer and consumer share one event loop.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(1, int(capacity))
+        self._data = np.zeros(self.capacity, dtype=SAMPLE_DTYPE)
+        self._read = 0  # total samples consumed
+        self._write = 0  # total samples written
+
+    @property
+    def available(self) -> int:
+        """Samples written but not yet consumed."""
+        return self._write - self._read
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self.available
+
+    def write(self, samples: np.ndarray) -> int:
+        """Copy as many samples as fit; returns how many were written."""
+        count = min(len(samples), self.free)
+        start = self._write % self.capacity
+        first = min(count, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        if count > first:
+            self._data[:count - first] = samples[first:count]
+        self._write += count
+        return count
+
+    def peek(self, max_samples: Optional[int] = None) -> List[np.ndarray]:
+        """Views on up to max_samples unread samples (two when the data wraps).
+
+        The views stay valid until consume() is called for them.
+        """
+        count = self.available if max_samples is None else min(max_samples, self.available)
+        start = self._read % self.capacity
+        first = min(count, self.capacity - start)
+        views = [self._data[start:start + first]] if first else []
+        if count > first:
+            views.append(self._data[:count - first])
+        return views
+
+    def consume(self, count: int) -> None:
+        self._read += min(count, self.available)
+
+
+class AudioStream:
+    """One client's voice stream: a ring buffer drained into a VoiceProcessor.
+
+    write() waits while the ring is full, which stops the server reading
+    that client's socket and so pushes back on the sender. A chunk that
+    still doesn't fit after stall_timeout seconds is dropped (and counted)
+    rather than blocking the connection indefinitely.
+    """
+
+    def __init__(
+        self,
+        stream_id: int,
+        processor: Any,
+        sample_rate: int,
+        buffer_seconds: float,
+        feed_samples: int,
+        stall_timeout: float,
+    ) -> None:
+        self.id = stream_id
+        self.processor = processor
+        self.sample_rate = sample_rate
+        self.ring = AudioRingBuffer(int(sample_rate * buffer_seconds))
+        self.feed_samples = max(1, feed_samples)
+        self.stall_timeout = stall_timeout
+        self.next_sequence = 0
+        self.stats: Dict[str, int] = {
+            "frames": 0,
+            "samples": 0,
+            "lost_frames": 0,
+            "late_frames": 0,
+            "dropped_samples": 0,
+            "stalls": 0,
+        }
+        self._data_ready = asyncio.Event()
+        self._space_ready = asyncio.Event()
+        self._closing = False
+        self._consumer = asyncio.create_task(self._drain())
+
+    async def write(self, sequence: int, samples: np.ndarray) -> None:
+        """Append one frame's samples, waiting for room in the ring if needed."""
+        if self._closing:
+            return
+        if sequence < self.next_sequence:
+            self.stats["late_frames"] += 1
+            return
+        self.stats["lost_frames"] += sequence - self.next_sequence
+        self.next_sequence = sequence + 1
+        self.stats["frames"] += 1
+
+        offset = 0
+        while offset < len(samples):
+            written = self.ring.write(samples[offset:])
+            offset += written
+            if written:
+                self._data_ready.set()
+            if offset < len(samples):
+                self.stats["stalls"] += 1
+                self._space_ready.clear()
+                try:
+                    await asyncio.wait_for(self._space_ready.wait(), self.stall_timeout)
+                except asyncio.TimeoutError:
+                    pass
+                if self._closing or not self.ring.free:
+                    self.stats["dropped_samples"] += len(samples) - offset
+                    break
+        self.stats["samples"] += offset
+
+    async def _drain(self) -> None:
+        try:
+            await self._feed_until_closed()
+        except Exception:
+            # Nobody awaits this task until close(); don't let the stream
+            # die silently while the client keeps sending audio into it
+            logger.exception("Voice stream %s: draining audio failed, closing the stream", self.id)
+            self._closing = True
+            self._space_ready.set()
+
+    async def _feed_until_closed(self) -> None:
+        while True:
+            await self._data_ready.wait()
+            self._data_ready.clear()
+            while self.ring.available:
+                for view in self.ring.peek(self.feed_samples):
+                    try:
+                        self.processor.feed_audio(view)
+                    except Exception as exc:
+                        # Skip the chunk rather than stall the sender
+                        logger.error("Voice stream %s: feeding audio failed: %s", self.id, exc)
+                    self.ring.consume(len(view))
+                self._space_ready.set()
+                # Let the socket reader refill the ring between feeds
+                await asyncio.sleep(0)
+            if self._closing:
+                return
+
+    async def close(self) -> None:
+        """Feed everything still buffered to the processor and stop draining."""
+        self._closing = True
+        self._data_ready.set()
+        self._space_ready.set()
+        await self._consumer
+
+    def cancel(self) -> None:
+        """Stop without draining, e.g. when the client disconnects."""
+        self._closing = True
+        self._consumer.cancel()
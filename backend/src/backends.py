@@ -0,0 +1,151 @@
+"""Optional heavy dependencies and background loading of the components using them.
+
+The ML stacks (torch, whisper, transformers, librosa, kokoro) take seconds
+to import, so the server process never imports them at startup:
+
+- engines import them inside their worker processes, when loading a model
+- main() serves the core handlers (system info, notes, hardware) as soon as
+  the websocket server listens, and loads the voice and assistant components
+  in the background with a ComponentLoader, which reports their readiness
+
+is_installed() checks for a dependency without importing it.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Packages that must never be imported while the server starts
+HEAVY_MODULES = ("torch", "torchaudio", "whisper", "transformers", "librosa", "kokoro", "bitsandbytes")
+
+
+def is_installed(name: str) -> bool:
+    """Check whether a top-level package can be imported, without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def loaded_heavy_modules() -> List[str]:
+    """Names from HEAVY_MODULES already imported into this process."""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+class ComponentLoader:
+    """Loads named components concurrently in the background and tracks their state.
+
+    Each component has an async load function (import off the event loop,
+    register handlers, start and await its workers) and the message type
+    prefixes its handlers will serve. States go pending -> loading -> ready
+    or failed; on_change is called with status() after every transition.
+    Messages for a component that isn't loaded get a 'system/loading' reply
+    from handle_unavailable() instead of silence.
+    """
+
+    def __init__(self, on_change: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        self.on_change = on_change
+        self._components: Dict[str, Dict[str, Any]] = {}
+        self._loads: Dict[str, Callable[[], Awaitable[None]]] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def add(
+        self,
+        name: str,
+        load: Callable[[], Awaitable[None]],
+        prefixes: Sequence[str] = (),
+        requires: Sequence[str] = (),
+    ) -> None:
+        """Add a component.
+
+        Args:
+            name: Component name reported to the frontend
+            load: Async callable that loads the component, raising on failure
+            prefixes: Message type prefixes (e.g. 'voice/') served once loaded
+            requires: Optional packages it uses, reported as installed or not
+        """
+        self._loads[name] = load
+        self._components[name] = {
+            "state": "pending",
+            "prefixes": tuple(prefixes),
+            "installed": {package: is_installed(package) for package in requires},
+            "seconds": None,
+            "error": None,
+        }
+
+    def state(self, name: str) -> Optional[str]:
+        component = self._components.get(name)
+        return component["state"] if component else None
+
+    @property
+    def all_ready(self) -> bool:
+        return all(component["state"] == "ready" for component in self._components.values())
+
+    def status(self) -> Dict[str, Any]:
+        """Per component: state, load seconds, error and which optional packages are installed."""
+        return {
+            name: {key: value for key, value in component.items() if key != "prefixes"}
+            for name, component in self._components.items()
+        }
+
+    def component_for(self, message_type: str) -> Optional[str]:
+        """The component whose handlers serve a message type, if any."""
+        for name, component in self._components.items():
+            if any(message_type.startswith(prefix) for prefix in component["prefixes"]):
+                return name
+        return None
+
+    async def run(self, after: Optional[asyncio.Event] = None) -> None:
+        """Load all components concurrently, optionally once `after` is set."""
+        if after is not None:
+            await after.wait()
+        self._tasks = [asyncio.create_task(self._load(name)) for name in self._loads]
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def cancel(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+    async def _load(self, name: str) -> None:
+        component = self._components[name]
+        self._set(name, state="loading")
+        started = time.perf_counter()
+        try:
+            await self._loads[name]()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.error("Component %s failed to load: %s", name, exc)
+            self._set(name, state="failed", error=str(exc), seconds=round(time.perf_counter() - started, 3))
+            return
+        self._set(name, state="ready", seconds=round(time.perf_counter() - started, 3))
+        logger.info("Component %s ready after %.2fs", name, component["seconds"])
+
+    def _set(self, name: str, **fields: Any) -> None:
+        self._components[name].update(fields)
+        if self.on_change is not None:
+            self.on_change(self.status())
+
+    async def handle_unavailable(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Fallback message handler: explain that a component isn't loaded (yet)."""
+        message_type = data.get("type", "unknown")
+        name = self.component_for(message_type)
+        if name is None:
+            logger.warning("No handler for message type: %s", message_type)
+            return None
+        state = self._components[name]["state"]
+        return {
+            "type": "system/loading",
+            "for": message_type,
+            "component": name,
+            "state": state,
+            "message": (
+                "Dit onderdeel is niet beschikbaar" if state == "failed"
+                else "Dit onderdeel wordt nog geladen"
+            ),
+        }
@@ -0,0 +1,134 @@
+"""Pooled SQLite connections shared by the ATLAS databases.
+
+Opening a connection per query pays for the file open, schema parse and
+pragma setup every time. A pool keeps them open instead: one writer
+connection (SQLite allows a single writer) and a few read-only connections.
+In WAL mode readers see the last committed state and never wait for the
+writer, so a long catalog import doesn't block searches.
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+# Applied to every pooled connection
+CONNECTION_PRAGMAS: Dict[str, Any] = {
+    "synchronous": "NORMAL",  # durable in WAL mode, without an fsync per commit
+    "foreign_keys": "ON",
+    "temp_store": "MEMORY",
+    "cache_size": -16000,  # 16 MB page cache (negative = KiB)
+    "mmap_size": 268435456,  # 256 MB memory-mapped reads
+    "busy_timeout": 5000,
+}
+
+# Prepared statements kept per connection by the sqlite3 module
+STATEMENT_CACHE_SIZE = 256
+
+
+def write_result(cursor: sqlite3.Cursor, query: str) -> int:
+    """Return the inserted row ID for INSERTs, otherwise the affected row count.
+
+    lastrowid is connection-wide, so on a long-lived connection it still holds
+    the previous insert's ID after an UPDATE or DELETE and can't be used as a
+    "something happened" signal on its own. The same goes for an upsert
+    (INSERT ... ON CONFLICT DO UPDATE) that updated an existing row: use
+    RETURNING id for those.
+    """
+    if cursor.rowcount > 0 and query.lstrip()[:7].upper() in ("INSERT ", "REPLACE"):
+        return cursor.lastrowid or cursor.rowcount
+    return cursor.rowcount
+
+
+class ConnectionPool:
+    """One writer connection plus a bounded set of reader connections."""
+
+    def __init__(self, db_path: Path, max_readers: int = 4) -> None:
+        """Open the writer connection and switch the database to WAL mode.
+
+        Args:
+            db_path: Path to the SQLite database file
+            max_readers: Maximum number of reader connections kept open
+        """
+        self.db_path = Path(db_path)
+        self.max_readers = max(1, max_readers)
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode = WAL")
+        # Re-entrant so nested writer() blocks share one transaction
+        self._writer_lock = threading.RLock()
+        self._writer_depth = 0
+        self._idle_readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all_readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,  # the pool hands connections to one thread at a time
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma, value in CONNECTION_PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Borrow the writer connection for one transaction.
+
+        The outermost block commits on success and rolls back on error;
+        nested blocks on the same thread join the outer transaction.
+        """
+        with self._writer_lock:
+            self._writer_depth += 1
+            outermost = self._writer_depth == 1
+            try:
+                yield self._writer
+                if outermost:
+                    self._writer.commit()
+            except BaseException:
+                if outermost:
+                    self._writer.rollback()
+                raise
+            finally:
+                self._writer_depth -= 1
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection, opening a new one if the pool isn't full."""
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle_readers.put(conn)
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            return self._idle_readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._readers_lock:
+            if len(self._all_readers) < self.max_readers:
+                conn = self._connect(read_only=True)
+                self._all_readers.append(conn)
+                return conn
+        return self._idle_readers.get()
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        with self._writer_lock:
+            self._writer.close()
+        with self._readers_lock:
+            for conn in self._all_readers:
+                conn.close()
+            self._all_readers.clear()
+        logger.info("Connection pool for %s closed", self.db_path)
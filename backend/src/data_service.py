@@ -8,6 +8,8 @@ import logging
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 from database import get_database
+from async_database import get_async_database
+from pagination import clamp_limit, decode_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -20,10 +22,58 @@ def get_all_notes() -> List[Dict[str, Any]]:
     """Get all notes from database, ordered by creation date (newest first)."""
     db = get_database()
     return db.execute(
-        "SELECT id, text, created_at FROM notes ORDER BY created_at DESC"
+        "SELECT id, text, created_at, version FROM notes ORDER BY created_at DESC"
     )
 
 
+def get_notes_version() -> int:
+    """Get the current notes change version (bumped on every insert/update/delete)."""
+    db = get_database()
+    result = db.execute("SELECT version FROM notes_sync WHERE id = 1")
+    return int(result[0]['version']) if result else 0
+
+
+def _current_version(conn) -> int:
+    """Read the change version inside an open write transaction."""
+    return int(conn.execute("SELECT version FROM notes_sync WHERE id = 1").fetchone()[0])
+
+
+def get_notes_page(limit: int = 100, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """Get one page of notes, newest first, plus a cursor for the next page.
+    
+    Args:
+        limit: Maximum number of notes on the page
+        cursor: Cursor returned with the previous page, or None for the first
+        
+    Returns:
+        Dict with 'notes' and 'next_cursor' (None on the last page)
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    db = get_database()
+    limit = clamp_limit(limit)
+    after = decode_cursor(cursor, 2)
+    
+    if after:
+        rows = db.execute(
+            "SELECT id, text, created_at, version FROM notes WHERE (created_at, id) < (?, ?) "
+            "ORDER BY created_at DESC, id DESC LIMIT ?",
+            (after[0], after[1], limit + 1)
+        )
+    else:
+        rows = db.execute(
+            "SELECT id, text, created_at, version FROM notes ORDER BY created_at DESC, id DESC LIMIT ?",
+            (limit + 1,)
+        )
+    
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor([last['created_at'], last['id']])
+    return {'notes': rows[:limit], 'next_cursor': next_cursor}
+
+
 def add_note(text: str) -> Dict[str, Any]:
     """Add a new note to the database.
     
@@ -31,7 +81,7 @@ def add_note(text: str) -> Dict[str, Any]:
         text: The note text content
         
     Returns:
-        The created note with id, text, and created_at
+        The created note with id, text, created_at and its change version
         
     Raises:
         ValueError: If text is empty
@@ -41,10 +91,13 @@ def add_note(text: str) -> Dict[str, Any]:
     
     db = get_database()
     created_at = datetime.utcnow().isoformat() + 'Z'
-    note_id = db.execute_write(
-        "INSERT INTO notes (text, created_at) VALUES (?, ?)",
-        (text.strip(), created_at)
-    )
+    with db.get_connection() as conn:
+        cursor = conn.execute(
+            "INSERT INTO notes (text, created_at) VALUES (?, ?)",
+            (text.strip(), created_at)
+        )
+        note_id = cursor.lastrowid
+        version = _current_version(conn)
     
     logger.info(f"Note created with ID: {note_id}")
     
@@ -52,30 +105,33 @@ def add_note(text: str) -> Dict[str, Any]:
         'id': note_id,
         'text': text.strip(),
         'created_at': created_at,
+        'version': version,
     }
 
 
-def delete_note(note_id: int) -> bool:
+def delete_note(note_id: int) -> Optional[int]:
     """Delete a note from the database.
     
     Args:
         note_id: The ID of the note to delete
         
     Returns:
-        True if note was deleted, False if not found
+        The change version of the deletion, or None if the note was not found
     """
     db = get_database()
-    rows_affected = db.execute_write(
-        "DELETE FROM notes WHERE id = ?",
-        (note_id,)
-    )
+    with db.get_connection() as conn:
+        rows_affected = conn.execute(
+            "DELETE FROM notes WHERE id = ?",
+            (note_id,)
+        ).rowcount
+        version = _current_version(conn)
     
     if rows_affected > 0:
         logger.info(f"Note deleted: ID {note_id}")
-        return True
+        return version
     else:
         logger.warning(f"Note not found: ID {note_id}")
-        return False
+        return None
 
 
 def get_note_by_id(note_id: int) -> Optional[Dict[str, Any]]:
@@ -89,13 +145,13 @@ def get_note_by_id(note_id: int) -> Optional[Dict[str, Any]]:
     """
     db = get_database()
     results = db.execute(
-        "SELECT id, text, created_at FROM notes WHERE id = ?",
+        "SELECT id, text, created_at, version FROM notes WHERE id = ?",
         (note_id,)
     )
     return results[0] if results else None
 
 
-def update_note(note_id: int, text: str) -> bool:
+def update_note(note_id: int, text: str) -> Optional[int]:
     """Update an existing note.
     
     Args:
@@ -103,7 +159,7 @@ def update_note(note_id: int, text: str) -> bool:
         text: The new text content
         
     Returns:
-        True if note was updated, False if not found
+        The change version of the update, or None if the note was not found
         
     Raises:
         ValueError: If text is empty
@@ -113,17 +169,100 @@ def update_note(note_id: int, text: str) -> bool:
     
     db = get_database()
     updated_at = datetime.utcnow().isoformat() + 'Z'
-    rows_affected = db.execute_write(
-        "UPDATE notes SET text = ?, updated_at = ? WHERE id = ?",
-        (text.strip(), updated_at, note_id)
-    )
+    with db.get_connection() as conn:
+        rows_affected = conn.execute(
+            "UPDATE notes SET text = ?, updated_at = ? WHERE id = ?",
+            (text.strip(), updated_at, note_id)
+        ).rowcount
+        version = _current_version(conn)
     
     if rows_affected > 0:
         logger.info(f"Note updated: ID {note_id}")
-        return True
+        return version
     else:
         logger.warning(f"Note not found: ID {note_id}")
-        return False
+        return None
+
+
+def get_note_changes(since_version: int) -> Dict[str, Any]:
+    """Get everything that changed in notes after a given version.
+    
+    Args:
+        since_version: Last version the caller has applied
+        
+    Returns:
+        Dict with the current 'version', changed or inserted 'notes', and
+        'deleted' note IDs. If since_version is 0 or unknown (e.g. newer than
+        the database), 'full' is True and 'notes' holds every note instead.
+    """
+    db = get_database()
+    # Read the version first: a change racing with this read is then sent
+    # again on the next sync rather than skipped
+    version = get_notes_version()
+    
+    if since_version <= 0 or since_version > version:
+        return {'version': version, 'full': True, 'notes': get_all_notes(), 'deleted': []}
+    
+    notes = db.execute(
+        "SELECT id, text, created_at, updated_at, version FROM notes WHERE version > ? ORDER BY version",
+        (since_version,)
+    )
+    deleted = db.execute(
+        "SELECT id FROM note_tombstones WHERE version > ? ORDER BY version",
+        (since_version,)
+    )
+    return {
+        'version': version,
+        'full': False,
+        'notes': notes,
+        'deleted': [row['id'] for row in deleted],
+    }
+
+
+# ============================================================================
+# ASYNC VARIANTS
+# ============================================================================
+# Awaitable versions for async handlers. Writes run on the database writer
+# thread and reads on its reader pool, so SQLite never blocks the event loop.
+
+async def get_all_notes_async() -> List[Dict[str, Any]]:
+    """Async variant of get_all_notes."""
+    return await get_async_database().run_read(get_all_notes)
+
+
+async def get_notes_page_async(limit: int = 100, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """Async variant of get_notes_page."""
+    return await get_async_database().run_read(get_notes_page, limit, cursor)
+
+
+async def add_note_async(text: str) -> Dict[str, Any]:
+    """Async variant of add_note."""
+    return await get_async_database().run_write(add_note, text)
+
+
+async def delete_note_async(note_id: int) -> Optional[int]:
+    """Async variant of delete_note."""
+    return await get_async_database().run_write(delete_note, note_id)
+
+
+async def get_note_by_id_async(note_id: int) -> Optional[Dict[str, Any]]:
+    """Async variant of get_note_by_id."""
+    return await get_async_database().run_read(get_note_by_id, note_id)
+
+
+async def update_note_async(note_id: int, text: str) -> Optional[int]:
+    """Async variant of update_note."""
+    return await get_async_database().run_write(update_note, note_id, text)
+
+
+async def get_notes_version_async() -> int:
+    """Async variant of get_notes_version."""
+    return await get_async_database().run_read(get_notes_version)
+
+
+async def get_note_changes_async(since_version: int) -> Dict[str, Any]:
+    """Async variant of get_note_changes."""
+    return await get_async_database().run_read(get_note_changes, since_version)
 
 
 # ============================================================================
@@ -1,11 +1,12 @@
 """Database manager for ATLAS Assistant using SQLite."""
 
 import logging
-import sqlite3
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 from contextlib import contextmanager
 
+from connection_pool import ConnectionPool, write_result
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,23 +21,25 @@ class Database:
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.pool = ConnectionPool(self.db_path)
         self._init_database()
         logger.info(f"Database initialized at {self.db_path}")
 
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Enable column access by name
+        """Context manager for a write transaction on the pooled writer connection."""
         try:
-            yield conn
-            conn.commit()
+            with self.pool.writer() as conn:
+                yield conn
         except Exception as e:
-            conn.rollback()
             logger.error(f"Database error: {e}")
             raise
-        finally:
-            conn.close()
+
+    @contextmanager
+    def get_read_connection(self):
+        """Context manager for a pooled read-only connection."""
+        with self.pool.reader() as conn:
+            yield conn
 
     def _init_database(self) -> None:
         """Initialize database tables."""
@@ -53,11 +56,68 @@ class Database:
                 )
             """)
             
+            # Keyset pagination order used by data_service.get_notes_page
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_notes_created ON notes(created_at, id)"
+            )
+            
+            self._init_notes_versioning(cursor)
+            
             # You can add more tables here as needed
             # Example: tasks, reminders, logs, etc.
             
             logger.info("Database tables initialized")
 
+    def _init_notes_versioning(self, cursor) -> None:
+        """Set up change versions for notes, used by delta sync.
+        
+        Every insert, update and delete bumps a single counter in notes_sync.
+        Rows carry the version of their last change and deletions leave a
+        tombstone, so 'what changed since version N' is an index range scan.
+        Triggers keep this correct for every writer.
+        """
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(notes)")}
+        if 'version' not in columns:
+            cursor.execute("ALTER TABLE notes ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_notes_version ON notes(version)")
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS notes_sync (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO notes_sync (id, version) VALUES (1, 0)")
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS note_tombstones (
+                id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_note_tombstones_version ON note_tombstones(version)")
+        
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS notes_version_insert AFTER INSERT ON notes BEGIN
+                UPDATE notes_sync SET version = version + 1 WHERE id = 1;
+                UPDATE notes SET version = (SELECT version FROM notes_sync WHERE id = 1) WHERE id = NEW.id;
+                DELETE FROM note_tombstones WHERE id = NEW.id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS notes_version_update AFTER UPDATE OF text, updated_at ON notes BEGIN
+                UPDATE notes_sync SET version = version + 1 WHERE id = 1;
+                UPDATE notes SET version = (SELECT version FROM notes_sync WHERE id = 1) WHERE id = NEW.id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS notes_version_delete AFTER DELETE ON notes BEGIN
+                UPDATE notes_sync SET version = version + 1 WHERE id = 1;
+                INSERT OR REPLACE INTO note_tombstones (id, version)
+                VALUES (OLD.id, (SELECT version FROM notes_sync WHERE id = 1));
+            END
+        """)
+
     def execute(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
         """Execute a SELECT query and return results as list of dicts.
         
@@ -68,7 +128,7 @@ class Database:
         Returns:
             List of rows as dictionaries
         """
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(query, params)
             rows = cursor.fetchall()
@@ -87,7 +147,11 @@ class Database:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(query, params)
-            return cursor.lastrowid if cursor.lastrowid else cursor.rowcount
+            return write_result(cursor, query)
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.pool.close()
 
 
 # Global database instance
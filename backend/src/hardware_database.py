@@ -10,6 +10,8 @@ from contextlib import contextmanager
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional
 
+from connection_pool import ConnectionPool, write_result
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,22 +20,21 @@ class HardwareDatabase:
 
     def __init__(self, db_path: str = "backend/data/hardware_parts.db") -> None:
         self.db_path = Path(db_path)
+        self.fts_enabled = False
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.pool = ConnectionPool(self.db_path)
         self._init_database()
         logger.info("Hardware database ready at %s", self.db_path)
 
     @contextmanager
     def get_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
+        with self.pool.writer() as conn:
+            yield conn
+
+    @contextmanager
+    def get_read_connection(self):
+        with self.pool.reader() as conn:
             yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
 
     def _init_database(self) -> None:
         with self.get_connection() as conn:
@@ -88,12 +89,241 @@ class HardwareDatabase:
             cur.execute("CREATE INDEX IF NOT EXISTS idx_parts_category ON parts(category)")
             cur.execute("CREATE INDEX IF NOT EXISTS idx_parts_platform ON parts(platform)")
             cur.execute("CREATE INDEX IF NOT EXISTS idx_circuits_platform ON circuits(platform)")
+            # Keyset pagination order used by hardware_service.list_parts_page
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_parts_listing ON parts(platform, category, name, id)"
+            )
+
+            self._init_sync_columns(cur)
+            # version: bumped on every save, so clients can detect concurrent edits.
+            # head_revision: the current layout in circuit_revisions, and
+            # layout_hash its content hash (to skip unchanged saves).
+            # layout_blob: zlib-compressed layouts from before revisions; like
+            # the plain layout column it is only read, and cleared on the next save
+            self._add_missing_columns(cur, "circuits", {
+                "version": "INTEGER NOT NULL DEFAULT 1",
+                "layout_blob": "BLOB",
+                "layout_hash": "TEXT",
+                "head_revision": "INTEGER",
+            })
+
+            # Layout history: full keyframes every few revisions, deltas in between
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS circuit_revisions (
+                    circuit_id INTEGER NOT NULL,
+                    revision INTEGER NOT NULL,
+                    kind TEXT NOT NULL CHECK (kind IN ('keyframe', 'delta')),
+                    data BLOB NOT NULL,
+                    layout_hash TEXT,
+                    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+                    PRIMARY KEY (circuit_id, revision),
+                    FOREIGN KEY(circuit_id) REFERENCES circuits(id) ON DELETE CASCADE
+                )
+                """
+            )
+            self._init_facets(cur)
+            self._init_spec_index(cur)
+            self.fts_enabled = self._init_search_index(cur)
 
             conn.commit()
             logger.info("Hardware tables initialized")
 
+    def _init_sync_columns(self, cur: sqlite3.Cursor) -> None:
+        """Add the columns used by incremental catalog refreshes.
+
+        content_hash lets a refresh skip parts whose content didn't change;
+        stale marks parts a source no longer lists.
+        """
+        self._add_missing_columns(cur, "parts", {
+            "content_hash": "TEXT",
+            "stale": "INTEGER NOT NULL DEFAULT 0",
+        })
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_parts_source ON parts(source)")
+
+    def _add_missing_columns(self, cur: sqlite3.Cursor, table: str, columns: Dict[str, str]) -> None:
+        """Add columns introduced after a database file was first created."""
+        existing = {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
+        for name, definition in columns.items():
+            if name not in existing:
+                cur.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+    def _init_facets(self, cur: sqlite3.Cursor) -> None:
+        """Create the part_facets summary table and the triggers that maintain it.
+
+        Holds the total part count plus counts per platform, category and
+        source, so totals and filter counts never need a scan over parts.
+        A NULL category is stored as ''.
+        """
+        exists = cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'part_facets'").fetchone()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS part_facets (
+                facet TEXT NOT NULL,
+                value TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (facet, value)
+            ) WITHOUT ROWID
+            """
+        )
+
+        increment = """
+            INSERT INTO part_facets (facet, value, count) VALUES
+                ('total', '', 1),
+                ('platform', new.platform, 1),
+                ('category', COALESCE(new.category, ''), 1),
+                ('source', COALESCE(new.source, ''), 1)
+            ON CONFLICT(facet, value) DO UPDATE SET count = count + 1;
+        """
+        decrement = """
+            UPDATE part_facets SET count = count - 1
+            WHERE (facet = 'total' AND value = '')
+                OR (facet = 'platform' AND value = old.platform)
+                OR (facet = 'category' AND value = COALESCE(old.category, ''))
+                OR (facet = 'source' AND value = COALESCE(old.source, ''));
+            DELETE FROM part_facets WHERE count <= 0 AND facet != 'total';
+        """
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS part_facets_insert AFTER INSERT ON parts BEGIN {increment} END")
+        cur.execute(f"CREATE TRIGGER IF NOT EXISTS part_facets_delete AFTER DELETE ON parts BEGIN {decrement} END")
+        # Upserts rewrite category on every conflict; only recount real moves
+        cur.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS part_facets_update AFTER UPDATE OF platform, category, source ON parts
+            WHEN old.platform IS NOT new.platform OR old.category IS NOT new.category OR old.source IS NOT new.source
+            BEGIN {decrement} {increment} END
+            """
+        )
+
+        if not exists:
+            cur.execute(
+                """
+                INSERT INTO part_facets (facet, value, count)
+                SELECT 'total', '', COUNT(*) FROM parts
+                UNION ALL SELECT 'platform', platform, COUNT(*) FROM parts GROUP BY platform
+                UNION ALL SELECT 'category', COALESCE(category, ''), COUNT(*) FROM parts GROUP BY COALESCE(category, '')
+                UNION ALL SELECT 'source', COALESCE(source, ''), COUNT(*) FROM parts GROUP BY COALESCE(source, '')
+                """
+            )
+            logger.info("Built part facet counts")
+
+    def _init_spec_index(self, cur: sqlite3.Cursor) -> None:
+        """Create the part_specs key/value index over the specs JSON of each part.
+
+        Every top-level scalar in specs becomes a row; numbers (and booleans,
+        as 0/1) also fill value_num so range filters can use an index seek.
+        """
+        exists = cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'part_specs'").fetchone()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS part_specs (
+                part_id INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                value_text TEXT,
+                value_num REAL,
+                PRIMARY KEY (part_id, key)
+            ) WITHOUT ROWID
+            """
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_part_specs_num ON part_specs(key, value_num)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_part_specs_text ON part_specs(key, value_text COLLATE NOCASE)")
+
+        def extract(part: str) -> str:
+            return f"""
+                INSERT OR REPLACE INTO part_specs (part_id, key, value_text, value_num)
+                SELECT {part}.id, spec.key,
+                    CASE spec.type WHEN 'true' THEN 'true' WHEN 'false' THEN 'false' ELSE CAST(spec.value AS TEXT) END,
+                    CASE WHEN spec.type IN ('integer', 'real', 'true', 'false') THEN spec.value END
+                FROM {"parts, " if part == "parts" else ""}json_each(CASE WHEN json_valid({part}.specs) AND json_type({part}.specs) = 'object'
+                                    THEN {part}.specs ELSE '{{}}' END) AS spec
+                WHERE spec.type NOT IN ('object', 'array', 'null')
+            """
+
+        cur.execute(
+            f"CREATE TRIGGER IF NOT EXISTS part_specs_insert AFTER INSERT ON parts BEGIN {extract('new')}; END"
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS part_specs_delete AFTER DELETE ON parts BEGIN
+                DELETE FROM part_specs WHERE part_id = old.id;
+            END
+            """
+        )
+        cur.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS part_specs_update AFTER UPDATE OF specs ON parts
+            WHEN old.specs IS NOT new.specs
+            BEGIN
+                DELETE FROM part_specs WHERE part_id = old.id;
+                {extract('new')};
+            END
+            """
+        )
+
+        if not exists:
+            cur.execute(extract("parts"))
+            logger.info("Built spec index for existing parts")
+
+    def _init_search_index(self, cur: sqlite3.Cursor) -> bool:
+        """Create the FTS5 index over parts and the triggers that keep it in sync.
+
+        Returns False when this SQLite build lacks FTS5; search then falls back
+        to LIKE scans.
+        """
+        exists = cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'parts_fts'").fetchone()
+        try:
+            cur.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS parts_fts USING fts5(
+                    name, description, category, specs,
+                    content='parts', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2',
+                    prefix='2 3'
+                )
+                """
+            )
+        except sqlite3.OperationalError as exc:
+            logger.warning("FTS5 unavailable, part search falls back to LIKE: %s", exc)
+            return False
+
+        cur.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS parts_fts_insert AFTER INSERT ON parts BEGIN
+                INSERT INTO parts_fts(rowid, name, description, category, specs)
+                VALUES (new.id, new.name, new.description, new.category, new.specs);
+            END
+            """
+        )
+        cur.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS parts_fts_delete AFTER DELETE ON parts BEGIN
+                INSERT INTO parts_fts(parts_fts, rowid, name, description, category, specs)
+                VALUES ('delete', old.id, old.name, old.description, old.category, old.specs);
+            END
+            """
+        )
+        # Upserts touch these columns on every conflict; only reindex real changes
+        cur.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS parts_fts_update AFTER UPDATE OF name, description, category, specs ON parts
+            WHEN old.name IS NOT new.name OR old.description IS NOT new.description
+                OR old.category IS NOT new.category OR old.specs IS NOT new.specs
+            BEGIN
+                INSERT INTO parts_fts(parts_fts, rowid, name, description, category, specs)
+                VALUES ('delete', old.id, old.name, old.description, old.category, old.specs);
+                INSERT INTO parts_fts(rowid, name, description, category, specs)
+                VALUES (new.id, new.name, new.description, new.category, new.specs);
+            END
+            """
+        )
+
+        if not exists:
+            # Index parts that were stored before the FTS table existed
+            cur.execute("INSERT INTO parts_fts(parts_fts) VALUES ('rebuild')")
+            logger.info("Built full-text index for existing parts")
+        return True
+
     def execute(self, query: str, params: Iterable[Any] = ()) -> List[Dict[str, Any]]:
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cur = conn.cursor()
             cur.execute(query, tuple(params))
             rows = cur.fetchall()
@@ -103,7 +333,10 @@ class HardwareDatabase:
         with self.get_connection() as conn:
             cur = conn.cursor()
             cur.execute(query, tuple(params))
-            return cur.lastrowid if cur.lastrowid else cur.rowcount
+            return write_result(cur, query)
+
+    def close(self) -> None:
+        self.pool.close()
 
 
 _hardware_db: Optional[HardwareDatabase] = None
@@ -114,3 +347,11 @@ def get_hardware_database() -> HardwareDatabase:
     if _hardware_db is None:
         _hardware_db = HardwareDatabase()
     return _hardware_db
+
+
+def close_hardware_database() -> None:
+    """Close the shared instance; the next get_hardware_database() opens a new one."""
+    global _hardware_db
+    if _hardware_db is not None:
+        _hardware_db.close()
+        _hardware_db = None
@@ -4,12 +4,25 @@ Provides a separate pathway for managing Arduino/Raspberry Pi parts and
 circuit templates. Designed to work offline by default and sync on-demand.
 """
 
+import asyncio
+import csv
+import hashlib
 import json
 import logging
+import re
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
-from hardware_database import get_hardware_database
+from async_database import close_async_hardware_database, get_async_hardware_database
+from hardware_database import close_hardware_database, get_hardware_database
+from layout_delta import apply_delta, diff_layout
+from pagination import clamp_limit, decode_cursor, encode_cursor
+from result_cache import ResultCache
 
 logger = logging.getLogger(__name__)
 
@@ -92,6 +105,46 @@ SOURCE_REGISTRY = {
     "mock-rpi": _mock_source_rpi,
 }
 
+# Loaders run concurrently during a refresh; one that takes longer than this
+# is skipped and its parts are left untouched
+SOURCE_TIMEOUT_SECONDS = 30.0
+MAX_SOURCE_WORKERS = 8
+
+# ----------------------------------------------------------------------------
+# Result caches
+# ----------------------------------------------------------------------------
+# Reads are served from these until the next write. Part writes invalidate
+# both caches (circuit listings include part names), circuit writes only the
+# circuit cache.
+
+_parts_cache = ResultCache("parts", max_entries=256, max_bytes=32 * 1024 * 1024)
+_circuits_cache = ResultCache("circuits", max_entries=64, max_bytes=16 * 1024 * 1024)
+
+
+def _parts_changed() -> None:
+    _parts_cache.invalidate()
+    _circuits_cache.invalidate()
+
+
+def _circuits_changed() -> None:
+    _circuits_cache.invalidate()
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    return {"parts": _parts_cache.stats(), "circuits": _circuits_cache.stats()}
+
+
+def release_resources() -> None:
+    """Drop cached results and close the catalog database and its threads.
+
+    Everything is recreated on next use; call only while no catalog
+    operation is running.
+    """
+    _parts_cache.invalidate()
+    _circuits_cache.invalidate()
+    close_async_hardware_database()
+    close_hardware_database()
+
 # ----------------------------------------------------------------------------
 # Core helpers
 # ----------------------------------------------------------------------------
@@ -102,111 +155,686 @@ def _serialize_specs(specs: Optional[Dict[str, Any]]) -> str:
     return json.dumps(specs, ensure_ascii=False)
 
 
-def upsert_part(part: Dict[str, Any]) -> int:
-    db = get_hardware_database()
-    specs_json = _serialize_specs(part.get("specs"))
-    last_seen = part.get("last_seen") or (datetime.utcnow().isoformat() + "Z")
+UPSERT_PART_SQL = """
+    INSERT INTO parts (name, platform, category, description, specs, source, source_url, last_seen, content_hash)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(name, platform, source) DO UPDATE SET
+        category = excluded.category,
+        description = excluded.description,
+        specs = excluded.specs,
+        source_url = excluded.source_url,
+        last_seen = excluded.last_seen,
+        content_hash = excluded.content_hash,
+        stale = 0
+"""
 
-    query = (
-        """
-        INSERT INTO parts (name, platform, category, description, specs, source, source_url, last_seen)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(name, platform, source) DO UPDATE SET
-            category = excluded.category,
-            description = excluded.description,
-            specs = excluded.specs,
-            source_url = excluded.source_url,
-            last_seen = excluded.last_seen
-        """
-    )
+# Rows written per transaction by bulk imports
+IMPORT_CHUNK_SIZE = 2000
+
+CATALOG_FILE_SUFFIXES = (".jsonl", ".ndjson", ".csv")
+
+# Catalog files requested by clients are only read from this directory
+DEFAULT_IMPORT_DIR = "backend/data/imports"
+
+
+def _content_hash(values: tuple) -> str:
+    raw = json.dumps(values, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
 
-    params = (
-        part.get("name", "").strip(),
-        part.get("platform", "Unknown"),
+
+def _part_params(part: Dict[str, Any], now: Optional[str] = None) -> tuple:
+    values = (
+        (part.get("name") or "").strip(),
+        part.get("platform") or "Unknown",
         part.get("category"),
         part.get("description"),
-        specs_json,
-        part.get("source", "manual"),
+        _serialize_specs(part.get("specs")),
+        part.get("source") or "manual",
         part.get("source_url"),
-        last_seen,
     )
+    # last_seen changes on every fetch, so it isn't part of the content hash
+    last_seen = part.get("last_seen") or now or (datetime.utcnow().isoformat() + "Z")
+    return values + (last_seen, _content_hash(values))
+
+
+def upsert_part(part: Dict[str, Any]) -> int:
+    """Insert or update one part; returns its ID either way."""
+    db = get_hardware_database()
+    # lastrowid isn't updated when the conflict branch updates an existing
+    # row, so ask SQLite for the ID (executemany can't use RETURNING)
+    with db.get_connection() as conn:
+        part_id = conn.execute(UPSERT_PART_SQL + "RETURNING id", _part_params(part)).fetchone()[0]
+    _parts_changed()
+    return part_id
+
+
+def _write_part_chunk(rows: List[tuple]) -> None:
+    db = get_hardware_database()
+    with db.get_connection() as conn:
+        conn.executemany(UPSERT_PART_SQL, rows)
+    _parts_changed()
+
 
-    return db.execute_write(query, params)
+def bulk_import_parts(parts: Iterable[Dict[str, Any]], chunk_size: int = IMPORT_CHUNK_SIZE, progress: Optional[Callable[[int], None]] = None) -> Dict[str, Any]:
+    """Upsert parts with executemany, one transaction per chunk.
 
+    Parts are consumed lazily, so a generator keeps memory constant no matter
+    how large the catalog is. progress(rows_imported) is called after each chunk.
+    """
+    now = datetime.utcnow().isoformat() + "Z"
+    imported = 0
+    chunk: List[tuple] = []
 
-def bulk_import_parts(parts: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
-    inserted = 0
     for part in parts:
         if not part.get("name"):
             continue
-        upsert_part(part)
-        inserted += 1
+        chunk.append(_part_params(part, now))
+        if len(chunk) >= chunk_size:
+            _write_part_chunk(chunk)
+            imported += len(chunk)
+            chunk = []
+            if progress:
+                progress(imported)
+
+    if chunk:
+        _write_part_chunk(chunk)
+        imported += len(chunk)
+        if progress:
+            progress(imported)
 
     total = count_parts()
-    return {"imported": inserted, "total": total}
+    return {"imported": imported, "total": total}
+
+
+class _CatalogFileReader:
+    """Iterates parts from a JSONL or CSV catalog file, one line at a time."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.bytes_read = 0
+        self.skipped = 0
+
+    def _lines(self, handle) -> Iterator[str]:
+        encoding = "utf-8-sig"  # strip a BOM from the first line only
+        for raw in handle:
+            self.bytes_read += len(raw)
+            yield raw.decode(encoding)
+            encoding = "utf-8"
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        with open(self.path, "rb") as handle:
+            if self.path.suffix.lower() == ".csv":
+                for row in csv.DictReader(self._lines(handle)):
+                    yield self._from_csv(row)
+                return
+
+            for line_number, line in enumerate(self._lines(handle), start=1):
+                if not line.strip():
+                    continue
+                try:
+                    part = json.loads(line)
+                except ValueError:
+                    self.skipped += 1
+                    logger.warning("Skipping invalid JSON on line %s of %s", line_number, self.path)
+                    continue
+                if isinstance(part, dict):
+                    yield part
+                else:
+                    self.skipped += 1
+
+    def _from_csv(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        part = {key: (value or None) for key, value in row.items() if key}
+        specs = part.get("specs")
+        if isinstance(specs, str):
+            try:
+                part["specs"] = json.loads(specs)
+            except ValueError:
+                part["specs"] = {"raw": specs}
+        return part
+
+
+def iter_catalog_file(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream parts from a .jsonl/.ndjson or .csv catalog file with constant memory."""
+    return iter(_CatalogFileReader(Path(path)))
+
+
+def register_file_source(name: str, path: str) -> None:
+    """Register a local catalog file as a refreshable source.
+
+    Parts from the file are stored under the source name unless a row names
+    its own source.
+    """
+    SOURCE_REGISTRY[name] = lambda: iter_catalog_file(path)
+
+
+def resolve_import_path(path: str, import_dir: str = DEFAULT_IMPORT_DIR) -> Path:
+    """Resolve a client-supplied catalog file path inside import_dir.
+
+    Relative paths are taken from import_dir. Anything that resolves outside
+    it (absolute paths elsewhere, '..', symlinks out) is refused, so a
+    websocket client can't make the server read arbitrary files.
+
+    Raises:
+        ValueError: If the path lies outside import_dir
+    """
+    base = Path(import_dir).expanduser().resolve()
+    resolved = (base / Path(path).expanduser()).resolve()
+    if not resolved.is_relative_to(base):
+        raise ValueError(f"Bestand moet in de importmap staan: {base}")
+    return resolved
+
+
+def import_catalog_file(path: str, chunk_size: int = IMPORT_CHUNK_SIZE, progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Import a large catalog file incrementally.
+
+    progress receives a dict with rows, rows_per_sec, bytes_read, total_bytes,
+    percent and eta_seconds after every chunk.
+
+    Raises:
+        ValueError: If the file doesn't exist or has an unsupported format
+    """
+    file_path = Path(path).expanduser()
+    if not file_path.is_file():
+        raise ValueError(f"Bestand niet gevonden: {path}")
+    if file_path.suffix.lower() not in CATALOG_FILE_SUFFIXES:
+        raise ValueError(f"Niet ondersteund bestandstype: {file_path.suffix}")
+
+    reader = _CatalogFileReader(file_path)
+    total_bytes = file_path.stat().st_size
+    started = time.monotonic()
+
+    def report(rows: int) -> None:
+        if not progress:
+            return
+        elapsed = max(time.monotonic() - started, 1e-6)
+        fraction = reader.bytes_read / total_bytes if total_bytes else 1.0
+        progress({
+            "rows": rows,
+            "rows_per_sec": round(rows / elapsed, 1),
+            "bytes_read": reader.bytes_read,
+            "total_bytes": total_bytes,
+            "percent": round(fraction * 100, 1),
+            "eta_seconds": round(elapsed * (1 - fraction) / fraction, 1) if fraction > 0 else None,
+        })
+
+    summary = bulk_import_parts(reader, chunk_size=chunk_size, progress=report)
+    summary.update({
+        "file": str(file_path),
+        "skipped": reader.skipped,
+        "elapsed_seconds": round(time.monotonic() - started, 3),
+    })
+    logger.info("Imported %s parts from %s", summary["imported"], file_path)
+    return summary
 
 
 def count_parts() -> int:
+    return _parts_cache.get_or_compute(("count",), _count_parts)
+
+
+def _count_parts() -> int:
     db = get_hardware_database()
-    result = db.execute("SELECT COUNT(*) AS count FROM parts")
+    # Maintained by triggers, see HardwareDatabase._init_facets
+    result = db.execute("SELECT count FROM part_facets WHERE facet = 'total' AND value = ''")
     return int(result[0]["count"]) if result else 0
 
 
-def list_parts(query: Optional[str] = None, platform: Optional[str] = None, category: Optional[str] = None, limit: int = 200) -> List[Dict[str, Any]]:
+def get_part_facets() -> Dict[str, Any]:
+    """Return the total part count and counts per platform, category and source."""
+    return _parts_cache.get_or_compute(("facets",), _get_part_facets)
+
+
+def _get_part_facets() -> Dict[str, Any]:
     db = get_hardware_database()
-    sql = "SELECT id, name, platform, category, description, specs, source, source_url, last_seen, created_at FROM parts WHERE 1=1"
+    facets: Dict[str, List[Dict[str, Any]]] = {"platform": [], "category": [], "source": []}
+    total = 0
+    rows = db.execute("SELECT facet, value, count FROM part_facets WHERE count > 0 ORDER BY facet, count DESC, value")
+    for row in rows:
+        if row["facet"] == "total":
+            total = row["count"]
+        elif row["facet"] in facets:
+            facets[row["facet"]].append({"value": row["value"] or None, "count": row["count"]})
+    return {"total": total, "facets": facets}
+
+
+PART_COLUMNS = "p.id, p.name, p.platform, p.category, p.description, p.specs, p.source, p.source_url, p.last_seen, p.stale, p.created_at"
+
+# bm25 column weights for parts_fts(name, description, category, specs)
+SEARCH_WEIGHTS = (10.0, 2.0, 4.0, 1.0)
+
+
+def _decode_specs(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    for row in rows:
+        try:
+            row["specs"] = json.loads(row.get("specs") or "{}")
+        except Exception:
+            row["specs"] = {}
+    return rows
+
+
+# Comparison operators accepted in spec filters
+SPEC_OPERATORS = {"=", "!=", "<", "<=", ">", ">=", "contains", "exists"}
+MAX_SPEC_FILTERS = 8
+
+
+def parse_spec_filters(raw: Any) -> List[Dict[str, Any]]:
+    """Normalize spec filters into a list of {key, op, value} dicts.
+
+    Accepts that list form directly, or a mapping shorthand such as
+    {"flash_kb": {">=": 32}, "usb": "Type-B"}.
+
+    Raises:
+        ValueError: If a filter has no key, an unknown operator or a bad value
+    """
+    if not raw:
+        return []
+    if isinstance(raw, dict):
+        items = []
+        for key, condition in raw.items():
+            if isinstance(condition, dict):
+                items.extend({"key": key, "op": op, "value": value} for op, value in condition.items())
+            else:
+                items.append({"key": key, "op": "=", "value": condition})
+        raw = items
+    if not isinstance(raw, list):
+        raise ValueError("Ongeldige spec filters")
+    if len(raw) > MAX_SPEC_FILTERS:
+        raise ValueError(f"Maximaal {MAX_SPEC_FILTERS} spec filters")
+
+    filters = []
+    for item in raw:
+        key = str(item.get("key") or "").strip() if isinstance(item, dict) else ""
+        op = item.get("op", "=") if isinstance(item, dict) else None
+        if not key:
+            raise ValueError("Spec filter zonder sleutel")
+        if op not in SPEC_OPERATORS:
+            raise ValueError(f"Onbekende operator: {op}")
+        value = item.get("value")
+        if op != "exists" and (value is None or isinstance(value, (dict, list))):
+            raise ValueError(f"Ongeldige waarde voor {key}")
+        if op in ("<", "<=", ">", ">=") and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise ValueError(f"Numerieke waarde nodig voor {key} {op}")
+        filters.append({"key": key, "op": op, "value": value})
+    return filters
+
+
+def _spec_filter_sql(filters: List[Dict[str, Any]]) -> tuple:
+    """Build AND-ed part_specs subqueries; each one is a seek on (key, value)."""
+    clauses: List[str] = []
     params: List[Any] = []
+    for spec in filters:
+        op, value = spec["op"], spec["value"]
+        if op == "exists":
+            condition, args = "", []
+        elif op == "contains":
+            condition, args = " AND value_text LIKE ?", [f"%{value}%"]
+        elif isinstance(value, bool):
+            condition, args = f" AND value_num {op} ?", [int(value)]
+        elif isinstance(value, (int, float)):
+            condition, args = f" AND value_num {op} ?", [value]
+        else:
+            condition, args = f" AND value_text {op} ? COLLATE NOCASE", [str(value)]
+        clauses.append(f" AND p.id IN (SELECT part_id FROM part_specs WHERE key = ?{condition})")
+        params.extend([spec["key"], *args])
+    return "".join(clauses), params
+
+
+def _fts_match_expression(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 query where every term must match as a prefix."""
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _search_parts_page(match: str, platform: Optional[str], category: Optional[str], limit: int, cursor: Optional[str], highlight: bool, specs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    db = get_hardware_database()
+    score = f"bm25(parts_fts, {', '.join(map(str, SEARCH_WEIGHTS))})"
+    columns = f"{PART_COLUMNS}, {score} AS score"
+    if highlight:
+        columns += (
+            ", highlight(parts_fts, 0, '<mark>', '</mark>') AS name_highlight"
+            ", snippet(parts_fts, 1, '<mark>', '</mark>', '…', 16) AS description_snippet"
+        )
 
+    sql = f"SELECT {columns} FROM parts_fts JOIN parts p ON p.id = parts_fts.rowid WHERE parts_fts MATCH ?"
+    params: List[Any] = [match]
     if platform:
-        sql += " AND platform = ?"
+        sql += " AND p.platform = ?"
         params.append(platform)
     if category:
-        sql += " AND category = ?"
+        sql += " AND p.category = ?"
+        params.append(category)
+    if specs:
+        spec_sql, spec_params = _spec_filter_sql(specs)
+        sql += spec_sql
+        params.extend(spec_params)
+
+    after = decode_cursor(cursor, 2)
+    if after:
+        sql += f" AND ({score} > ? OR ({score} = ? AND p.id > ?))"
+        params.extend([after[0], after[0], after[1]])
+
+    sql += " ORDER BY score, p.id LIMIT ?"
+    params.append(limit + 1)
+
+    rows = db.execute(sql, params)
+    next_cursor = encode_cursor([rows[limit - 1]["score"], rows[limit - 1]["id"]]) if len(rows) > limit else None
+    return {"parts": _decode_specs(rows[:limit]), "next_cursor": next_cursor}
+
+
+def list_parts_page(query: Optional[str] = None, platform: Optional[str] = None, category: Optional[str] = None, limit: int = 200, cursor: Optional[str] = None, highlight: bool = False, specs: Any = None) -> Dict[str, Any]:
+    """Return one page of parts plus an opaque cursor for the next page.
+
+    Searches are ordered by BM25 score, plain listings by
+    (platform, category, name, id); both continue from the cursor with a
+    keyset seek instead of an OFFSET. next_cursor is None on the last page.
+    specs takes filters in any form accepted by parse_spec_filters.
+
+    Results are cached until the next catalog write; treat them as read-only.
+
+    Raises:
+        ValueError: If the cursor or a spec filter is malformed
+    """
+    query = (query or "").strip() or None
+    limit = clamp_limit(limit)
+    spec_filters = parse_spec_filters(specs)
+    key = (
+        "page", query, platform or None, category or None, limit, cursor or None, bool(highlight),
+        json.dumps(spec_filters, sort_keys=True) if spec_filters else None,
+    )
+    return _parts_cache.get_or_compute(
+        key, lambda: _list_parts_page(query, platform, category, limit, cursor, bool(highlight), spec_filters)
+    )
+
+
+def _list_parts_page(query: Optional[str], platform: Optional[str], category: Optional[str], limit: int, cursor: Optional[str], highlight: bool, spec_filters: List[Dict[str, Any]]) -> Dict[str, Any]:
+    db = get_hardware_database()
+    match = _fts_match_expression(query) if query else None
+    if match and db.fts_enabled:
+        return _search_parts_page(match, platform, category, limit, cursor, highlight, spec_filters)
+
+    sql = f"SELECT {PART_COLUMNS} FROM parts p WHERE 1=1"
+    params: List[Any] = []
+
+    if platform:
+        sql += " AND p.platform = ?"
+        params.append(platform)
+    if category:
+        sql += " AND p.category = ?"
         params.append(category)
     if query:
         like = f"%{query}%"
-        sql += " AND (name LIKE ? OR description LIKE ?)"
+        sql += " AND (p.name LIKE ? OR p.description LIKE ?)"
         params.extend([like, like])
+    if spec_filters:
+        spec_sql, spec_params = _spec_filter_sql(spec_filters)
+        sql += spec_sql
+        params.extend(spec_params)
+
+    after = decode_cursor(cursor, 4)
+    if after and after[1] is None:
+        # NULL categories sort first within a platform, and a row-value
+        # comparison against NULL is never true, so spell this case out
+        sql += (
+            " AND ((p.platform = ? AND p.category IS NULL AND (p.name, p.id) > (?, ?))"
+            " OR (p.platform = ? AND p.category IS NOT NULL) OR p.platform > ?)"
+        )
+        params.extend([after[0], after[2], after[3], after[0], after[0]])
+    elif after:
+        sql += " AND (p.platform, p.category, p.name, p.id) > (?, ?, ?, ?)"
+        params.extend(after)
 
-    sql += " ORDER BY platform, category, name LIMIT ?"
-    params.append(limit)
+    # Matches idx_parts_listing, so each page is an index seek
+    sql += " ORDER BY p.platform, p.category, p.name, p.id LIMIT ?"
+    params.append(limit + 1)
 
     rows = db.execute(sql, params)
-    for row in rows:
-        try:
-            row["specs"] = json.loads(row.get("specs") or "{}")
-        except Exception:
-            row["specs"] = {}
-    return rows
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor([last["platform"], last["category"], last["name"], last["id"]])
+    return {"parts": _decode_specs(rows[:limit]), "next_cursor": next_cursor}
+
 
+def search_parts(query: str, platform: Optional[str] = None, category: Optional[str] = None, limit: int = 200, highlight: bool = False) -> List[Dict[str, Any]]:
+    """Full-text part search ranked by BM25, optionally with highlighted matches."""
+    return list_parts_page(query=query, platform=platform, category=category, limit=limit, highlight=highlight)["parts"]
 
-def refresh_catalog(sources: Optional[List[str]] = None) -> Dict[str, Any]:
+
+def list_parts(query: Optional[str] = None, platform: Optional[str] = None, category: Optional[str] = None, limit: int = 200) -> List[Dict[str, Any]]:
+    return list_parts_page(query=query, platform=platform, category=category, limit=limit)["parts"]
+
+
+def query_parts(specs: Any, query: Optional[str] = None, platform: Optional[str] = None, category: Optional[str] = None, limit: int = 200) -> List[Dict[str, Any]]:
+    """Filter parts on spec values, e.g. [{"key": "flash_kb", "op": ">=", "value": 32}]."""
+    return list_parts_page(query=query, platform=platform, category=category, limit=limit, specs=specs)["parts"]
+
+
+def _load_sources(names: List[str], timeout: float) -> Dict[str, Dict[str, Any]]:
+    """Run source loaders concurrently; each gets `timeout` seconds from the start."""
+    results: Dict[str, Dict[str, Any]] = {}
+    if not names:
+        return results
+
+    def run(name: str) -> Dict[str, Any]:
+        started = time.monotonic()
+        parts = list(SOURCE_REGISTRY[name]())
+        return {"parts": parts, "load_seconds": round(time.monotonic() - started, 3)}
+
+    executor = ThreadPoolExecutor(max_workers=min(len(names), MAX_SOURCE_WORKERS), thread_name_prefix="catalog-source")
+    try:
+        futures = {executor.submit(run, name): name for name in names}
+        wait(futures, timeout=timeout)
+        for future, name in futures.items():
+            if not future.done():
+                future.cancel()
+                logger.error("Loading %s timed out after %ss", name, timeout)
+                results[name] = {"status": "timeout"}
+            elif future.exception() is not None:
+                logger.error("Failed to load from %s: %s", name, future.exception())
+                results[name] = {"status": "error", "error": str(future.exception())}
+            else:
+                results[name] = {"status": "ok", **future.result()}
+                logger.info("Loaded %s items from %s", len(results[name]["parts"]), name)
+    finally:
+        # Don't wait for loaders that timed out; their results are discarded
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+def _sync_source(source: str, parts: List[Dict[str, Any]], incremental: bool, full: bool, now: str) -> Dict[str, int]:
+    """Write one source's parts, skipping rows whose content hash is unchanged.
+
+    With full=True the batch is the source's complete catalog, so stored parts
+    missing from it are marked stale (and un-marked if they come back).
+    """
+    db = get_hardware_database()
+    existing: Dict[tuple, Dict[str, Any]] = {}
+    if incremental or full:
+        rows = db.execute("SELECT id, name, platform, content_hash, stale FROM parts WHERE source = ?", (source,))
+        existing = {(row["name"], row["platform"]): row for row in rows}
+
+    changed: List[tuple] = []
+    restored: List[tuple] = []
+    seen = set()
+    unchanged = 0
+    for part in parts:
+        params = _part_params({**part, "source": part.get("source") or source}, now)
+        if not params[0]:
+            continue
+        key = (params[0], params[1])
+        seen.add(key)
+        row = existing.get(key)
+        if incremental and row is not None and row["content_hash"] == params[-1]:
+            unchanged += 1
+            if row["stale"]:
+                restored.append((row["id"],))
+            continue
+        changed.append(params)
+
+    stale = [(row["id"],) for key, row in existing.items() if key not in seen and not row["stale"]] if full else []
+
+    if changed or restored or stale:
+        with db.get_connection() as conn:
+            conn.executemany(UPSERT_PART_SQL, changed)
+            conn.executemany("UPDATE parts SET stale = 0 WHERE id = ?", restored)
+            conn.executemany("UPDATE parts SET stale = 1 WHERE id = ?", stale)
+        _parts_changed()
+
+    return {
+        "loaded": len(parts),
+        "written": len(changed),
+        "unchanged": unchanged,
+        "restored": len(restored),
+        "stale": len(stale),
+    }
+
+
+def refresh_catalog(sources: Optional[List[str]] = None, incremental: bool = True, full: bool = True, timeout: float = SOURCE_TIMEOUT_SECONDS) -> Dict[str, Any]:
+    """Fetch parts from the registered sources and store what changed.
+
+    Loaders run concurrently. With incremental=True only new or changed parts
+    are written; with full=True parts a source no longer lists are marked
+    stale. A source that fails or times out leaves its stored parts as they are.
+    """
     selected_sources = sources or list(SOURCE_REGISTRY.keys())
-    collected: List[Dict[str, Any]] = []
-    missing: List[str] = []
+    missing = [source for source in selected_sources if source not in SOURCE_REGISTRY]
+    loaded = _load_sources([source for source in selected_sources if source in SOURCE_REGISTRY], timeout)
 
-    for source in selected_sources:
-        loader = SOURCE_REGISTRY.get(source)
-        if not loader:
-            missing.append(source)
+    now = datetime.utcnow().isoformat() + "Z"
+    per_source: Dict[str, Dict[str, Any]] = {}
+    imported = 0
+    for source, result in loaded.items():
+        if result["status"] != "ok":
+            per_source[source] = {key: value for key, value in result.items() if key != "parts"}
             continue
-        try:
-            batch = loader()
-            collected.extend(batch)
-            logger.info("Loaded %s items from %s", len(batch), source)
-        except Exception as exc:
-            logger.error("Failed to load from %s: %s", source, exc)
-
-    summary = bulk_import_parts(collected)
-    summary.update({"sources": selected_sources, "missing_sources": missing})
-    return summary
+        stats = _sync_source(source, result["parts"], incremental, full, now)
+        per_source[source] = {"status": "ok", "load_seconds": result["load_seconds"], **stats}
+        imported += stats["written"]
+
+    return {
+        "imported": imported,
+        "total": count_parts(),
+        "sources": selected_sources,
+        "missing_sources": missing,
+        "failed_sources": [source for source, stats in per_source.items() if stats["status"] != "ok"],
+        "per_source": per_source,
+    }
+
+
+CIRCUIT_SUMMARY_COLUMNS = "id, name, platform, description, notes, version, layout_hash IS NOT NULL OR layout IS NOT NULL AS has_layout, created_at, updated_at"
+
+LAYOUT_COMPRESSION_LEVEL = 6
+
+# A full layout is stored every KEYFRAME_INTERVAL revisions (or sooner when a
+# delta wouldn't be smaller), so rebuilding any revision reads one keyframe
+# and at most KEYFRAME_INTERVAL - 1 deltas
+KEYFRAME_INTERVAL = 20
+# At least this many recent revisions stay restorable; older history is pruned
+REVISIONS_KEPT = 200
+
+
+def _compact_json(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+def _layout_hash(layout: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Content hash of a layout (None without one), used to skip unchanged saves."""
+    if not layout:
+        return None
+    return hashlib.blake2b(_compact_json(layout), digest_size=16).hexdigest()
+
+
+def _decode_layout(blob: Optional[bytes], legacy: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Read a layout from a circuit saved before revisions existed."""
+    try:
+        if blob is not None:
+            return json.loads(zlib.decompress(blob))
+        if legacy:
+            return json.loads(legacy)
+    except Exception as exc:
+        logger.warning("Unreadable circuit layout: %s", exc)
+    return None
+
+
+def _pack(value: Any) -> bytes:
+    return zlib.compress(_compact_json(value), LAYOUT_COMPRESSION_LEVEL)
+
+
+def _layout_at(conn: sqlite3.Connection, circuit_id: int, revision: int) -> Optional[Dict[str, Any]]:
+    """Rebuild a revision's layout from the nearest keyframe and the deltas after it.
+
+    Raises:
+        ValueError: If the revision doesn't exist (or was pruned)
+    """
+    rows = conn.execute(
+        """
+        SELECT revision, kind, data FROM circuit_revisions
+        WHERE circuit_id = ? AND revision <= ? AND revision >= (
+            SELECT MAX(revision) FROM circuit_revisions
+            WHERE circuit_id = ? AND revision <= ? AND kind = 'keyframe'
+        )
+        ORDER BY revision
+        """,
+        (circuit_id, revision, circuit_id, revision),
+    ).fetchall()
+    # Without the exact revision the query would still rebuild the latest
+    # one before it
+    if not rows or rows[-1]["revision"] != revision:
+        raise ValueError(f"Revisie {revision} niet gevonden")
+
+    layout = json.loads(zlib.decompress(rows[0]["data"]))
+    for row in rows[1:]:
+        layout = apply_delta(layout, json.loads(zlib.decompress(row["data"])))
+    return layout
+
+
+def _write_revision(conn: sqlite3.Connection, circuit_id: int, head: Optional[int], layout: Optional[Dict[str, Any]], layout_hash: Optional[str]) -> int:
+    """Append a layout revision after head and return its number.
+
+    Revisions after head (undone edits) are dropped first, as in any editor.
+    """
+    keyframe_base = None
+    if head is not None:
+        conn.execute("DELETE FROM circuit_revisions WHERE circuit_id = ? AND revision > ?", (circuit_id, head))
+        keyframe_base = conn.execute(
+            "SELECT MAX(revision) FROM circuit_revisions WHERE circuit_id = ? AND kind = 'keyframe'",
+            (circuit_id,),
+        ).fetchone()[0]
+
+    revision = (head or 0) + 1
+    kind, data = "keyframe", _pack(layout)
+    if keyframe_base is not None and revision - keyframe_base < KEYFRAME_INTERVAL:
+        delta = _pack(diff_layout(_layout_at(conn, circuit_id, head), layout))
+        if len(delta) < len(data):
+            kind, data = "delta", delta
+
+    conn.execute(
+        "INSERT INTO circuit_revisions (circuit_id, revision, kind, data, layout_hash) VALUES (?, ?, ?, ?, ?)",
+        (circuit_id, revision, kind, data, layout_hash),
+    )
+    if kind == "keyframe":
+        # Cut at a keyframe so every remaining revision can still be rebuilt
+        conn.execute(
+            """
+            DELETE FROM circuit_revisions WHERE circuit_id = ? AND revision < (
+                SELECT MAX(revision) FROM circuit_revisions
+                WHERE circuit_id = ? AND kind = 'keyframe' AND revision <= ?
+            )
+            """,
+            (circuit_id, circuit_id, revision - REVISIONS_KEPT),
+        )
+    return revision
 
 
 def list_circuits() -> List[Dict[str, Any]]:
+    """List circuit summaries with their parts; layouts are fetched per circuit with get_circuit."""
+    return _circuits_cache.get_or_compute(("list",), _list_circuits)
+
+
+def _list_circuits() -> List[Dict[str, Any]]:
     db = get_hardware_database()
-    circuits = db.execute(
-        "SELECT id, name, platform, description, notes, layout, created_at, updated_at FROM circuits ORDER BY created_at DESC"
-    )
+    circuits = db.execute(f"SELECT {CIRCUIT_SUMMARY_COLUMNS} FROM circuits ORDER BY created_at DESC")
 
     if not circuits:
         return []
@@ -237,45 +865,272 @@ def list_circuits() -> List[Dict[str, Any]]:
 
     for circuit in circuits:
         circuit["parts"] = part_map.get(circuit["id"], [])
-        if circuit.get("layout"):
-            try:
-                circuit["layout"] = json.loads(circuit["layout"])
-            except Exception:
-                circuit["layout"] = None
+        circuit["has_layout"] = bool(circuit["has_layout"])
 
     return circuits
 
 
-def save_circuit(name: str, platform: Optional[str], description: Optional[str], notes: Optional[str], part_ids: List[Dict[str, Any]], layout: Optional[Dict[str, Any]] = None, circuit_id: Optional[int] = None) -> Dict[str, Any]:
+def save_circuit(name: str, platform: Optional[str], description: Optional[str], notes: Optional[str], part_ids: List[Dict[str, Any]], layout: Optional[Dict[str, Any]] = None, circuit_id: Optional[int] = None, expected_version: Optional[int] = None) -> Dict[str, Any]:
+    """Create or update a circuit and its part links in one transaction.
+
+    The stored links are diffed against part_ids inside the same transaction
+    as the circuit row, so only links that were added, removed or changed
+    quantity are written and a failed save leaves the old links intact. A
+    changed layout (by content hash) is stored as a new revision, usually a
+    delta against the previous one, so autosaves write about as many bytes as
+    the edit itself. If expected_version is given and the stored circuit has
+    moved on, nothing is saved. The returned circuit carries its new version
+    but not the layout, which the caller already has.
+
+    Raises:
+        ValueError: If the name is empty, the circuit doesn't exist, the
+            version doesn't match or a part doesn't exist
+    """
     if not name or not name.strip():
         raise ValueError("Circuit name is verplicht")
 
     db = get_hardware_database()
     now = datetime.utcnow().isoformat() + "Z"
-    layout_json = json.dumps(layout) if layout else None
+    layout_hash = _layout_hash(layout)
 
-    if circuit_id:
-        db.execute_write(
-            """UPDATE circuits SET name = ?, platform = ?, description = ?, notes = ?, layout = ?, updated_at = ? WHERE id = ?""",
-            (name.strip(), platform, description, notes, layout_json, now, circuit_id),
-        )
-        cid = circuit_id
-    else:
-        cid = db.execute_write(
-            """INSERT INTO circuits (name, platform, description, notes, layout) VALUES (?, ?, ?, ?, ?)""",
-            (name.strip(), platform, description, notes, layout_json),
+    # Same part listed twice: the last quantity wins, as before
+    wanted: Dict[int, Any] = {}
+    for link in part_ids:
+        if link.get("id") is not None:
+            wanted[int(link["id"])] = link.get("quantity", 1)
+
+    try:
+        with db.get_connection() as conn:
+            if circuit_id:
+                row = conn.execute(
+                    "SELECT version, layout_hash, head_revision, layout IS NOT NULL OR layout_blob IS NOT NULL AS legacy FROM circuits WHERE id = ?",
+                    (circuit_id,),
+                ).fetchone()
+                if row is None:
+                    raise ValueError("Circuit niet gevonden")
+                if expected_version is not None and row["version"] != expected_version:
+                    raise ValueError(f"Circuit is intussen gewijzigd (versie {row['version']})")
+                layout_written = row["layout_hash"] != layout_hash or bool(row["legacy"] and layout_hash is None)
+                if layout_written:
+                    head = _write_revision(conn, circuit_id, row["head_revision"], layout, layout_hash)
+                    conn.execute(
+                        """UPDATE circuits SET name = ?, platform = ?, description = ?, notes = ?, layout = NULL, layout_blob = NULL, layout_hash = ?, head_revision = ?, updated_at = ?, version = version + 1 WHERE id = ?""",
+                        (name.strip(), platform, description, notes, layout_hash, head, now, circuit_id),
+                    )
+                else:
+                    conn.execute(
+                        """UPDATE circuits SET name = ?, platform = ?, description = ?, notes = ?, updated_at = ?, version = version + 1 WHERE id = ?""",
+                        (name.strip(), platform, description, notes, now, circuit_id),
+                    )
+                cid, version = circuit_id, row["version"] + 1
+                current = {
+                    link["part_id"]: link["quantity"]
+                    for link in conn.execute("SELECT part_id, quantity FROM circuit_parts WHERE circuit_id = ?", (cid,))
+                }
+            else:
+                cid = conn.execute(
+                    """INSERT INTO circuits (name, platform, description, notes, layout_hash, version) VALUES (?, ?, ?, ?, ?, 1)""",
+                    (name.strip(), platform, description, notes, layout_hash),
+                ).lastrowid
+                version, current, layout_written = 1, {}, layout_hash is not None
+                if layout_written:
+                    head = _write_revision(conn, cid, None, layout, layout_hash)
+                    conn.execute("UPDATE circuits SET head_revision = ? WHERE id = ?", (head, cid))
+
+            removed = [(cid, pid) for pid in current if pid not in wanted]
+            changed = [(cid, pid, quantity) for pid, quantity in wanted.items() if current.get(pid) != quantity]
+            conn.executemany("DELETE FROM circuit_parts WHERE circuit_id = ? AND part_id = ?", removed)
+            conn.executemany(
+                """INSERT INTO circuit_parts (circuit_id, part_id, quantity) VALUES (?, ?, ?)
+                ON CONFLICT(circuit_id, part_id) DO UPDATE SET quantity = excluded.quantity""",
+                changed,
+            )
+    except sqlite3.IntegrityError as exc:
+        raise ValueError("Onbekend onderdeel in circuit") from exc
+    _circuits_changed()
+
+    return {
+        "id": cid,
+        "name": name.strip(),
+        "platform": platform,
+        "description": description,
+        "notes": notes,
+        "updated_at": now,
+        "version": version,
+        "parts_changed": {"added_or_updated": len(changed), "removed": len(removed)},
+        "layout_written": layout_written,
+    }
+
+
+def get_circuit(circuit_id: int) -> Optional[Dict[str, Any]]:
+    """Load one circuit including its decoded layout."""
+    return _circuits_cache.get_or_compute(("circuit", circuit_id), lambda: _get_circuit(circuit_id))
+
+
+def _get_circuit(circuit_id: int) -> Optional[Dict[str, Any]]:
+    db = get_hardware_database()
+    with db.get_read_connection() as conn:
+        row = conn.execute(
+            "SELECT id, name, platform, description, notes, layout, layout_blob, head_revision, version, created_at, updated_at FROM circuits WHERE id = ?",
+            (circuit_id,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        circuit = dict(row)
+        blob, legacy = circuit.pop("layout_blob"), circuit["layout"]
+        if circuit["head_revision"] is not None:
+            circuit["layout"] = _layout_at(conn, circuit_id, circuit["head_revision"])
+        else:
+            # Saved before revisions existed
+            circuit["layout"] = _decode_layout(blob, legacy)
+    return circuit
+
+
+def list_circuit_revisions(circuit_id: int) -> Dict[str, Any]:
+    """List a circuit's layout revisions, newest first, with the current head."""
+    db = get_hardware_database()
+    head = db.execute("SELECT head_revision FROM circuits WHERE id = ?", (circuit_id,))
+    if not head:
+        raise ValueError("Circuit niet gevonden")
+    revisions = db.execute(
+        """
+        SELECT revision, kind, length(data) AS size, created_at FROM circuit_revisions
+        WHERE circuit_id = ? ORDER BY revision DESC
+        """,
+        (circuit_id,),
+    )
+    return {"id": circuit_id, "head": head[0]["head_revision"], "revisions": revisions}
+
+
+def _move_head(circuit_id: int, choose: Callable[[sqlite3.Connection, Optional[int]], int]) -> Dict[str, Any]:
+    db = get_hardware_database()
+    with db.get_connection() as conn:
+        row = conn.execute("SELECT head_revision FROM circuits WHERE id = ?", (circuit_id,)).fetchone()
+        if row is None:
+            raise ValueError("Circuit niet gevonden")
+        revision = choose(conn, row["head_revision"])
+        conn.execute(
+            """
+            UPDATE circuits SET head_revision = ?, updated_at = ?, version = version + 1,
+                layout_hash = (SELECT layout_hash FROM circuit_revisions WHERE circuit_id = ? AND revision = ?)
+            WHERE id = ?
+            """,
+            (revision, datetime.utcnow().isoformat() + "Z", circuit_id, revision, circuit_id),
         )
+    _circuits_changed()
+    return get_circuit(circuit_id)
 
-    db.execute_write("DELETE FROM circuit_parts WHERE circuit_id = ?", (cid,))
 
-    for link in part_ids:
-        pid = link.get("id")
-        quantity = link.get("quantity", 1)
-        if pid is None:
-            continue
-        db.execute_write(
-            """INSERT OR REPLACE INTO circuit_parts (circuit_id, part_id, quantity) VALUES (?, ?, ?)""",
-            (cid, pid, quantity),
+def _step_target(conn: sqlite3.Connection, circuit_id: int, revision: Optional[int], message: str) -> int:
+    exists = revision is not None and conn.execute(
+        "SELECT 1 FROM circuit_revisions WHERE circuit_id = ? AND revision = ?", (circuit_id, revision)
+    ).fetchone()
+    if not exists:
+        raise ValueError(message)
+    return revision
+
+
+def undo_circuit(circuit_id: int) -> Dict[str, Any]:
+    """Step the layout back one revision; the undone revision stays available to redo."""
+    return _move_head(circuit_id, lambda conn, head: _step_target(
+        conn, circuit_id, head - 1 if head else None, "Niets om ongedaan te maken"))
+
+
+def redo_circuit(circuit_id: int) -> Dict[str, Any]:
+    """Re-apply the revision after the current head, if an undo left one."""
+    return _move_head(circuit_id, lambda conn, head: _step_target(
+        conn, circuit_id, head + 1 if head else None, "Niets om opnieuw te doen"))
+
+
+def restore_circuit_revision(circuit_id: int, revision: int) -> Dict[str, Any]:
+    """Make an earlier layout current again by saving it as a new revision."""
+    db = get_hardware_database()
+    with db.get_connection() as conn:
+        row = conn.execute("SELECT head_revision FROM circuits WHERE id = ?", (circuit_id,)).fetchone()
+        if row is None:
+            raise ValueError("Circuit niet gevonden")
+        layout = _layout_at(conn, circuit_id, revision)
+        layout_hash = _layout_hash(layout)
+        head = _write_revision(conn, circuit_id, row["head_revision"], layout, layout_hash)
+        conn.execute(
+            "UPDATE circuits SET layout_hash = ?, head_revision = ?, updated_at = ?, version = version + 1 WHERE id = ?",
+            (layout_hash, head, datetime.utcnow().isoformat() + "Z", circuit_id),
         )
+    _circuits_changed()
+    return get_circuit(circuit_id)
+
+
+def delete_circuit(circuit_id: int) -> bool:
+    db = get_hardware_database()
+    deleted = db.execute_write("DELETE FROM circuits WHERE id = ?", (circuit_id,)) > 0
+    _circuits_changed()
+    return deleted
+
+
+# ----------------------------------------------------------------------------
+# Async variants (run on the hardware database worker threads)
+# ----------------------------------------------------------------------------
+
+async def count_parts_async() -> int:
+    return await get_async_hardware_database().run_read(count_parts)
+
+
+async def get_part_facets_async() -> Dict[str, Any]:
+    return await get_async_hardware_database().run_read(get_part_facets)
+
+
+async def list_parts_async(**kwargs: Any) -> List[Dict[str, Any]]:
+    return await get_async_hardware_database().run_read(list_parts, **kwargs)
+
+
+async def list_parts_page_async(**kwargs: Any) -> Dict[str, Any]:
+    return await get_async_hardware_database().run_read(list_parts_page, **kwargs)
+
+
+async def search_parts_async(query: str, **kwargs: Any) -> List[Dict[str, Any]]:
+    return await get_async_hardware_database().run_read(search_parts, query, **kwargs)
+
+
+async def refresh_catalog_async(sources: Optional[List[str]] = None, **kwargs: Any) -> Dict[str, Any]:
+    # Not on the writer queue: loaders may wait on slow sources, and the
+    # writer lock is only taken while each source's changes are stored
+    return await asyncio.to_thread(refresh_catalog, sources, **kwargs)
+
+
+async def import_catalog_file_async(path: str, progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    # Not on the writer queue: the import takes the writer lock per chunk, so
+    # other writes can interleave instead of waiting for the whole file
+    return await asyncio.to_thread(import_catalog_file, path, progress=progress)
+
+
+async def list_circuits_async() -> List[Dict[str, Any]]:
+    return await get_async_hardware_database().run_read(list_circuits)
+
+
+async def get_circuit_async(circuit_id: int) -> Optional[Dict[str, Any]]:
+    return await get_async_hardware_database().run_read(get_circuit, circuit_id)
+
+
+async def save_circuit_async(**kwargs: Any) -> Dict[str, Any]:
+    return await get_async_hardware_database().run_write(save_circuit, **kwargs)
+
+
+async def delete_circuit_async(circuit_id: int) -> bool:
+    return await get_async_hardware_database().run_write(delete_circuit, circuit_id)
+
+
+async def list_circuit_revisions_async(circuit_id: int) -> Dict[str, Any]:
+    return await get_async_hardware_database().run_read(list_circuit_revisions, circuit_id)
+
+
+async def restore_circuit_revision_async(circuit_id: int, revision: int) -> Dict[str, Any]:
+    return await get_async_hardware_database().run_write(restore_circuit_revision, circuit_id, revision)
+
+
+async def undo_circuit_async(circuit_id: int) -> Dict[str, Any]:
+    return await get_async_hardware_database().run_write(undo_circuit, circuit_id)
+
 
-    return {"id": cid, "name": name.strip(), "platform": platform, "description": description, "notes": notes, "layout": layout, "updated_at": now}
+async def redo_circuit_async(circuit_id: int) -> Dict[str, Any]:
+    return await get_async_hardware_database().run_write(redo_circuit, circuit_id)
@@ -0,0 +1,368 @@
+"""LLM inference in a worker process, streamed token by token.
+
+The model stays loaded in a child process. Requests queue up there and run
+one at a time; each job's text comes back in pieces as it is generated,
+and a job can be cancelled while queued or mid-generation (checked between
+tokens).
+
+Model backends:
+
+- transformers: a causal LM from the Hugging Face hub (optionally 4-bit via
+  bitsandbytes), imported and loaded only inside the worker
+- stub: a deterministic stand-in with configurable prefill and per-token
+  cost, so first-token latency and tokens/sec can be measured on CPU
+"""
+
+import asyncio
+import itertools
+import logging
+import queue
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from settings import get_settings
+from worker_process import WorkerProcess, create_engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_NEW_TOKENS = 256
+# Jobs waiting in the worker beyond this are refused instead of queued
+MAX_QUEUED_JOBS = 8
+
+
+class StubLanguageModel:
+    """Deterministic stand-in model.
+
+    Replies by restating the prompt, one word per token. Prefill costs
+    prefill_seconds_per_word per prompt word before the first token, and
+    every token costs seconds_per_token.
+    """
+
+    name = "stub"
+
+    def __init__(self, seconds_per_token: float = 0.0, prefill_seconds_per_word: float = 0.0) -> None:
+        self.seconds_per_token = seconds_per_token
+        self.prefill_seconds_per_word = prefill_seconds_per_word
+
+    def load(self) -> None:
+        pass
+
+    def generate(
+        self,
+        messages: List[Dict[str, str]],
+        max_new_tokens: int,
+        temperature: float,
+        should_stop: Callable[[], bool],
+    ) -> Iterator[str]:
+        prompt = messages[-1]["content"] if messages else ""
+        if self.prefill_seconds_per_word:
+            time.sleep(len(prompt.split()) * self.prefill_seconds_per_word)
+        words = f"Je vroeg: {prompt.strip()} Dit is een antwoord van het testmodel.".split()
+        for index, word in enumerate(words[:max_new_tokens]):
+            if should_stop():
+                return
+            if self.seconds_per_token:
+                time.sleep(self.seconds_per_token)
+            yield word if index == 0 else " " + word
+
+
+class TransformersLanguageModel:
+    """A Hugging Face causal LM, loaded once per worker process."""
+
+    name = "transformers"
+
+    def __init__(self, model: str, load_in_4bit: bool = False, device: Optional[str] = None) -> None:
+        self.model_name = model
+        self.load_in_4bit = load_in_4bit
+        self.device = device
+        self.model = None
+        self.tokenizer = None
+
+    def load(self) -> None:
+        # Heavy imports (torch), kept out of the server process
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        kwargs: Dict[str, Any] = {"torch_dtype": "auto"}
+        if self.load_in_4bit:
+            from transformers import BitsAndBytesConfig
+
+            kwargs["quantization_config"] = BitsAndBytesConfig(load_in_4bit=True)
+            kwargs["device_map"] = "auto"
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        self.model = AutoModelForCausalLM.from_pretrained(self.model_name, **kwargs)
+        if self.device and not self.load_in_4bit:
+            self.model.to(self.device)
+        self.model.eval()
+
+    def generate(
+        self,
+        messages: List[Dict[str, str]],
+        max_new_tokens: int,
+        temperature: float,
+        should_stop: Callable[[], bool],
+    ) -> Iterator[str]:
+        from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+
+        class StopWhenCancelled(StoppingCriteria):
+            def __call__(self, input_ids: Any, scores: Any, **kwargs: Any) -> bool:
+                return should_stop()
+
+        inputs = self.tokenizer.apply_chat_template(
+            messages, add_generation_prompt=True, return_tensors="pt"
+        ).to(self.model.device)
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        options = {
+            "input_ids": inputs,
+            "max_new_tokens": max_new_tokens,
+            "streamer": streamer,
+            "stopping_criteria": StoppingCriteriaList([StopWhenCancelled()]),
+            "do_sample": temperature > 0,
+        }
+        if temperature > 0:
+            options["temperature"] = temperature
+        failures: List[BaseException] = []
+
+        def run() -> None:
+            try:
+                self.model.generate(**options)
+            except BaseException as exc:
+                failures.append(exc)
+                # generate() only ends the stream when it returns normally;
+                # without this the loop below would wait forever
+                streamer.end()
+
+        # generate() pushes text into the streamer from its own thread
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            for text in streamer:
+                if text:
+                    yield text
+            if failures:
+                raise failures[0]
+        finally:
+            thread.join()
+
+
+def create_language_model(backend: str, options: Dict[str, Any]) -> Any:
+    """Build and load the configured model ('transformers', or 'stub' for tests and benchmarks)."""
+    return create_engine("language model", backend, {
+        "transformers": lambda: TransformersLanguageModel(
+            options.get("model", ""),
+            load_in_4bit=options.get("load_in_4bit", False),
+            device=options.get("device"),
+        ),
+        "stub": lambda: StubLanguageModel(
+            options.get("stub_seconds_per_token", 0.0),
+            options.get("stub_prefill_seconds_per_word", 0.0),
+        ),
+    })
+
+
+def run_language_model_worker(requests: Any, results: Any, backend: str, options: Dict[str, Any]) -> None:
+    """Worker process entry point.
+
+    Requests: ("generate", job_id, messages, max_new_tokens, temperature),
+    ("cancel", job_id). Results: ("ready", info), ("started", job_id),
+    ("token", job_id, text), ("done", job_id, stats), ("error", job_id, message).
+    """
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    started = time.perf_counter()
+    model = create_language_model(backend, options)
+    # Warm-up, so the first real request doesn't pay for lazy initialization
+    for _ in model.generate([{"role": "user", "content": "Hallo"}], 2, 0.0, lambda: False):
+        pass
+    results.put(("ready", {"backend": model.name, "load_seconds": round(time.perf_counter() - started, 3)}))
+
+    jobs: "queue.Queue[Optional[Tuple[Any, ...]]]" = queue.Queue()
+    cancelled = set()
+    lock = threading.Lock()
+
+    def read_requests() -> None:
+        # Runs beside generation, so cancellations take effect between tokens
+        while True:
+            message = requests.get()
+            if message is None:
+                jobs.put(None)
+                return
+            if message[0] == "cancel":
+                with lock:
+                    cancelled.add(message[1])
+            else:
+                jobs.put(message)
+
+    threading.Thread(target=read_requests, name="llm-requests", daemon=True).start()
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        _, job_id, messages, max_new_tokens, temperature = job
+
+        def should_stop() -> bool:
+            with lock:
+                return job_id in cancelled
+
+        if should_stop():
+            results.put(("done", job_id, {"tokens": 0, "stop_reason": "cancelled"}))
+            continue
+
+        results.put(("started", job_id))
+        begin = time.perf_counter()
+        first_token = None
+        tokens = 0
+        try:
+            for text in model.generate(messages, max_new_tokens, temperature, should_stop):
+                if first_token is None:
+                    first_token = time.perf_counter() - begin
+                tokens += 1
+                results.put(("token", job_id, text))
+                if should_stop():
+                    break
+        except Exception as exc:
+            logger.exception("Generation failed for job %s", job_id)
+            results.put(("error", job_id, str(exc)))
+            continue
+        finally:
+            with lock:
+                stopped = job_id in cancelled
+                cancelled.discard(job_id)
+
+        elapsed = time.perf_counter() - begin
+        generating = elapsed - (first_token or 0)
+        results.put(("done", job_id, {
+            "tokens": tokens,
+            "stop_reason": "cancelled" if stopped else ("length" if tokens >= max_new_tokens else "stop"),
+            "first_token_ms": round(first_token * 1000, 1) if first_token is not None else None,
+            "tokens_per_second": round((tokens - 1) / generating, 1) if tokens > 1 and generating > 0 else None,
+            "generate_ms": round(elapsed * 1000, 1),
+        }))
+
+
+class LanguageModelWorker(WorkerProcess):
+    """Parent-side client of the LLM worker: a job queue with streamed results."""
+
+    def __init__(self, backend: str, options: Dict[str, Any], system_prompt: Optional[str] = None) -> None:
+        super().__init__("llm-worker", run_language_model_worker, (backend, options))
+        self.system_prompt = system_prompt
+        self._ids = itertools.count(1)
+        # job id -> queue of ("token", text) / ("done", stats) / ("error", message) / ("started", None)
+        self._jobs: Dict[int, asyncio.Queue] = {}
+
+    @property
+    def queued_jobs(self) -> int:
+        return len(self._jobs)
+
+    def submit(
+        self,
+        prompt: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS,
+        temperature: float = 0.0,
+    ) -> int:
+        """Queue a generation job and return its id; read it with events().
+
+        Raises:
+            RuntimeError: If the worker isn't running or too many jobs are queued
+        """
+        if not self.is_alive:
+            raise RuntimeError("Language model worker is not running")
+        if len(self._jobs) >= MAX_QUEUED_JOBS:
+            raise RuntimeError("Language model is busy")
+        messages = [{"role": "system", "content": self.system_prompt}] if self.system_prompt else []
+        messages += list(history or []) + [{"role": "user", "content": prompt}]
+        job_id = next(self._ids)
+        self._jobs[job_id] = asyncio.Queue()
+        self.send(("generate", job_id, messages, max_new_tokens, temperature))
+        return job_id
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued or running job; its events end with stop_reason 'cancelled'."""
+        if job_id not in self._jobs:
+            return False
+        self.send(("cancel", job_id))
+        return True
+
+    async def events(self, job_id: int) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield ("started", None), ("token", text) ... and finally ("done", stats).
+
+        Tokens that arrived together are yielded joined, as one event.
+        Leaving the loop early cancels the job.
+
+        Raises:
+            RuntimeError: If generation failed or the worker stopped
+        """
+        events = self._jobs.get(job_id)
+        if events is None:
+            return
+        finished = False
+        held = None  # an event read ahead while joining tokens
+        try:
+            while True:
+                kind, value = held or await events.get()
+                held = None
+                if kind == "token":
+                    pieces = [value]
+                    while not events.empty():
+                        event = events.get_nowait()
+                        if event[0] != "token":
+                            held = event
+                            break
+                        pieces.append(event[1])
+                    value = "".join(pieces)
+                elif kind == "error":
+                    finished = True
+                    raise RuntimeError(value)
+                yield kind, value
+                if kind == "done":
+                    finished = True
+                    return
+        finally:
+            if not finished and self.is_alive:
+                self.send(("cancel", job_id))
+            self._jobs.pop(job_id, None)
+
+    async def stream(self, prompt: str, **options: Any) -> AsyncIterator[str]:
+        """Yield the reply text as it is generated."""
+        async for kind, value in self.events(self.submit(prompt, **options)):
+            if kind == "token":
+                yield value
+
+    async def generate(self, prompt: str, **options: Any) -> str:
+        """Return the complete reply."""
+        return "".join([text async for text in self.stream(prompt, **options)])
+
+    def handle_result(self, message: Tuple[Any, ...]) -> None:
+        if message[0] == "ready":
+            return
+        events = self._jobs.get(message[1])
+        if events is not None:
+            events.put_nowait((message[0], message[2] if len(message) > 2 else None))
+
+    def handle_exit(self, exitcode: Optional[int]) -> None:
+        for events in self._jobs.values():
+            events.put_nowait(("error", "Language model worker stopped"))
+
+
+_language_model_worker: Optional[LanguageModelWorker] = None
+
+
+def get_language_model_worker() -> LanguageModelWorker:
+    """Get the shared LLM worker (started by the caller with start())."""
+    global _language_model_worker
+    if _language_model_worker is None:
+        settings = get_settings()
+        _language_model_worker = LanguageModelWorker(
+            settings.get("assistant.llm_backend", "transformers"),
+            {
+                "model": settings.get("assistant.llm_model", "Qwen/Qwen2.5-0.5B-Instruct"),
+                "load_in_4bit": settings.get("assistant.llm_load_in_4bit", False),
+                "device": settings.get("assistant.llm_device"),
+            },
+            system_prompt=settings.get(
+                "assistant.system_prompt",
+                "Je bent ATLAS, een behulpzame assistent. Antwoord kort en in het Nederlands.",
+            ),
+        )
+    return _language_model_worker
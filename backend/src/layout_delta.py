@@ -0,0 +1,100 @@
+"""JSON-patch style deltas between two circuit layouts.
+
+A delta is a list of operations, each addressing a value by its path (a list
+of object keys and list indexes):
+
+    {"op": "set", "path": [...], "value": v}       add or replace a value
+    {"op": "remove", "path": [...]}                remove an object key
+    {"op": "splice", "path": [...], "index": i,    replace a run of list items
+     "delete": n, "insert": [...]}
+
+Lists are compared by trimming the common prefix and suffix first, so placing
+or deleting one component produces a single small splice instead of
+rewriting every component after it.
+"""
+
+from typing import Any, Dict, List
+
+
+def diff_layout(old: Any, new: Any) -> List[Dict[str, Any]]:
+    """Return the operations that turn old into new."""
+    ops: List[Dict[str, Any]] = []
+    _diff(old, new, [], ops)
+    return ops
+
+
+def _diff(old: Any, new: Any, path: List[Any], ops: List[Dict[str, Any]]) -> None:
+    if old == new and type(old) is type(new):
+        return
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": path + [key]})
+        for key, value in new.items():
+            if key in old:
+                _diff(old[key], value, path + [key], ops)
+            else:
+                ops.append({"op": "set", "path": path + [key], "value": value})
+        return
+
+    if isinstance(old, list) and isinstance(new, list):
+        start = 0
+        while start < len(old) and start < len(new) and old[start] == new[start]:
+            start += 1
+        old_end, new_end = len(old), len(new)
+        while old_end > start and new_end > start and old[old_end - 1] == new[new_end - 1]:
+            old_end -= 1
+            new_end -= 1
+
+        if old_end - start == new_end - start:
+            # Same number of items changed in place (e.g. a moved component)
+            for index in range(start, old_end):
+                _diff(old[index], new[index], path + [index], ops)
+        else:
+            ops.append({
+                "op": "splice",
+                "path": path,
+                "index": start,
+                "delete": old_end - start,
+                "insert": new[start:new_end],
+            })
+        return
+
+    ops.append({"op": "set", "path": path, "value": new})
+
+
+def apply_delta(document: Any, ops: List[Dict[str, Any]]) -> Any:
+    """Apply operations from diff_layout to document (modified in place) and return it.
+
+    Raises:
+        ValueError: If an operation doesn't fit the document
+    """
+    for op in ops:
+        path = op["path"]
+        try:
+            if op["op"] == "splice":
+                target = _resolve(document, path)
+                target[op["index"]:op["index"] + op["delete"]] = op["insert"]
+            elif not path:
+                document = op["value"] if op["op"] == "set" else None
+            else:
+                parent = _resolve(document, path[:-1])
+                if op["op"] == "set":
+                    if isinstance(parent, list) and path[-1] == len(parent):
+                        parent.append(op["value"])
+                    else:
+                        parent[path[-1]] = op["value"]
+                elif op["op"] == "remove":
+                    del parent[path[-1]]
+                else:
+                    raise ValueError(f"Unknown delta operation: {op['op']}")
+        except (KeyError, IndexError, TypeError) as exc:
+            raise ValueError(f"Delta does not apply at {path}") from exc
+    return document
+
+
+def _resolve(document: Any, path: List[Any]) -> Any:
+    for key in path:
+        document = document[key]
+    return document
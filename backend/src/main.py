@@ -10,16 +10,19 @@ Handles:
 """
 
 import asyncio
+import base64
+import binascii
+import contextlib
 import json
 import logging
-from datetime import datetime
-from typing import Dict, Any
-
-import psutil
+import os
+from typing import Any, AsyncIterator, Dict, Tuple
 
+from backends import ComponentLoader, loaded_heavy_modules
+from module_registry import ModuleRegistry
+from settings import get_settings
+from system_utils import get_system_monitor
 from websocket_server import WebSocketServer
-from modules.notes import NoteModule
-from modules.hardware import HardwareModule
 
 # Configure logging
 logging.basicConfig(
@@ -35,6 +38,13 @@ class AssistantCore:
     def __init__(self):
         self.state = 'IDLE'
         self.logger = logger
+        self.monitor = get_system_monitor()
+        # Worker clients, set once their components have loaded in the background
+        self.transcriber = None
+        self.synthesizer = None
+        self.language_model = None
+        # Assistant requests queued or generating; the state is IDLE only at 0
+        self.active_requests = 0
         self.logger.info("ATLAS Assistant initialized")
     
     def set_state(self, new_state: str) -> None:
@@ -46,35 +56,56 @@ class AssistantCore:
         else:
             self.logger.warning(f"Invalid state: {new_state}")
     
-    def process_voice_input(self, audio_data: bytes) -> str:
+    async def process_voice_input(self, audio_data: bytes) -> str:
         """
-        Process voice input and convert to text.
-        TODO: Implement speech recognition
+        Process voice input (16 kHz 16-bit mono PCM) and convert to text.
+        Runs in the transcription worker, so the event loop stays free;
+        raises RuntimeError if the worker isn't running.
         """
+        if self.transcriber is None or not self.transcriber.is_alive:
+            # Never load whisper in the server process instead
+            raise RuntimeError("Transcription worker is not running")
         self.set_state('THINKING')
-        # Speech-to-text logic here
-        return "Voice input received"
+        return await self.transcriber.transcribe(audio_data)
     
     def get_system_info(self) -> Dict[str, Any]:
-        """Get current system information."""
-        return {
-            'cpu_percent': psutil.cpu_percent(interval=1),
-            'memory': {
-                'percent': psutil.virtual_memory().percent,
-                'available_gb': psutil.virtual_memory().available / (1024**3),
-            },
-            'timestamp': datetime.now().isoformat(),
-        }
+        """Get current system information from the background sampler."""
+        return self.monitor.snapshot()
     
-    def process_assistant_request(self, query: str) -> str:
+    async def stream_assistant_request(self, query: str) -> AsyncIterator[Tuple[int, str, Any]]:
         """
-        Process user query and generate response.
-        TODO: Implement LLM integration
+        Generate a response in the LLM worker, yielding (job_id, kind, value)
+        as it comes in: 'queued' first, then 'started', 'token'... and 'done'.
+        Raises RuntimeError if the model is unavailable or busy.
         """
-        self.set_state('THINKING')
-        response = f"Processing: {query}"
-        self.set_state('RESPONDING')
-        return response
+        if self.language_model is None:
+            raise RuntimeError("Language model is not loaded")
+        job_id = self.language_model.submit(
+            query,
+            max_new_tokens=get_settings().get('assistant.llm_max_new_tokens', 256),
+        )
+        self.active_requests += 1
+        if self.state != 'RESPONDING':
+            self.set_state('THINKING')
+        try:
+            yield job_id, 'queued', self.language_model.queued_jobs - 1
+            async with contextlib.aclosing(self.language_model.events(job_id)) as events:
+                async for kind, value in events:
+                    if kind == 'token' and self.state == 'THINKING':
+                        self.set_state('RESPONDING')
+                    yield job_id, kind, value
+        finally:
+            self.active_requests -= 1
+            if self.active_requests == 0:
+                self.set_state('IDLE')
+
+    async def process_assistant_request(self, query: str) -> str:
+        """Process user query and return the complete response."""
+        pieces = []
+        async for _, kind, value in self.stream_assistant_request(query):
+            if kind == 'token':
+                pieces.append(value)
+        return ''.join(pieces)
 
 
 async def main():
@@ -83,7 +114,14 @@ async def main():
     assistant = AssistantCore()
     
     # Create WebSocket server
-    ws_server = WebSocketServer(host='localhost', port=8765)
+    settings = get_settings()
+    ws_server = WebSocketServer(
+        host='localhost',
+        port=int(os.environ.get('ATLAS_WS_PORT', 8765)),
+        compression=settings.get('websocket.compression', True),
+        compression_min_bytes=settings.get('websocket.compression_min_bytes', 1024),
+        compression_level=settings.get('websocket.compression_level', 6),
+    )
     
     # Register message handlers
     async def handle_system_info(data: Dict[str, Any]) -> Dict[str, Any]:
@@ -104,32 +142,186 @@ async def main():
         }
     
     async def handle_voice_input(data: Dict[str, Any]) -> Dict[str, Any]:
-        """Handle voice input."""
+        """Handle a whole utterance sent inside one message (streamed input uses voice/start)."""
         audio_data = data.get('audio', b'')
-        result = assistant.process_voice_input(audio_data)
+        if isinstance(audio_data, str):
+            # JSON clients send the PCM base64-encoded
+            try:
+                audio_data = base64.b64decode(audio_data)
+            except binascii.Error:
+                return {'type': 'voice/error', 'message': 'Ongeldige audio'}
+        try:
+            result = await assistant.process_voice_input(audio_data)
+        except RuntimeError as exc:
+            logger.error("Voice input failed: %s", exc)
+            return {'type': 'voice/error', 'message': 'Spraakherkenning mislukt'}
         return {
             'type': 'voice_processed',
             'result': result
         }
     
+    # Running LLM jobs: job id -> id of the client that asked
+    assistant_jobs: Dict[int, int] = {}
+
+    async def handle_assistant_query(data: Dict[str, Any], session: Any) -> Any:
+        """Answer a query, streaming the reply as 'assistant/token' frames."""
+        query = (data.get('text') or '').strip()
+        if not query:
+            return {'type': 'assistant/error', 'message': 'Geen vraag opgegeven'}
+        try:
+            events = assistant.stream_assistant_request(query)
+            job_id, _, queued = await events.__anext__()
+        except RuntimeError as e:
+            logger.warning(f"Assistant request refused: {e}")
+            return {'type': 'assistant/error', 'message': 'Het taalmodel is niet beschikbaar'}
+        assistant_jobs[job_id] = session.id
+
+        async def frames() -> AsyncIterator[Dict[str, Any]]:
+            yield {'type': 'assistant/queued', 'job_id': job_id, 'position': queued}
+            try:
+                async for _, kind, value in events:
+                    if kind == 'started':
+                        yield {'type': 'assistant/started', 'job_id': job_id}
+                    elif kind == 'token':
+                        yield {'type': 'assistant/token', 'job_id': job_id, 'text': value}
+                    elif kind == 'done':
+                        yield {'type': 'assistant/done', 'job_id': job_id, **value}
+            except RuntimeError as e:
+                logger.error(f"Assistant job {job_id} failed: {e}")
+                yield {'type': 'assistant/error', 'job_id': job_id, 'message': 'Antwoord genereren mislukt'}
+            finally:
+                await events.aclose()
+                assistant_jobs.pop(job_id, None)
+
+        return frames()
+
+    async def handle_assistant_cancel(data: Dict[str, Any], session: Any) -> Dict[str, Any]:
+        """Stop a reply that is queued or still being generated."""
+        job_id = data.get('job_id')
+        if assistant_jobs.get(job_id) != session.id or not assistant.language_model.cancel(job_id):
+            return {'type': 'assistant/error', 'message': 'Onbekende opdracht'}
+        return {'type': 'assistant/cancelled', 'job_id': job_id}
+
+    async def handle_assistant_status(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Report whether the language model is loaded yet."""
+        worker = assistant.language_model
+        return {
+            'type': 'assistant/status',
+            'running': worker.is_alive,
+            'ready': worker.ready,
+            'queued_jobs': worker.queued_jobs,
+            **(worker.ready_info if worker.ready else {}),
+        }
+
     # Register core handlers
     ws_server.register_handler('get_system_info', handle_system_info)
-    ws_server.register_handler('change_state', handle_state_change)
-    ws_server.register_handler('voice_input', handle_voice_input)
+    ws_server.register_handler('change_state', handle_state_change, ordered=True)
 
-    # Register modules
-    note_module = NoteModule()
-    note_module.register(ws_server.register_handler)
+    async def publish_system_metrics() -> None:
+        """Push each new system sample to 'system/metrics' subscribers."""
+        last_snapshot = None
+        while True:
+            await asyncio.sleep(assistant.monitor.interval)
+            snapshot = assistant.get_system_info()
+            if snapshot is last_snapshot or not ws_server.has_subscribers('system/metrics'):
+                continue
+            last_snapshot = snapshot
+            ws_server.publish('system/metrics', {
+                'type': 'system_info',
+                'data': snapshot
+            })
+
+    # Modules (notes/, hardware/, ...) are imported on the first message in their namespace
+    registry = ModuleRegistry(
+        ws_server,
+        context={'publish': ws_server.publish},
+        idle_unload_seconds=settings.get('modules.idle_unload_seconds', 0),
+    )
+    registry.discover()
+
+    async def handle_modules(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Report which modules are loaded."""
+        return {'type': 'system/modules', 'modules': registry.status()}
+
+    ws_server.register_handler('system/modules', handle_modules)
+
+    # Voice and assistant load in the background once the server listens:
+    # their modules are imported off the event loop and their models load
+    # in worker processes. Until then their messages get 'system/loading'.
+    async def load_voice() -> None:
+        def import_voice() -> Tuple[Any, Any, Any]:
+            from modules.voice import VoiceModule
+            from speech_synthesis import get_synthesis_worker
+            from transcription import get_transcription_worker
+            return VoiceModule, get_transcription_worker(), get_synthesis_worker()
+
+        voice_module_class, transcriber, synthesizer = await asyncio.to_thread(import_voice)
+        assistant.transcriber, assistant.synthesizer = transcriber, synthesizer
+        voice_module = voice_module_class(transcriber=transcriber, synthesizer=synthesizer)
+        voice_module.register(ws_server.register_handler, ws_server.register_binary_handler)
+        transcriber.start()
+        synthesizer.start()
+        if not all(await asyncio.gather(transcriber.wait_ready(), synthesizer.wait_ready())):
+            raise RuntimeError(transcriber.error or synthesizer.error or "Speech worker exited while loading")
+        # Until here voice_input gets the loader's system/loading reply
+        ws_server.register_handler('voice_input', handle_voice_input)
+
+    async def load_assistant() -> None:
+        def import_language_model() -> Any:
+            from language_model import get_language_model_worker
+            return get_language_model_worker()
+
+        assistant.language_model = await asyncio.to_thread(import_language_model)
+        ws_server.register_handler('assistant/query', handle_assistant_query, with_client=True)
+        ws_server.register_handler('assistant/cancel', handle_assistant_cancel, with_client=True)
+        ws_server.register_handler('assistant/status', handle_assistant_status)
+        assistant.language_model.start()
+        if not await assistant.language_model.wait_ready():
+            raise RuntimeError(assistant.language_model.error or "Language model worker exited while loading")
+
+    def publish_components(status: Dict[str, Any]) -> None:
+        ws_server.publish('system/components', {'type': 'system/components', 'components': status})
+
+    loader = ComponentLoader(on_change=publish_components)
+    loader.add('voice', load_voice, prefixes=('voice/', 'voice_input'), requires=('whisper', 'kokoro'))
+    loader.add('assistant', load_assistant, prefixes=('assistant/',), requires=('transformers', 'torch'))
+    ws_server.set_fallback_handler(loader.handle_unavailable)
+
+    async def handle_components(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Report which background components are loaded."""
+        return {
+            'type': 'system/components',
+            'ready': loader.all_ready,
+            'components': loader.status(),
+        }
+
+    ws_server.register_handler('system/components', handle_components)
+
+    # Start background system sampling and publishing
+    assistant.monitor.start()
+    metrics_task = asyncio.create_task(publish_system_metrics())
+    loader_task = asyncio.create_task(loader.run(after=ws_server.listening))
+    registry.start()
+
+    heavy = loaded_heavy_modules()
+    if heavy:
+        logger.warning(f"Heavy modules imported before the server started: {', '.join(heavy)}")
 
-    hardware_module = HardwareModule()
-    hardware_module.register(ws_server.register_handler)
-    
     # Start WebSocket server
     try:
         logger.info("Backend running. Press Ctrl+C to exit.")
         await ws_server.start()
     except KeyboardInterrupt:
         logger.info("Shutting down gracefully...")
+    finally:
+        loader_task.cancel()
+        registry.stop()
+        loader.cancel()
+        metrics_task.cancel()
+        assistant.monitor.stop()
+        for worker in (assistant.transcriber, assistant.synthesizer, assistant.language_model):
+            if worker is not None:
+                worker.stop()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,229 @@
+"""Message encoding for the websocket channel.
+
+Clients pick a wire format when they connect, through the websocket
+subprotocol:
+
+- atlas.json (the default, also used when no subprotocol is offered): JSON
+  text frames. Uses orjson when it is installed (several times faster on
+  large part and circuit lists) and falls back to the stdlib json module.
+- atlas.msgpack: MessagePack binary frames, when msgpack is installed.
+  Smaller on the wire and cheaper to decode, and byte fields (e.g. audio)
+  travel as raw bytes instead of base64.
+
+Handlers can return an EncodedMessage to embed large read-only results,
+which are encoded once per codec and reused across clients and requests.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+ENCODER_NAME = "orjson" if orjson is not None else "json"
+
+JSON_SUBPROTOCOL = "atlas.json"
+MSGPACK_SUBPROTOCOL = "atlas.msgpack"
+
+# Encoded fragments kept for reuse, keyed by codec and the identity of the encoded object
+FRAGMENT_CACHE_SIZE = 64
+
+
+def encode(value: Any) -> str:
+    """Encode a value as compact JSON text."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; the stdlib handles those
+    return json.dumps(value, default=str, ensure_ascii=False, separators=(",", ":"))
+
+
+def decode(data: Any) -> Any:
+    """Decode JSON text or bytes.
+
+    Raises:
+        json.JSONDecodeError: If the data isn't valid JSON (orjson's error is a subclass)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _splice(text: str, members: str) -> str:
+    """Insert encoded "key":value members before the closing brace of an object."""
+    body = text.rstrip()[:-1]
+    return f"{body}{',' if body.rstrip() != '{' else ''}{members}}}"
+
+
+class JsonCodec:
+    """JSON text frames."""
+
+    name = JSON_SUBPROTOCOL
+    binary = False
+
+    def encode(self, value: Any) -> str:
+        return encode(value)
+
+    def decode(self, data: Union[str, bytes]) -> Any:
+        return decode(data)
+
+    def compose(self, message: Dict[str, Any], fragments: Dict[str, str]) -> str:
+        text = encode(message)
+        if not fragments:
+            return text
+        return _splice(text, ",".join(f"{encode(key)}:{fragment}" for key, fragment in fragments.items()))
+
+    def finish(self, composed: str, fields: Dict[str, Any]) -> str:
+        if not fields:
+            return composed
+        # Later keys win when JSON.parse sees duplicates, so these override
+        return _splice(composed, ",".join(f"{encode(key)}:{encode(value)}" for key, value in fields.items()))
+
+
+def _msgpack_default(value: Any) -> Any:
+    return str(value)
+
+
+def _msgpack_map_header(size: int) -> bytes:
+    if size < 16:
+        return bytes([0x80 | size])
+    if size < 2 ** 16:
+        return b"\xde" + size.to_bytes(2, "big")
+    return b"\xdf" + size.to_bytes(4, "big")
+
+
+class MsgpackCodec:
+    """MessagePack binary frames."""
+
+    name = MSGPACK_SUBPROTOCOL
+    binary = True
+
+    def encode(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=_msgpack_default, use_bin_type=True)
+
+    def decode(self, data: Union[str, bytes]) -> Any:
+        if isinstance(data, str):
+            # Text frames are always JSON, whatever was negotiated
+            return decode(data)
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+    def _pairs(self, items: Dict[str, Any]) -> bytes:
+        return b"".join(self.encode(key) + self.encode(value) for key, value in items.items())
+
+    def compose(self, message: Dict[str, Any], fragments: Dict[str, bytes]) -> Tuple[int, bytes]:
+        # A map is a header carrying the entry count followed by key/value
+        # pairs, so encoded fragments can be appended as pairs
+        pairs = self._pairs(message) + b"".join(self.encode(key) + fragment for key, fragment in fragments.items())
+        return len(message) + len(fragments), pairs
+
+    def finish(self, composed: Tuple[int, bytes], fields: Dict[str, Any]) -> bytes:
+        count, pairs = composed
+        return _msgpack_map_header(count + len(fields)) + pairs + self._pairs(fields)
+
+
+JSON_CODEC = JsonCodec()
+CODECS: Dict[str, Any] = {JSON_SUBPROTOCOL: JSON_CODEC}
+if msgpack is not None:
+    CODECS[MSGPACK_SUBPROTOCOL] = MsgpackCodec()
+
+
+def available_subprotocols() -> List[str]:
+    """Subprotocols offered to clients, most preferred first."""
+    return [name for name in (MSGPACK_SUBPROTOCOL, JSON_SUBPROTOCOL) if name in CODECS]
+
+
+def select_subprotocol(offered: Sequence[str]) -> Optional[str]:
+    """Our most preferred subprotocol among those a client offered.
+
+    None (plain JSON) when the client offered none we know, including
+    browsers that open the socket without any subprotocol.
+    """
+    for name in available_subprotocols():
+        if name in offered:
+            return name
+    return None
+
+
+def codec_for(subprotocol: Optional[str]) -> Any:
+    """Codec for a negotiated subprotocol; JSON when none was negotiated."""
+    return CODECS.get(subprotocol or "", JSON_CODEC)
+
+
+_fragments: "OrderedDict[Tuple[str, int], Tuple[Any, Any]]" = OrderedDict()
+_fragments_lock = threading.Lock()
+
+
+def cached_fragment(value: Any, codec: Any = JSON_CODEC) -> Any:
+    """Encode a read-only value once per codec and reuse it while it stays cached.
+
+    Only pass objects that are never mutated, such as results served from a
+    ResultCache. The object is kept alive alongside its encoding, so its id
+    can't be reused by another object while the entry exists.
+    """
+    key = (codec.name, id(value))
+    with _fragments_lock:
+        entry = _fragments.get(key)
+        if entry is not None and entry[0] is value:
+            _fragments.move_to_end(key)
+            return entry[1]
+
+    encoded = codec.encode(value)
+    with _fragments_lock:
+        _fragments[key] = (value, encoded)
+        _fragments.move_to_end(key)
+        while len(_fragments) > FRAGMENT_CACHE_SIZE:
+            _fragments.popitem(last=False)
+    return encoded
+
+
+class EncodedMessage:
+    """A response whose large read-only values are encoded once and reused.
+
+    The envelope (type, meta, ...) is encoded per response; each value in
+    `values` goes through cached_fragment, so sending the same cached result
+    again only pays for the envelope.
+    """
+
+    __slots__ = ("message", "values", "_composed")
+
+    def __init__(self, message: Dict[str, Any], **values: Any) -> None:
+        self.message = message
+        self.values = values
+        self._composed: Dict[str, Any] = {}
+
+    def render(self, codec: Any = JSON_CODEC, **fields: Any) -> Union[str, bytes]:
+        """Return the frame for a codec, with extra top-level fields (e.g. request_id)."""
+        composed = self._composed.get(codec.name)
+        if composed is None:
+            fragments = {key: cached_fragment(value, codec) for key, value in self.values.items()}
+            composed = self._composed[codec.name] = codec.compose(self.message, fragments)
+        return codec.finish(composed, fields)
+
+
+def encode_message(message: Dict[str, Any], **values: Any) -> EncodedMessage:
+    """Build a response embedding read-only values encoded once per codec.
+
+    Example:
+        encode_message({"type": "hardware/parts/list", "meta": meta}, parts=page["parts"])
+    """
+    return EncodedMessage(message, **values)
+
+
+def encode_response(response: Any, request_id: Optional[Any] = None, codec: Any = JSON_CODEC) -> Union[str, bytes]:
+    """Encode a handler response (dict or EncodedMessage), tagged with request_id."""
+    fields = {"request_id": request_id} if request_id is not None else {}
+    if isinstance(response, EncodedMessage):
+        return response.render(codec, **fields)
+    if fields:
+        response = {**response, **fields}
+    return codec.encode(response)
@@ -0,0 +1,257 @@
+"""Discovers backend modules and loads each on the first message in its namespace.
+
+A module is a class in backend/src/modules/ that follows module_template.py:
+a NAMESPACE class attribute (e.g. 'notes/') and a register(register_handler)
+method. Discovery parses the files with ast, so nothing is imported at
+startup; only the namespace prefixes are registered with the websocket
+server. The first message whose type starts with a prefix imports the
+module, constructs the class and lets it register its handlers, after which
+messages go straight to them. Constructor parameters are filled by name
+from the registry's context (e.g. publish).
+
+With idle_unload_seconds set, a module that handled no message for that long
+is unloaded: its handlers are unregistered, its optional close() hook
+releases caches and connections, and the instance is dropped. The next
+message in its namespace loads it again.
+
+Classes without NAMESPACE are not managed here (the voice module, which
+owns worker processes, is loaded by main's ComponentLoader).
+"""
+
+import ast
+import asyncio
+import importlib
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MODULES_DIR = Path(__file__).resolve().parent / "modules"
+# Files in the modules package that never hold a loadable module
+SKIPPED_FILES = ("__init__", "module_template")
+
+
+@dataclass
+class ModuleSpec:
+    """A discovered module class and its state once loaded."""
+
+    namespace: str
+    module: str  # import path, e.g. 'modules.notes'
+    class_name: str
+    instance: Any = None
+    message_types: List[str] = field(default_factory=list)
+    # Handlers (and streamed responses) still running
+    active: int = 0
+    last_used: float = 0.0
+    loads: int = 0
+
+
+def _class_namespace(node: ast.ClassDef) -> Optional[str]:
+    for item in node.body:
+        if isinstance(item, ast.Assign):
+            targets, value = item.targets, item.value
+        elif isinstance(item, ast.AnnAssign) and item.value is not None:
+            targets, value = [item.target], item.value
+        else:
+            continue
+        if any(isinstance(target, ast.Name) and target.id == "NAMESPACE" for target in targets):
+            if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                return value.value
+    return None
+
+
+def discover_modules(directory: Path = MODULES_DIR, package: str = "modules") -> List[ModuleSpec]:
+    """Find module classes (NAMESPACE plus register()) without importing anything."""
+    specs: List[ModuleSpec] = []
+    for path in sorted(directory.glob("*.py")):
+        if path.stem in SKIPPED_FILES:
+            continue
+        try:
+            tree = ast.parse(path.read_text(encoding="utf-8"), str(path))
+        except (OSError, SyntaxError) as exc:
+            logger.error("Skipping module file %s: %s", path.name, exc)
+            continue
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+            namespace = _class_namespace(node)
+            has_register = any(
+                isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name == "register"
+                for item in node.body
+            )
+            if namespace and has_register:
+                specs.append(ModuleSpec(namespace, f"{package}.{path.stem}", node.name))
+    return specs
+
+
+class ModuleRegistry:
+    """Loads modules on demand into a WebSocketServer and unloads idle ones."""
+
+    def __init__(
+        self,
+        server: Any,
+        context: Optional[Dict[str, Any]] = None,
+        idle_unload_seconds: float = 0,
+    ) -> None:
+        """Initialize the registry.
+
+        Args:
+            server: WebSocketServer to register namespaces and handlers with
+            context: Values for module constructor parameters, by name
+            idle_unload_seconds: Unload modules unused this long (0 keeps them loaded)
+        """
+        self.server = server
+        self.context = context or {}
+        self.idle_unload_seconds = idle_unload_seconds
+        self.modules: Dict[str, ModuleSpec] = {}
+        self._idle_task: Optional[asyncio.Task] = None
+
+    def discover(self, directory: Path = MODULES_DIR) -> List[str]:
+        """Register the namespace of every discovered module; returns the namespaces."""
+        for spec in discover_modules(directory):
+            if spec.namespace in self.modules:
+                logger.warning(
+                    "Namespace %s of %s.%s already taken by %s, skipping",
+                    spec.namespace, spec.module, spec.class_name, self.modules[spec.namespace].module,
+                )
+                continue
+            self.modules[spec.namespace] = spec
+            self.server.register_namespace(spec.namespace, partial(self.load, spec.namespace))
+        logger.info("Discovered modules: %s", ", ".join(self.modules) or "none")
+        return list(self.modules)
+
+    async def load(self, namespace: str) -> None:
+        """Import, construct and register a module, unless it is loaded already."""
+        spec = self.modules[namespace]
+        if spec.instance is not None:
+            return
+        started = time.perf_counter()
+        # Importing may pull in service modules; keep that off the event loop
+        module = await asyncio.to_thread(importlib.import_module, spec.module)
+        module_class = getattr(module, spec.class_name)
+        parameters = inspect.signature(module_class).parameters
+        instance = module_class(**{name: value for name, value in self.context.items() if name in parameters})
+        instance.register(partial(self._register_handler, spec))
+        spec.instance = instance
+        spec.loads += 1
+        spec.last_used = time.monotonic()
+        logger.info("Loaded module %s in %.1f ms", spec.class_name, (time.perf_counter() - started) * 1000)
+
+    async def unload(self, namespace: str) -> bool:
+        """Unregister a module's handlers and drop it; False if it isn't loaded or is busy."""
+        spec = self.modules[namespace]
+        if spec.instance is None or spec.active:
+            return False
+        for message_type in spec.message_types:
+            self.server.unregister_handler(message_type)
+        spec.message_types.clear()
+        instance, spec.instance = spec.instance, None
+        close = getattr(instance, "close", None)
+        if close is not None:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+        logger.info("Unloaded idle module %s", spec.class_name)
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            namespace: {
+                "module": spec.class_name,
+                "loaded": spec.instance is not None,
+                "loads": spec.loads,
+                "active": spec.active,
+                "idle_seconds": round(now - spec.last_used, 1) if spec.instance is not None else None,
+            }
+            for namespace, spec in self.modules.items()
+        }
+
+    def start(self) -> None:
+        """Start unloading idle modules, if idle_unload_seconds is set. Call from the event loop."""
+        if self.idle_unload_seconds > 0 and self._idle_task is None:
+            self._idle_task = asyncio.create_task(self._unload_idle())
+
+    def stop(self) -> None:
+        if self._idle_task is not None:
+            self._idle_task.cancel()
+            self._idle_task = None
+
+    async def _unload_idle(self) -> None:
+        interval = min(max(self.idle_unload_seconds / 4, 1.0), 60.0)
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for namespace, spec in self.modules.items():
+                if spec.instance is not None and not spec.active and now - spec.last_used >= self.idle_unload_seconds:
+                    try:
+                        await self.unload(namespace)
+                    except Exception as exc:
+                        logger.error("Unloading module %s failed: %s", spec.class_name, exc)
+
+    def _register_handler(self, spec: ModuleSpec, message_type: str, handler: Callable, **options: Any) -> None:
+        spec.message_types.append(message_type)
+        self.server.register_handler(message_type, partial(self._run_handler, spec, handler), **options)
+
+    async def _run_handler(self, spec: ModuleSpec, handler: Callable, *args: Any) -> Any:
+        # Count running handlers, so an idle unload never pulls the module from under them
+        spec.active += 1
+        spec.last_used = time.monotonic()
+        try:
+            response = await handler(*args)
+        except BaseException:
+            _release(spec)
+            raise
+        if hasattr(response, "__aiter__"):
+            # Still active until the stream is closed (or dropped unread)
+            return _TrackedStream(spec, response)
+        _release(spec)
+        return response
+
+
+def _release(spec: ModuleSpec) -> None:
+    spec.active -= 1
+    spec.last_used = time.monotonic()
+
+
+class _TrackedStream:
+    """A handler's streamed response that keeps its module active until it ends.
+
+    Unlike a wrapping async generator, this also releases the module when the
+    stream is closed before its first frame, or never iterated and garbage
+    collected (e.g. the client left before the dispatcher got to it).
+    """
+
+    def __init__(self, spec: ModuleSpec, frames: AsyncIterator[Any]) -> None:
+        self._spec: Optional[ModuleSpec] = spec
+        self._frames = frames
+
+    def __aiter__(self) -> "_TrackedStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        try:
+            return await self._frames.__anext__()
+        except BaseException:
+            # Exhausted, failed or cancelled: the stream is over either way
+            await self.aclose()
+            raise
+
+    async def aclose(self) -> None:
+        if self._spec is None:
+            return
+        _release(self._spec)
+        self._spec = None
+        aclose = getattr(self._frames, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+    def __del__(self) -> None:
+        if self._spec is not None:
+            _release(self._spec)
+            self._spec = None
@@ -3,10 +3,14 @@
 Provides offline-first access to Arduino/Raspberry Pi parts and circuit data.
 """
 
+import asyncio
 import logging
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, Optional, Set
 
 import hardware_service
+from message_encoding import EncodedMessage, encode_message
+from pagination import clamp_limit
+from settings import get_settings
 
 logger = logging.getLogger(__name__)
 
@@ -14,54 +18,195 @@ logger = logging.getLogger(__name__)
 class HardwareModule:
     """WebSocket-facing module for hardware catalog operations."""
 
+    NAMESPACE = "hardware/"
+
+    def __init__(self) -> None:
+        # Catalog file imports still running in their threads
+        self._imports: Set[asyncio.Task] = set()
+
     def register(self, register_handler) -> None:
         register_handler("hardware/parts/list", self.handle_list_parts)
-        register_handler("hardware/parts/search", self.handle_list_parts)
+        register_handler("hardware/parts/search", self.handle_search_parts)
+        register_handler("hardware/parts/query", self.handle_query_parts)
+        register_handler("hardware/parts/facets", self.handle_part_facets)
+        register_handler("hardware/cache/stats", self.handle_cache_stats)
         register_handler("hardware/import", self.handle_import)
+        register_handler("hardware/import/file", self.handle_import_file)
         register_handler("hardware/circuits/list", self.handle_list_circuits)
         register_handler("hardware/circuits/save", self.handle_save_circuit)
         register_handler("hardware/circuits/delete", self.handle_delete_circuit)
         register_handler("hardware/circuits/load", self.handle_load_circuit)
+        register_handler("hardware/circuits/revisions", self.handle_circuit_revisions)
+        register_handler("hardware/circuits/restore", self.handle_restore_circuit, ordered=True)
+        register_handler("hardware/circuits/undo", self.handle_undo_circuit, ordered=True)
+        register_handler("hardware/circuits/redo", self.handle_redo_circuit, ordered=True)
         logger.info("HardwareModule handlers registered")
 
-    async def handle_list_parts(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        query = (data.get("query") or data.get("search") or "").strip() or None
-        platform = data.get("platform") or None
-        category = data.get("category") or None
-        limit = int(data.get("limit", 200))
+    async def close(self) -> None:
+        """Release the catalog caches and database connections when unloaded.
 
-        parts = hardware_service.list_parts(query=query, platform=platform, category=category, limit=limit)
-        return {
+        A file import keeps running after its client went away, so wait for
+        those first rather than closing the connections under them.
+        """
+        if self._imports:
+            logger.info("Waiting for %s catalog import(s) before unloading", len(self._imports))
+            await asyncio.gather(*self._imports, return_exceptions=True)
+        hardware_service.release_resources()
+
+    # Part pages and circuit lists come from hardware_service's result cache,
+    # so they are passed to encode_message and encoded once per cache entry and codec
+
+    async def handle_list_parts(self, data: Dict[str, Any]) -> Any:
+        """List or search parts one page at a time.
+
+        Pass the previous response's meta.next_cursor as 'cursor' to get the
+        next page. With 'stream': true the whole result is sent as a series of
+        'hardware/parts/page' frames instead. 'specs' filters on spec values
+        (see hardware_service.parse_spec_filters).
+        """
+        filters = {
+            "query": (data.get("query") or data.get("search") or "").strip() or None,
+            "platform": data.get("platform") or None,
+            "category": data.get("category") or None,
+            "limit": clamp_limit(data.get("limit"), default=200),
+            "highlight": bool(data.get("highlight")),
+            "specs": data.get("specs") or None,
+        }
+        cursor = data.get("cursor") or None
+
+        if data.get("stream"):
+            return self._stream_parts(filters, cursor)
+
+        try:
+            page = await hardware_service.list_parts_page_async(cursor=cursor, **filters)
+        except ValueError as exc:
+            return {"type": "hardware/error", "message": str(exc)}
+
+        return encode_message({
             "type": "hardware/parts/list",
-            "parts": parts,
             "meta": {
-                "query": query,
-                "platform": platform,
-                "category": category,
-                "limit": limit,
-                "total": hardware_service.count_parts(),
+                "query": filters["query"],
+                "platform": filters["platform"],
+                "category": filters["category"],
+                "specs": filters["specs"],
+                "limit": filters["limit"],
+                "ranked": bool(filters["query"]),
+                "cursor": cursor,
+                "next_cursor": page["next_cursor"],
+                "total": await hardware_service.count_parts_async(),
             },
-        }
+        }, parts=page["parts"])
+
+    async def handle_search_parts(self, data: Dict[str, Any]) -> Any:
+        return await self.handle_list_parts(data)
+
+    async def handle_query_parts(self, data: Dict[str, Any]) -> Any:
+        """Structured spec query, e.g. specs=[{"key": "flash_kb", "op": ">=", "value": 32}]."""
+        if not data.get("specs"):
+            return {"type": "hardware/error", "message": "Geen spec filters opgegeven"}
+        return await self.handle_list_parts(data)
+
+    async def handle_part_facets(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Return part counts per platform, category and source for the filter UI."""
+        result = await hardware_service.get_part_facets_async()
+        return {"type": "hardware/parts/facets", **result}
+
+    async def handle_cache_stats(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Hit/miss/eviction counters of the catalog result caches, for monitoring."""
+        return {"type": "hardware/cache/stats", "caches": hardware_service.get_cache_stats()}
+
+    async def _stream_parts(self, filters: Dict[str, Any], cursor: Optional[str]) -> AsyncIterator[EncodedMessage]:
+        page_number = 0
+        while True:
+            try:
+                page = await hardware_service.list_parts_page_async(cursor=cursor, **filters)
+            except ValueError as exc:
+                yield {"type": "hardware/error", "message": str(exc)}
+                return
+
+            next_cursor = page["next_cursor"]
+            yield encode_message({
+                "type": "hardware/parts/page",
+                "page": page_number,
+                "cursor": cursor,
+                "next_cursor": next_cursor,
+                "done": next_cursor is None,
+            }, parts=page["parts"])
+            if next_cursor is None:
+                return
+            cursor = next_cursor
+            page_number += 1
 
     async def handle_import(self, data: Dict[str, Any]) -> Dict[str, Any]:
         sources = data.get("sources")
-        summary = hardware_service.refresh_catalog(sources)
+        summary = await hardware_service.refresh_catalog_async(
+            sources,
+            incremental=data.get("incremental", True),
+            full=data.get("full", True),
+        )
         return {
             "type": "hardware/import/status",
             "summary": summary,
             "message": "Catalog refreshed",
         }
 
-    async def handle_list_circuits(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        circuits = hardware_service.list_circuits()
-        return {
-            "type": "hardware/circuits/list",
-            "circuits": circuits,
+    async def handle_import_file(self, data: Dict[str, Any]) -> Any:
+        """Import a JSONL/CSV catalog file from the import directory, streaming progress frames."""
+        path = (data.get("path") or "").strip()
+        if not path:
+            return {"type": "hardware/error", "message": "Bestandspad ontbreekt"}
+        import_dir = get_settings().get("hardware.import_dir", hardware_service.DEFAULT_IMPORT_DIR)
+        try:
+            file_path = hardware_service.resolve_import_path(path, import_dir)
+        except ValueError as exc:
+            return {"type": "hardware/error", "message": str(exc)}
+        return self._stream_import(str(file_path))
+
+    async def _stream_import(self, path: str) -> AsyncIterator[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        updates: asyncio.Queue = asyncio.Queue()
+
+        def on_progress(progress: Dict[str, Any]) -> None:
+            # Called from the import thread
+            loop.call_soon_threadsafe(updates.put_nowait, progress)
+
+        job = asyncio.create_task(hardware_service.import_catalog_file_async(path, progress=on_progress))
+        job.add_done_callback(lambda _: updates.put_nowait(None))
+        job.add_done_callback(self._import_done)
+        self._imports.add(job)
+
+        while (progress := await updates.get()) is not None:
+            yield {"type": "hardware/import/progress", "path": path, **progress}
+
+        try:
+            summary = job.result()
+        except ValueError as exc:
+            yield {"type": "hardware/error", "message": str(exc)}
+            return
+        except Exception as exc:
+            logger.error("Catalog file import failed: %s", exc)
+            yield {"type": "hardware/error", "message": "Catalogus kon niet geïmporteerd worden"}
+            return
+
+        yield {
+            "type": "hardware/import/status",
+            "summary": summary,
+            "message": "Catalog imported",
         }
 
+    def _import_done(self, job: asyncio.Task) -> None:
+        self._imports.discard(job)
+        if not job.cancelled() and job.exception() is not None:
+            # Reported to the client by _stream_import, if it is still listening
+            logger.debug("Catalog file import ended with %s", job.exception())
+
+    async def handle_list_circuits(self, data: Dict[str, Any]) -> EncodedMessage:
+        circuits = await hardware_service.list_circuits_async()
+        return encode_message({"type": "hardware/circuits/list"}, circuits=circuits)
+
     async def handle_save_circuit(self, data: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            circuit = hardware_service.save_circuit(
+            circuit = await hardware_service.save_circuit_async(
                 name=data.get("name"),
                 platform=data.get("platform"),
                 description=data.get("description"),
@@ -69,12 +214,12 @@ class HardwareModule:
                 part_ids=data.get("parts") or [],
                 layout=data.get("layout"),
                 circuit_id=data.get("id"),
+                expected_version=data.get("version"),
             )
-            circuits = hardware_service.list_circuits()
             return {
                 "type": "hardware/circuits/saved",
                 "circuit": circuit,
-                "circuits": circuits,
+                "version": circuit["version"],
             }
         except ValueError as exc:
             return {"type": "hardware/error", "message": str(exc)}
@@ -82,52 +227,81 @@ class HardwareModule:
             logger.error("Circuit save failed: %s", exc)
             return {"type": "hardware/error", "message": "Circuit kon niet opgeslagen worden"}
 
-    async def handle_delete_circuit(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle_delete_circuit(self, data: Dict[str, Any]) -> Any:
         circuit_id = data.get("id")
         if not circuit_id:
             return {"type": "hardware/error", "message": "Circuit ID ontbreekt"}
         
         try:
-            from hardware_database import get_hardware_database
-            db = get_hardware_database()
-            db.execute_write("DELETE FROM circuits WHERE id = ?", (circuit_id,))
-            circuits = hardware_service.list_circuits()
-            return {
-                "type": "hardware/circuits/deleted",
-                "id": circuit_id,
-                "circuits": circuits,
-            }
+            await hardware_service.delete_circuit_async(circuit_id)
+            circuits = await hardware_service.list_circuits_async()
+            return encode_message(
+                {"type": "hardware/circuits/deleted", "id": circuit_id},
+                circuits=circuits,
+            )
         except Exception as exc:
             logger.error("Circuit delete failed: %s", exc)
             return {"type": "hardware/error", "message": "Circuit kon niet verwijderd worden"}
 
-    async def handle_load_circuit(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle_load_circuit(self, data: Dict[str, Any]) -> Any:
         circuit_id = data.get("id")
         if not circuit_id:
             return {"type": "hardware/error", "message": "Circuit ID ontbreekt"}
         
         try:
-            from hardware_database import get_hardware_database
-            import json
-            db = get_hardware_database()
-            results = db.execute(
-                "SELECT id, name, platform, description, notes, layout, created_at, updated_at FROM circuits WHERE id = ?",
-                (circuit_id,)
-            )
-            if not results:
+            circuit = await hardware_service.get_circuit_async(circuit_id)
+            if not circuit:
                 return {"type": "hardware/error", "message": "Circuit niet gevonden"}
             
-            circuit = results[0]
-            if circuit.get("layout"):
-                try:
-                    circuit["layout"] = json.loads(circuit["layout"])
-                except Exception:
-                    circuit["layout"] = None
-            
-            return {
-                "type": "hardware/circuits/loaded",
-                "circuit": circuit,
-            }
+            return encode_message({"type": "hardware/circuits/loaded"}, circuit=circuit)
         except Exception as exc:
             logger.error("Circuit load failed: %s", exc)
             return {"type": "hardware/error", "message": "Circuit kon niet geladen worden"}
+
+    async def handle_circuit_revisions(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        circuit_id = data.get("id")
+        if not circuit_id:
+            return {"type": "hardware/error", "message": "Circuit ID ontbreekt"}
+
+        try:
+            history = await hardware_service.list_circuit_revisions_async(circuit_id)
+            return {"type": "hardware/circuits/revisions", **history}
+        except ValueError as exc:
+            return {"type": "hardware/error", "message": str(exc)}
+
+    async def handle_restore_circuit(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        circuit_id = data.get("id")
+        revision = data.get("revision")
+        if not circuit_id or revision is None:
+            return {"type": "hardware/error", "message": "Circuit ID of revisie ontbreekt"}
+        try:
+            revision = int(revision)
+        except (TypeError, ValueError):
+            return {"type": "hardware/error", "message": f"Ongeldige revisie: {revision}"}
+        return await self._change_revision(hardware_service.restore_circuit_revision_async(circuit_id, revision))
+
+    async def handle_undo_circuit(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        if not data.get("id"):
+            return {"type": "hardware/error", "message": "Circuit ID ontbreekt"}
+        return await self._change_revision(hardware_service.undo_circuit_async(data["id"]))
+
+    async def handle_redo_circuit(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        if not data.get("id"):
+            return {"type": "hardware/error", "message": "Circuit ID ontbreekt"}
+        return await self._change_revision(hardware_service.redo_circuit_async(data["id"]))
+
+    async def _change_revision(self, change) -> Dict[str, Any]:
+        try:
+            circuit = await change
+        except ValueError as exc:
+            return {"type": "hardware/error", "message": str(exc)}
+        except Exception as exc:
+            logger.error("Circuit revision change failed: %s", exc)
+            return {"type": "hardware/error", "message": "Revisie kon niet toegepast worden"}
+
+        return {
+            "type": "hardware/circuits/loaded",
+            "circuit": circuit,
+            "version": circuit["version"],
+            "revision": circuit["head_revision"],
+        }
@@ -1,9 +1,19 @@
 """Template for new ATLAS Assistant backend modules.
 
 Usage:
-- Copy this file and rename the class and message types.
+- Copy this file and rename the class, NAMESPACE and message types.
+- NAMESPACE is the prefix of all the module's message types; the module is
+  found by module_registry without importing it, and imported and
+  constructed on the first message in its namespace.
 - Implement register() to bind handlers to the WebSocket server.
 - Handlers should be async and return a dict that can be JSON-serialized.
+- Constructor parameters are passed by name from the registry's context
+  (currently only `publish`).
+- An optional close() runs when the module is unloaded after being idle;
+  release caches and connections there.
+- To push events to other clients, accept a `publish` callable and call
+  publish('<topic>', message); clients receive it after sending
+  {'type': 'subscribe', 'topics': ['<topic>']}.
 """
 
 import logging
@@ -15,6 +25,8 @@ logger = logging.getLogger(__name__)
 class ModuleTemplate:
     """Example module template."""
 
+    NAMESPACE = 'template/'
+
     def __init__(self) -> None:
         # Initialize module state here
         pass
@@ -1,8 +1,9 @@
 """Simple note module for ATLAS Assistant."""
 
 import logging
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Callable, Dict, Optional
 import data_service
+from pagination import clamp_limit
 
 logger = logging.getLogger(__name__)
 
@@ -10,36 +11,101 @@ logger = logging.getLogger(__name__)
 class NoteModule:
     """Handles CRUD operations for simple text notes."""
 
-    def __init__(self) -> None:
-        pass
+    NAMESPACE = 'notes/'
+
+    def __init__(self, publish: Optional[Callable[[str, Dict[str, Any]], Any]] = None) -> None:
+        # Publishes change events to other subscribed clients (WebSocketServer.publish)
+        self.publish = publish
 
     def register(self, register_handler) -> None:
         """Register message handlers with the WebSocket server."""
         register_handler('notes/list', self.handle_list_notes)
         register_handler('notes/add', self.handle_add_note)
         register_handler('notes/delete', self.handle_delete_note)
+        register_handler('notes/sync', self.handle_sync_notes)
         logger.info("NoteModule handlers registered")
 
-    async def handle_list_notes(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Get all notes from database."""
-        notes = data_service.get_all_notes()
+    def _notify_changed(self, action: str, **payload: Any) -> None:
+        """Publish a 'notes/changed' event for other open windows."""
+        if self.publish:
+            self.publish('notes/changed', {
+                'type': 'notes/changed',
+                'action': action,
+                **payload,
+            })
+
+    async def handle_list_notes(self, data: Dict[str, Any]) -> Any:
+        """Get notes from database, newest first.
+        
+        Without 'limit' or 'cursor' all notes are returned. With them, one page
+        is returned plus 'next_cursor'; with 'stream': true all notes are sent
+        as a series of 'notes/page' frames.
+        """
+        if data.get('stream'):
+            return self._stream_notes(clamp_limit(data.get('limit')), data.get('cursor'))
+        
+        # Version read before the rows, so a later notes/sync can't miss a change
+        version = await data_service.get_notes_version_async()
+        
+        if data.get('limit') is None and not data.get('cursor'):
+            notes = await data_service.get_all_notes_async()
+            return {
+                'type': 'notes/list',
+                'notes': notes,
+                'version': version,
+            }
+        
+        try:
+            page = await data_service.get_notes_page_async(clamp_limit(data.get('limit')), data.get('cursor'))
+        except ValueError as e:
+            return {
+                'type': 'notes/error',
+                'message': str(e)
+            }
         return {
             'type': 'notes/list',
-            'notes': notes,
+            'notes': page['notes'],
+            'cursor': data.get('cursor'),
+            'next_cursor': page['next_cursor'],
+            'version': version,
         }
 
+    async def _stream_notes(self, limit: int, cursor: Optional[str]) -> AsyncIterator[Dict[str, Any]]:
+        """Yield pages of notes until the last one."""
+        page_number = 0
+        while True:
+            try:
+                page = await data_service.get_notes_page_async(limit, cursor)
+            except ValueError as e:
+                yield {'type': 'notes/error', 'message': str(e)}
+                return
+            
+            next_cursor = page['next_cursor']
+            yield {
+                'type': 'notes/page',
+                'notes': page['notes'],
+                'page': page_number,
+                'cursor': cursor,
+                'next_cursor': next_cursor,
+                'done': next_cursor is None,
+            }
+            if next_cursor is None:
+                return
+            cursor = next_cursor
+            page_number += 1
+
     async def handle_add_note(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Add a new note to database."""
         text = (data.get('text') or '').strip()
         
         try:
-            note = data_service.add_note(text)
-            all_notes = data_service.get_all_notes()
+            note = await data_service.add_note_async(text)
+            self._notify_changed('added', note=note, version=note['version'])
             
             return {
                 'type': 'notes/added',
                 'note': note,
-                'notes': all_notes,
+                'version': note['version'],
             }
         except ValueError as e:
             return {
@@ -51,32 +117,32 @@ class NoteModule:
         """Delete a note from database."""
         note_id = data.get('id')
         
-        success = data_service.delete_note(note_id)
+        version = await data_service.delete_note_async(note_id)
         
-        if not success:
+        if version is None:
             return {
                 'type': 'notes/error',
                 'message': f'Note with id {note_id} not found.'
             }
         
-        all_notes = data_service.get_all_notes()
+        self._notify_changed('deleted', id=note_id, version=version)
         
         return {
             'type': 'notes/deleted',
             'id': note_id,
-            'notes': all_notes,
+            'version': version,
         }
 
-
-        if before_count == after_count:
-            return {
-                'type': 'notes/error',
-                'message': f'Note with id {note_id} not found.'
-            }
-
-        logger.info("Note deleted: %s", note_id)
+    async def handle_sync_notes(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Return note inserts, updates and deletions since 'since_version'."""
+        try:
+            since_version = int(data.get('since_version') or 0)
+        except (TypeError, ValueError):
+            since_version = 0
+        
+        changes = await data_service.get_note_changes_async(since_version)
         return {
-            'type': 'notes/deleted',
-            'id': note_id,
-            'notes': self.notes,
+            'type': 'notes/sync',
+            'since_version': since_version,
+            **changes,
         }
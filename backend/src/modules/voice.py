@@ -0,0 +1,288 @@
+"""Streaming voice input module.
+
+A client opens a stream with 'voice/start', sends its microphone audio as
+binary frames (see audio_stream for the layout) and ends the utterance with
+'voice/stop', which returns the transcription:
+
+    -> {"type": "voice/start", "sample_rate": 16000}
+    <- {"type": "voice/started", "stream_id": 3, "sample_rate": 16000, ...}
+    -> b"ATAU" + stream id + sequence + PCM      (repeated)
+    <- {"type": "voice/transcript", "stream_id": 3, "final": false, ...}  (while speaking)
+    -> {"type": "voice/stop", "stream_id": 3}
+    <- {"type": "voice/stopped", "stream_id": 3, "text": "...", "stats": {...}}
+
+Transcripts come from the transcription worker; 'voice/status' reports
+whether its models are loaded yet.
+
+Spoken replies stream the other way, sentence by sentence:
+
+    -> {"type": "voice/speak", "text": "Hallo! De LED staat aan."}
+    <- {"type": "voice/speech/start", "job_id": 7, "sentences": 2}
+    <- {"type": "voice/speech/sentence", "job_id": 7, "index": 0, "sample_rate": 24000, ...}
+    <- b"ATTS" + job id + sequence + PCM      (repeated)
+    <- {"type": "voice/speech/end", "job_id": 7, "first_audio_ms": 12.5, ...}
+
+'voice/speak/cancel' with the job_id stops a reply that is still playing.
+"""
+
+import asyncio
+import contextlib
+import itertools
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+import websockets
+
+from audio_stream import (
+    AUDIO_FRAME_MAGIC,
+    AUDIO_HEADER,
+    SPEECH_FRAME_MAGIC,
+    AudioStream,
+    pack_audio_frame,
+    parse_audio_frame,
+)
+from settings import get_settings
+from speech_synthesis import SynthesisWorker
+from transcription import TranscriptionWorker
+from voice import VoiceProcessor
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_SAMPLE_RATES = (8000, 16000, 22050, 24000, 44100, 48000)
+MAX_STREAMS_PER_CLIENT = 2
+# Samples handed to the processor per feed_audio call (100 ms at 16 kHz)
+FEED_SAMPLES = 1600
+# Suggested chunk size for clients (20 ms at 16 kHz); larger frames are accepted
+CHUNK_SAMPLES = 320
+# Synthesized speech is sent in frames of this many samples (200 ms at 24 kHz)
+SPEECH_FRAME_SAMPLES = 4800
+
+
+class VoiceModule:
+    """Handles streamed voice input and output over binary websocket frames."""
+
+    def __init__(
+        self,
+        transcriber: Optional[TranscriptionWorker] = None,
+        synthesizer: Optional[SynthesisWorker] = None,
+        processor_factory: Callable[..., Any] = VoiceProcessor,
+    ) -> None:
+        self.transcriber = transcriber
+        self.synthesizer = synthesizer
+        self.processor_factory = processor_factory
+        settings = get_settings()
+        self.buffer_seconds = float(settings.get('voice.buffer_seconds', 10))
+        self.stall_timeout = float(settings.get('voice.stall_timeout_seconds', 2.0))
+        self._ids = itertools.count(1)
+        # stream id -> (owning client session id, stream)
+        self.streams: Dict[int, Any] = {}
+        # stream id -> the on_close callback that aborts it with its client
+        self._abort_callbacks: Dict[int, Callable[[], None]] = {}
+        # speech job id -> (owning client session id, cancel event)
+        self.speech_jobs: Dict[int, Any] = {}
+
+    def register(self, register_handler, register_binary_handler) -> None:
+        """Register message handlers with the WebSocket server."""
+        register_handler('voice/start', self.handle_start, ordered=True, with_client=True)
+        register_handler('voice/stop', self.handle_stop, ordered=True, with_client=True)
+        register_handler('voice/status', self.handle_status)
+        register_handler('voice/speak', self.handle_speak, with_client=True)
+        register_handler('voice/speak/cancel', self.handle_speak_cancel, with_client=True)
+        register_binary_handler(AUDIO_FRAME_MAGIC, self.handle_audio_frame)
+        logger.info("VoiceModule handlers registered")
+
+    def _client_streams(self, session: Any) -> int:
+        return sum(1 for owner, _ in self.streams.values() if owner == session.id)
+
+    def _stream_for(self, session: Any, stream_id: Any) -> Optional[AudioStream]:
+        entry = self.streams.get(stream_id)
+        if entry is None or entry[0] != session.id:
+            return None
+        return entry[1]
+
+    async def handle_start(self, data: Dict[str, Any], session: Any) -> Dict[str, Any]:
+        """Open a voice stream for this client."""
+        sample_rate = data.get('sample_rate') or 16000
+        # 16000.0 compares equal to 16000 but would break the sample arithmetic
+        if not isinstance(sample_rate, int) or sample_rate not in SUPPORTED_SAMPLE_RATES:
+            return {'type': 'voice/error', 'message': f'Niet ondersteunde sample rate: {sample_rate}'}
+        if data.get('channels', 1) != 1 or data.get('format', 's16le') != 's16le':
+            return {'type': 'voice/error', 'message': 'Alleen mono s16le audio wordt ondersteund'}
+        if self._client_streams(session) >= MAX_STREAMS_PER_CLIENT:
+            return {'type': 'voice/error', 'message': 'Te veel open spraakstreams'}
+
+        async def send_quietly(message: Dict[str, Any]) -> None:
+            # Partial transcripts for a client that just left are of no use
+            with contextlib.suppress(websockets.exceptions.ConnectionClosed):
+                await session.send(message)
+
+        def send_transcript(event: Dict[str, Any]) -> None:
+            # Tracked with the session's tasks, so a disconnect cancels pending sends
+            task = asyncio.create_task(send_quietly({**event, 'stream_id': stream_id}))
+            session.tasks.add(task)
+            task.add_done_callback(session.tasks.discard)
+
+        stream_id = next(self._ids)
+        processor = self.processor_factory(self.transcriber, self.synthesizer)
+        processor.begin_utterance(sample_rate, on_transcript=send_transcript)
+        stream = AudioStream(
+            stream_id,
+            processor,
+            sample_rate=sample_rate,
+            buffer_seconds=self.buffer_seconds,
+            feed_samples=FEED_SAMPLES * sample_rate // 16000,
+            stall_timeout=self.stall_timeout,
+        )
+        self.streams[stream_id] = (session.id, stream)
+
+        def abort() -> None:
+            self._abort(stream_id)
+
+        self._abort_callbacks[stream_id] = abort
+        session.on_close(abort)
+        logger.info("Voice stream %s started at %s Hz", stream_id, sample_rate)
+        return {
+            'type': 'voice/started',
+            'stream_id': stream_id,
+            'sample_rate': sample_rate,
+            'format': 's16le',
+            'frame_magic': AUDIO_FRAME_MAGIC.decode('ascii'),
+            'header_bytes': AUDIO_HEADER.size,
+            'chunk_samples': CHUNK_SAMPLES * sample_rate // 16000,
+            'buffer_seconds': self.buffer_seconds,
+        }
+
+    async def handle_audio_frame(self, session: Any, frame: bytes) -> None:
+        """Append one binary audio frame to its stream."""
+        try:
+            stream_id, sequence, samples = parse_audio_frame(frame)
+        except ValueError as exc:
+            logger.warning("Dropping audio frame from %s: %s", session.id, exc)
+            return
+        stream = self._stream_for(session, stream_id)
+        if stream is None:
+            logger.warning("Audio frame for unknown voice stream %s", stream_id)
+            return
+        await stream.write(sequence, samples)
+
+    async def handle_stop(self, data: Dict[str, Any], session: Any) -> Dict[str, Any]:
+        """Close a voice stream and return the transcription of the utterance."""
+        stream_id = data.get('stream_id')
+        stream = self._stream_for(session, stream_id)
+        if stream is None:
+            return {'type': 'voice/error', 'message': 'Onbekende spraakstream'}
+
+        del self.streams[stream_id]
+        session.remove_close_callback(self._abort_callbacks.pop(stream_id))
+        await stream.close()
+        duration = stream.processor.buffered_seconds
+        try:
+            text = await stream.processor.finish_utterance()
+        except RuntimeError as exc:
+            logger.error("Transcription of voice stream %s failed: %s", stream_id, exc)
+            return {'type': 'voice/error', 'stream_id': stream_id, 'message': 'Spraakherkenning mislukt'}
+        logger.info("Voice stream %s stopped after %.1fs of audio", stream_id, duration)
+        return {
+            'type': 'voice/stopped',
+            'stream_id': stream_id,
+            'text': text,
+            'duration_seconds': round(duration, 3),
+            'stats': stream.stats,
+        }
+
+    async def handle_speak(self, data: Dict[str, Any], session: Any) -> Dict[str, Any]:
+        """Synthesize text and stream it to the client as binary speech frames."""
+        text = (data.get('text') or '').strip()
+        if not text:
+            return {'type': 'voice/error', 'message': 'Geen tekst opgegeven'}
+        if self.synthesizer is None:
+            return {'type': 'voice/error', 'message': 'Spraaksynthese is niet beschikbaar'}
+
+        job_id = next(self._ids)
+        cancelled = asyncio.Event()
+        self.speech_jobs[job_id] = (session.id, cancelled)
+        tag = {'job_id': job_id}
+        if data.get('request_id') is not None:
+            tag['request_id'] = data['request_id']
+        started = time.perf_counter()
+        first_audio_ms = None
+        sentences = cached = sequence = 0
+        processor = self.processor_factory(self.transcriber, self.synthesizer)
+        try:
+            await session.send({'type': 'voice/speech/start', **tag})
+            async with contextlib.aclosing(processor.stream_speech(text)) as chunks:
+                async for chunk in chunks:
+                    if cancelled.is_set():
+                        break
+                    samples = len(chunk.pcm) // 2
+                    await session.send({
+                        'type': 'voice/speech/sentence',
+                        **tag,
+                        'index': chunk.index,
+                        'text': chunk.text,
+                        'cached': chunk.cached,
+                        'sample_rate': chunk.sample_rate,
+                        'samples': samples,
+                    })
+                    if first_audio_ms is None:
+                        first_audio_ms = round((time.perf_counter() - started) * 1000, 1)
+                    step = SPEECH_FRAME_SAMPLES * 2
+                    for offset in range(0, len(chunk.pcm), step):
+                        await session.send_binary(pack_audio_frame(
+                            job_id, sequence, chunk.pcm[offset:offset + step], SPEECH_FRAME_MAGIC,
+                        ))
+                        sequence += 1
+                    sentences += 1
+                    cached += chunk.cached
+        except RuntimeError as exc:
+            logger.error("Speech job %s failed: %s", job_id, exc)
+            return {'type': 'voice/error', 'job_id': job_id, 'message': 'Spraaksynthese mislukt'}
+        finally:
+            self.speech_jobs.pop(job_id, None)
+
+        return {
+            'type': 'voice/speech/end',
+            'job_id': job_id,
+            'sentences': sentences,
+            'cached_sentences': cached,
+            'frames': sequence,
+            'cancelled': cancelled.is_set(),
+            'first_audio_ms': first_audio_ms,
+            'total_ms': round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    async def handle_speak_cancel(self, data: Dict[str, Any], session: Any) -> Dict[str, Any]:
+        """Stop a spoken reply; sentences not synthesized yet are skipped."""
+        entry = self.speech_jobs.get(data.get('job_id'))
+        if entry is None or entry[0] != session.id:
+            return {'type': 'voice/error', 'message': 'Onbekende spraakopdracht'}
+        entry[1].set()
+        return {'type': 'voice/speak/cancelled', 'job_id': data.get('job_id')}
+
+    async def handle_status(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Report whether streamed transcription and synthesis are available yet."""
+        workers = {}
+        for name, worker in (('transcription', self.transcriber), ('synthesis', self.synthesizer)):
+            workers[name] = {
+                'running': bool(worker and worker.is_alive),
+                'ready': bool(worker and worker.ready),
+                **(worker.ready_info if worker and worker.ready else {}),
+            }
+        if self.synthesizer is not None and self.synthesizer.cache is not None:
+            workers['synthesis']['cache'] = self.synthesizer.cache.stats()
+        return {
+            'type': 'voice/status',
+            'ready': all(worker['ready'] for worker in workers.values()),
+            'workers': workers,
+            'open_streams': len(self.streams),
+            'speech_jobs': len(self.speech_jobs),
+        }
+
+    def _abort(self, stream_id: int) -> None:
+        entry = self.streams.pop(stream_id, None)
+        self._abort_callbacks.pop(stream_id, None)
+        if entry is not None:
+            entry[1].cancel()
+            entry[1].processor.abort_utterance()
+            logger.info("Voice stream %s closed with its client", stream_id)
@@ -0,0 +1,47 @@
+"""Keyset pagination helpers shared by the data services.
+
+A cursor is the sort key of the last row on a page, encoded as an opaque
+URL-safe string. The next page continues with rows whose sort key comes
+after it, so fetching page N costs the same as fetching page 1 (unlike OFFSET).
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, List, Optional, Sequence
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def clamp_limit(limit: Any, default: int = DEFAULT_PAGE_SIZE) -> int:
+    """Coerce a requested page size into 1..MAX_PAGE_SIZE."""
+    try:
+        value = int(limit)
+    except (TypeError, ValueError):
+        value = default
+    return max(1, min(value, MAX_PAGE_SIZE))
+
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    """Encode a row's sort key as an opaque cursor."""
+    raw = json.dumps(list(key), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[List[Any]]:
+    """Decode a cursor back into a sort key of the expected length.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(key, list) or len(key) != size:
+        raise ValueError("Invalid cursor")
+    return key
@@ -0,0 +1,129 @@
+"""In-process LRU cache for read results, invalidated by write generations.
+
+Every write bumps the cache generation, which drops all entries at once. A
+result computed while a write was committing carries the old generation and
+is discarded instead of cached, so a stale read can never be stored.
+
+Cached values are shared between callers and must be treated as read-only.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+# List items serialized to estimate a list's size
+SIZE_SAMPLE_ITEMS = 3
+
+
+def _approx_size(value: Any, depth: int = 0) -> int:
+    """Estimate a result's memory footprint from its JSON length.
+
+    Serializing a whole result on every miss would double the cost of the
+    read being cached, so lists are sized from their first few items (query
+    rows share a shape) and only those, or small scalars, are serialized.
+    """
+    if isinstance(value, list):
+        if not value:
+            return 2
+        sample = value[:SIZE_SAMPLE_ITEMS]
+        return len(value) * sum(_approx_size(item, depth + 1) for item in sample) // len(sample)
+    if isinstance(value, dict) and depth == 0:
+        # Result envelopes, e.g. {"parts": [...], "next_cursor": ...}
+        return sum(len(str(key)) + 4 + _approx_size(item, depth + 1) for key, item in value.items())
+    try:
+        return len(json.dumps(value, default=str, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return 1024
+
+
+class ResultCache:
+    """Thread-safe LRU cache bounded by entry count and approximate bytes."""
+
+    def __init__(self, name: str, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024) -> None:
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.generation = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return (found, value) and mark the entry as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key: Hashable, value: Any, generation: int) -> bool:
+        """Store a value computed at the given generation.
+
+        Returns False (and stores nothing) if a write happened since, or if
+        the value alone is larger than the byte budget.
+        """
+        size = _approx_size(value)
+        with self._lock:
+            if generation != self.generation:
+                self.stale_puts += 1
+                return False
+            if size > self.max_bytes:
+                return False
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+            return True
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing and caching it on a miss."""
+        found, value = self.get(key)
+        if found:
+            return value
+        # Read the generation before computing, so a write that lands
+        # mid-computation makes this result uncacheable
+        generation = self.generation
+        value = compute()
+        self.put(key, value, generation)
+        return value
+
+    def invalidate(self) -> None:
+        """Drop every entry; call after each committed write."""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._bytes = 0
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "generation": self.generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale_puts": self.stale_puts,
+            }
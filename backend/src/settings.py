@@ -53,7 +53,12 @@ class Settings:
             "assistant": {
                 "name": "ATLAS",
                 "voice_enabled": False,
-                "language": "nl-NL"
+                "language": "nl-NL",
+                "llm_backend": "transformers",
+                "llm_model": "Qwen/Qwen2.5-0.5B-Instruct",
+                "llm_load_in_4bit": False,
+                "llm_max_new_tokens": 256,
+                "system_prompt": "Je bent ATLAS, een behulpzame assistent. Antwoord kort en in het Nederlands."
             },
             "ui": {
                 "theme": "dark",
@@ -62,6 +67,30 @@ class Settings:
             "system": {
                 "update_interval_ms": 2000,
                 "log_level": "INFO"
+            },
+            "hardware": {
+                "import_dir": "backend/data/imports"
+            },
+            "modules": {
+                "idle_unload_seconds": 0
+            },
+            "websocket": {
+                "compression": True,
+                "compression_min_bytes": 1024,
+                "compression_level": 6
+            },
+            "voice": {
+                "buffer_seconds": 10,
+                "stall_timeout_seconds": 2.0,
+                "stt_backend": "whisper",
+                "stt_model": "base",
+                "energy_threshold": 0.01,
+                "tts_backend": "kokoro",
+                "tts_lang_code": "a",
+                "tts_voice": "af_heart",
+                "tts_speed": 1.0,
+                "tts_cache_dir": "backend/data/tts_cache",
+                "tts_cache_mb": 64
             }
         }
 
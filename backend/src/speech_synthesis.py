@@ -0,0 +1,430 @@
+"""Streaming text-to-speech in a worker process, with an on-disk phrase cache.
+
+Text is split into sentences, which are synthesized one after another in a
+child process that keeps the TTS model loaded. Each sentence is handed to
+the caller as soon as it's ready, so the first sentence plays while the
+rest are still being synthesized.
+
+Short sentences (greetings, confirmations) are cached on disk as WAV files
+named by a hash of the engine settings and the normalized text, and evicted
+least-recently-used once the cache exceeds its size budget. A cached
+sentence doesn't touch the worker at all.
+
+Engine backends:
+
+- kokoro: imported and loaded only inside the worker
+- stub: deterministic tones (one per word), for tests and benchmarks
+"""
+
+import asyncio
+import hashlib
+import itertools
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from settings import get_settings
+from worker_process import WorkerProcess, create_engine
+
+logger = logging.getLogger(__name__)
+
+STUB_SAMPLE_RATE = 24000
+# Sentences longer than this are rarely repeated verbatim, so they're not cached
+MAX_CACHED_CHARS = 120
+# Sentences longer than this are split further at commas and semicolons
+MAX_SENTENCE_CHARS = 200
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|\n+")
+_CLAUSE_END = re.compile(r"(?<=[,;:])\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences, breaking very long ones at clause boundaries."""
+    sentences = []
+    for sentence in _SENTENCE_END.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= MAX_SENTENCE_CHARS:
+            sentences.append(sentence)
+            continue
+        current = ""
+        for clause in _CLAUSE_END.split(sentence):
+            if current and len(current) + len(clause) + 1 > MAX_SENTENCE_CHARS:
+                sentences.append(current)
+                current = clause
+            else:
+                current = f"{current} {clause}".strip()
+        if current:
+            sentences.append(current)
+    return sentences
+
+
+def _normalize(sentence: str) -> str:
+    return " ".join(sentence.split()).lower()
+
+
+class StubSynthesizer:
+    """Deterministic stand-in: one short tone per word, pitch derived from the word.
+
+    seconds_per_audio_second simulates synthesis cost.
+    """
+
+    name = "stub"
+    sample_rate = STUB_SAMPLE_RATE
+
+    def __init__(self, seconds_per_audio_second: float = 0.0) -> None:
+        self.seconds_per_audio_second = seconds_per_audio_second
+
+    def load(self) -> None:
+        pass
+
+    def synthesize(self, sentence: str) -> np.ndarray:
+        pieces = []
+        for word in sentence.split():
+            digest = hashlib.blake2b(word.lower().encode("utf-8"), digest_size=2).digest()
+            frequency = 150 + int.from_bytes(digest, "big") % 250
+            t = np.arange(int(self.sample_rate * min(0.06 * len(word), 0.5))) / self.sample_rate
+            pieces.append((np.sin(2 * np.pi * frequency * t) * 6000).astype(np.int16))
+            pieces.append(np.zeros(int(self.sample_rate * 0.05), dtype=np.int16))
+        audio = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.int16)
+        if self.seconds_per_audio_second:
+            time.sleep(len(audio) / self.sample_rate * self.seconds_per_audio_second)
+        return audio
+
+
+class KokoroSynthesizer:
+    """kokoro TTS, loaded once per worker process."""
+
+    name = "kokoro"
+    sample_rate = 24000
+
+    def __init__(self, lang_code: str = "a", voice: str = "af_heart", speed: float = 1.0) -> None:
+        self.lang_code = lang_code
+        self.voice = voice
+        self.speed = speed
+        self.pipeline = None
+
+    def load(self) -> None:
+        from kokoro import KPipeline  # heavy import (torch), kept out of the server process
+
+        self.pipeline = KPipeline(lang_code=self.lang_code)
+
+    def synthesize(self, sentence: str) -> np.ndarray:
+        pieces = [
+            np.asarray(audio, dtype=np.float32)
+            for _, _, audio in self.pipeline(sentence, voice=self.voice, speed=self.speed)
+            if audio is not None
+        ]
+        if not pieces:
+            return np.zeros(0, dtype=np.int16)
+        return (np.clip(np.concatenate(pieces), -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def create_synthesizer(backend: str, options: Dict[str, Any]) -> Any:
+    """Build and load the configured synthesizer ('kokoro', or 'stub' for tests and benchmarks)."""
+    return create_engine("speech synthesis", backend, {
+        "kokoro": lambda: KokoroSynthesizer(
+            lang_code=options.get("lang_code", "a"),
+            voice=options.get("voice", "af_heart"),
+            speed=options.get("speed", 1.0),
+        ),
+        "stub": lambda: StubSynthesizer(options.get("stub_seconds_per_audio_second", 0.0)),
+    })
+
+
+class PhraseCache:
+    """Content-addressed WAV files with a total size budget, evicted LRU.
+
+    Recency is kept in the files' modification times, so it survives
+    restarts; the index is rebuilt from the directory on first use.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._index: Optional[Dict[str, Tuple[int, float]]] = None  # key -> (bytes, last used)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(profile: str, sentence: str) -> str:
+        return hashlib.blake2b(f"{profile}\n{_normalize(sentence)}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.wav"
+
+    def _load_index(self) -> Dict[str, Tuple[int, float]]:
+        if self._index is None:
+            self._index = {}
+            for path in self.directory.glob("*/*.wav"):
+                stat = path.stat()
+                self._index[path.stem] = (stat.st_size, stat.st_mtime)
+            self._bytes = sum(size for size, _ in self._index.values())
+        return self._index
+
+    def get(self, key: str) -> Optional[Tuple[bytes, int]]:
+        """Return (pcm, sample_rate) for a cached phrase, or None."""
+        with self._lock:
+            index = self._load_index()
+            if key not in index:
+                self.misses += 1
+                return None
+        path = self._path(key)
+        try:
+            with wave.open(str(path), "rb") as wav:
+                pcm, rate = wav.readframes(wav.getnframes()), wav.getframerate()
+            now = time.time()
+            os.utime(path, (now, now))
+        except (OSError, EOFError, wave.Error):
+            with self._lock:
+                entry = index.pop(key, None)
+                if entry:
+                    self._bytes -= entry[0]
+                self.misses += 1
+            return None
+        with self._lock:
+            if key in index:
+                index[key] = (index[key][0], now)
+            self.hits += 1
+        return pcm, rate
+
+    def put(self, key: str, pcm: bytes, sample_rate: int) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so a reader never sees half a file
+        temporary = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with wave.open(str(temporary), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(pcm)
+        os.replace(temporary, path)
+        size = path.stat().st_size
+        with self._lock:
+            index = self._load_index()
+            previous = index.get(key)
+            self._bytes += size - (previous[0] if previous else 0)
+            index[key] = (size, time.time())
+            evict = []
+            if self._bytes > self.max_bytes:
+                for old_key, (old_size, _) in sorted(index.items(), key=lambda item: item[1][1]):
+                    if self._bytes <= self.max_bytes * 0.9 or old_key == key:
+                        break
+                    evict.append(old_key)
+                    self._bytes -= old_size
+                    del index[old_key]
+        for old_key in evict:
+            try:
+                self._path(old_key).unlink()
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            index = self._load_index()
+            return {
+                "entries": len(index),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+@dataclass
+class SpeechChunk:
+    """One synthesized sentence."""
+
+    index: int
+    text: str
+    pcm: bytes  # s16le mono
+    sample_rate: int
+    cached: bool
+
+
+def run_synthesis_worker(requests: Any, results: Any, backend: str, options: Dict[str, Any]) -> None:
+    """Worker process entry point.
+
+    Requests: ("speak", job_id, [(index, sentence), ...]), ("cancel", job_id).
+    Results: ("ready", info), ("audio", job_id, index, pcm, sample_rate),
+    ("error", job_id, index, message).
+    """
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    started = time.perf_counter()
+    synthesizer = create_synthesizer(backend, options)
+    synthesizer.synthesize("Hallo.")  # warm-up
+    results.put((
+        "ready",
+        {"backend": synthesizer.name, "sample_rate": synthesizer.sample_rate,
+         "load_seconds": round(time.perf_counter() - started, 3)},
+    ))
+
+    work: List[Tuple[int, int, str]] = []
+    cancelled = set()
+
+    def take(message: Any) -> bool:
+        if message is None:
+            return False
+        if message[0] == "speak":
+            work.extend((message[1], index, sentence) for index, sentence in message[2])
+        elif message[0] == "cancel":
+            cancelled.add(message[1])
+        return True
+
+    while True:
+        if not work and not take(requests.get()):
+            return
+        # Pick up cancellations and new jobs between sentences
+        while True:
+            try:
+                if not take(requests.get_nowait()):
+                    return
+            except queue.Empty:
+                break
+        if not work:
+            continue
+
+        job_id, index, sentence = work.pop(0)
+        if job_id in cancelled:
+            if not any(item[0] == job_id for item in work):
+                cancelled.discard(job_id)
+            continue
+        try:
+            audio = synthesizer.synthesize(sentence)
+            results.put(("audio", job_id, index, audio.tobytes(), synthesizer.sample_rate))
+        except Exception as exc:
+            logger.exception("Synthesis failed for job %s", job_id)
+            results.put(("error", job_id, index, str(exc)))
+
+
+class SynthesisWorker(WorkerProcess):
+    """Parent-side client of the synthesis worker, with the phrase cache."""
+
+    def __init__(self, backend: str, options: Dict[str, Any], cache: Optional[PhraseCache] = None) -> None:
+        super().__init__("tts-worker", run_synthesis_worker, (backend, options))
+        self.cache = cache
+        self.options = options
+        self._ids = itertools.count(1)
+        # job id -> sentence index -> future with (pcm, sample_rate)
+        self._jobs: Dict[int, Dict[int, asyncio.Future]] = {}
+
+    async def stream(self, text: str) -> AsyncIterator[SpeechChunk]:
+        """Synthesize text sentence by sentence, yielding each as soon as it's ready.
+
+        Closing the iterator early (e.g. the user interrupts) cancels the
+        sentences not synthesized yet.
+        """
+        sentences = split_sentences(text)
+        cached: Dict[int, Tuple[bytes, int]] = {}
+        keys: Dict[int, str] = {}
+        profile = self._cache_profile()
+        if profile is not None:
+            for index, sentence in enumerate(sentences):
+                if len(sentence) <= MAX_CACHED_CHARS:
+                    keys[index] = PhraseCache.key(profile, sentence)
+                    hit = await asyncio.to_thread(self.cache.get, keys[index])
+                    if hit is not None:
+                        cached[index] = hit
+
+        job_id = next(self._ids)
+        loop = asyncio.get_running_loop()
+        pending = {index: loop.create_future() for index in range(len(sentences)) if index not in cached}
+        if pending:
+            if not self.is_alive:
+                raise RuntimeError("Synthesis worker is not running")
+            self._jobs[job_id] = pending
+            self.send(("speak", job_id, [(index, sentences[index]) for index in sorted(pending)]))
+
+        try:
+            for index, sentence in enumerate(sentences):
+                if index in cached:
+                    pcm, sample_rate = cached[index]
+                    yield SpeechChunk(index, sentence, pcm, sample_rate, True)
+                    continue
+                pcm, sample_rate = await pending[index]
+                if index in keys:
+                    loop.run_in_executor(None, self._store, keys[index], pcm, sample_rate)
+                yield SpeechChunk(index, sentence, pcm, sample_rate, False)
+        finally:
+            if self._jobs.pop(job_id, None) is not None and any(not f.done() for f in pending.values()):
+                self.send(("cancel", job_id))
+
+    def _cache_profile(self) -> Optional[str]:
+        """Everything that changes the audio, for cache keys; None disables the cache.
+
+        Uses the engine the worker reported loading, so the cache is only
+        used once the worker is ready.
+        """
+        if self.cache is None or not self.ready:
+            return None
+        engine = self.ready_info.get("backend")
+        return "|".join([engine, *(str(self.options.get(name, "")) for name in ("lang_code", "voice", "speed"))])
+
+    def _store(self, key: str, pcm: bytes, sample_rate: int) -> None:
+        try:
+            self.cache.put(key, pcm, sample_rate)
+        except (OSError, wave.Error) as exc:
+            logger.warning("Could not cache phrase: %s", exc)
+
+    async def synthesize(self, text: str) -> Tuple[bytes, int]:
+        """Synthesize the whole text and return (pcm, sample_rate)."""
+        pieces, sample_rate = [], STUB_SAMPLE_RATE
+        async for chunk in self.stream(text):
+            pieces.append(chunk.pcm)
+            sample_rate = chunk.sample_rate
+        return b"".join(pieces), sample_rate
+
+    def handle_result(self, message: Tuple[Any, ...]) -> None:
+        kind = message[0]
+        if kind not in ("audio", "error"):
+            return
+        future = self._jobs.get(message[1], {}).get(message[2])
+        if future is None or future.done():
+            return
+        if kind == "audio":
+            future.set_result((message[3], message[4]))
+        else:
+            future.set_exception(RuntimeError(message[3]))
+
+    def handle_exit(self, exitcode: Optional[int]) -> None:
+        for futures in self._jobs.values():
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("Synthesis worker stopped"))
+        self._jobs.clear()
+
+
+_synthesis_worker: Optional[SynthesisWorker] = None
+
+
+def get_synthesis_worker() -> SynthesisWorker:
+    """Get the shared synthesis worker (started by the caller with start())."""
+    global _synthesis_worker
+    if _synthesis_worker is None:
+        settings = get_settings()
+        _synthesis_worker = SynthesisWorker(
+            settings.get("voice.tts_backend", "kokoro"),
+            {
+                "lang_code": settings.get("voice.tts_lang_code", "a"),
+                "voice": settings.get("voice.tts_voice", "af_heart"),
+                "speed": settings.get("voice.tts_speed", 1.0),
+            },
+            PhraseCache(
+                settings.get("voice.tts_cache_dir", "backend/data/tts_cache"),
+                int(settings.get("voice.tts_cache_mb", 64)) * 1024 * 1024,
+            ),
+        )
+    return _synthesis_worker
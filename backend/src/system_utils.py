@@ -7,17 +7,112 @@ Provides helpers for:
 - File operations
 """
 
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional
+
 import psutil
-from typing import Dict, Any
+
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Lower bound for the sampling cadence, so a bad setting can't spin the sampler
+MIN_SAMPLE_INTERVAL_MS = 250
+
+
+class SystemMonitor:
+    """Samples system statistics on a background thread.
+
+    psutil calls (CPU percentage, disk usage, process list) block, so they
+    never run on the websocket event loop. Readers get the most recent
+    snapshot, which is replaced as a whole on every tick and must be treated
+    as read-only.
+    """
+
+    def __init__(self, interval_ms: Optional[int] = None) -> None:
+        """Initialize the monitor.
+
+        Args:
+            interval_ms: Sampling cadence; defaults to `system.update_interval_ms`
+        """
+        if interval_ms is None:
+            interval_ms = get_settings().get('system.update_interval_ms', 2000)
+        self.interval = max(int(interval_ms), MIN_SAMPLE_INTERVAL_MS) / 1000
+        self._snapshot: Dict[str, Any] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Take a first sample and start the background sampler thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        # First non-blocking cpu_percent call only primes psutil's counters
+        psutil.cpu_percent(interval=None)
+        self._snapshot = self._sample()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='system-monitor', daemon=True)
+        self._thread.start()
+        logger.info(f"System monitor sampling every {self.interval:.2f}s")
+
+    def stop(self) -> None:
+        """Stop the sampler thread."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the latest sample without touching psutil."""
+        if not self._snapshot:
+            self._snapshot = self._sample()
+        return self._snapshot
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self._snapshot = self._sample()
+            except Exception as e:
+                logger.error(f"System sampling failed: {e}")
+
+    def _sample(self) -> Dict[str, Any]:
+        mem = psutil.virtual_memory()
+        return {
+            # Non-blocking: percentage since the previous sample
+            'cpu_percent': psutil.cpu_percent(interval=None),
+            'memory': {
+                'percent': mem.percent,
+                'available_gb': mem.available / (1024**3),
+                'used_gb': mem.used / (1024**3),
+                'total_gb': mem.total / (1024**3),
+            },
+            'disk_percent': psutil.disk_usage('/').percent,
+            'processes': len(psutil.pids()),
+            'timestamp': datetime.now().isoformat(),
+        }
+
+
+# Global monitor instance
+_monitor_instance: Optional[SystemMonitor] = None
+
+
+def get_system_monitor() -> SystemMonitor:
+    """Get or create the global system monitor."""
+    global _monitor_instance
+    if _monitor_instance is None:
+        _monitor_instance = SystemMonitor()
+    return _monitor_instance
 
 
 def get_system_stats() -> Dict[str, Any]:
-    """Gather current system statistics."""
+    """Gather current system statistics from the latest background sample."""
+    snapshot = get_system_monitor().snapshot()
     return {
-        'cpu_percent': psutil.cpu_percent(interval=1),
-        'memory_percent': psutil.virtual_memory().percent,
-        'disk_percent': psutil.disk_usage('/').percent,
-        'processes': len(psutil.pids()),
+        'cpu_percent': snapshot['cpu_percent'],
+        'memory_percent': snapshot['memory']['percent'],
+        'disk_percent': snapshot['disk_percent'],
+        'processes': snapshot['processes'],
     }
 
 
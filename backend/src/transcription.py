@@ -0,0 +1,388 @@
+"""Streaming speech-to-text in a worker process.
+
+Audio from voice streams is forwarded to a child process that keeps the
+recognizer loaded. As audio arrives the child decodes the current speech
+segment in overlapping windows and reports partial transcripts; when the
+speaker pauses (or the stream ends) the whole segment is decoded once more
+and reported as final:
+
+    {"type": "voice/transcript", "stream_id": 3, "segment": 0, "final": false,
+     "text": "zet de", "audio_seconds": 1.2, "decode_ms": 41.0}
+
+Recognizer backends:
+
+- whisper: openai-whisper, imported and loaded only inside the worker
+- stub: a deterministic stand-in that turns voiced regions into words, so
+  latency can be measured on CPU without downloading a model
+"""
+
+import asyncio
+import itertools
+import logging
+import queue
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from settings import get_settings
+from worker_process import WorkerProcess, create_engine
+
+logger = logging.getLogger(__name__)
+
+MODEL_SAMPLE_RATE = 16000
+# Decode a partial after this much new audio
+STEP_SECONDS = 0.5
+# Partials decode at most this much of the segment's tail (overlapping windows)
+WINDOW_SECONDS = 6.0
+# Trailing silence that ends a segment
+SILENCE_SECONDS = 0.6
+# Segments are cut here even without a pause (whisper decodes 30 s at most)
+MAX_SEGMENT_SECONDS = 25.0
+# RMS level (full scale = 1.0) above which a 30 ms frame counts as speech
+ENERGY_THRESHOLD = 0.01
+VAD_FRAME_SECONDS = 0.03
+
+STUB_WORDS = (
+    "zet", "de", "led", "aan", "uit", "lees", "sensor", "temperatuur", "open",
+    "notitie", "nieuwe", "schakeling", "arduino", "pin", "twee", "drie",
+)
+
+
+def to_model_audio(pcm: bytes, sample_rate: int) -> np.ndarray:
+    """Convert s16le mono PCM to float32 at the model sample rate."""
+    audio = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+    if sample_rate != MODEL_SAMPLE_RATE and len(audio):
+        duration = len(audio) / sample_rate
+        target = np.arange(int(duration * MODEL_SAMPLE_RATE)) / MODEL_SAMPLE_RATE
+        audio = np.interp(target, np.arange(len(audio)) / sample_rate, audio).astype(np.float32)
+    return audio
+
+
+def _voiced_frames(audio: np.ndarray, threshold: float = ENERGY_THRESHOLD) -> np.ndarray:
+    """Per-frame speech flags from RMS energy."""
+    frame = int(VAD_FRAME_SECONDS * MODEL_SAMPLE_RATE)
+    count = len(audio) // frame
+    if not count:
+        return np.zeros(0, dtype=bool)
+    frames = audio[:count * frame].reshape(count, frame)
+    return np.sqrt(np.mean(frames * frames, axis=1)) > threshold
+
+
+class StubRecognizer:
+    """Deterministic stand-in recognizer.
+
+    Each voiced region becomes one word picked by its length, so the same
+    audio always gives the same text. seconds_per_audio_second simulates
+    decode cost (e.g. 0.1 for a model running at 10x real time).
+    """
+
+    name = "stub"
+
+    def __init__(self, seconds_per_audio_second: float = 0.0) -> None:
+        self.seconds_per_audio_second = seconds_per_audio_second
+
+    def load(self) -> None:
+        pass
+
+    def transcribe(self, audio: np.ndarray) -> str:
+        if self.seconds_per_audio_second:
+            time.sleep(len(audio) / MODEL_SAMPLE_RATE * self.seconds_per_audio_second)
+        words = []
+        run = 0
+        for voiced in itertools.chain(_voiced_frames(audio), [False]):
+            if voiced:
+                run += 1
+            elif run:
+                if run >= 3:  # ignore clicks shorter than ~90 ms
+                    words.append(STUB_WORDS[run % len(STUB_WORDS)])
+                run = 0
+        return " ".join(words)
+
+
+class WhisperRecognizer:
+    """openai-whisper, loaded once per worker process."""
+
+    name = "whisper"
+
+    def __init__(self, model: str = "base", language: Optional[str] = None, device: Optional[str] = None) -> None:
+        self.model_name = model
+        self.language = language
+        self.device = device
+        self.model = None
+
+    def load(self) -> None:
+        import whisper  # heavy import (torch), kept out of the server process
+
+        self.model = whisper.load_model(self.model_name, device=self.device)
+
+    def transcribe(self, audio: np.ndarray) -> str:
+        result = self.model.transcribe(
+            audio,
+            language=self.language,
+            fp16=False,
+            condition_on_previous_text=False,
+            without_timestamps=True,
+        )
+        return result["text"].strip()
+
+
+def create_recognizer(backend: str, options: Dict[str, Any]) -> Any:
+    """Build and load the configured recognizer ('whisper', or 'stub' for tests and benchmarks)."""
+    return create_engine("speech recognition", backend, {
+        "whisper": lambda: WhisperRecognizer(
+            model=options.get("model", "base"),
+            language=options.get("language"),
+            device=options.get("device"),
+        ),
+        "stub": lambda: StubRecognizer(options.get("stub_seconds_per_audio_second", 0.0)),
+    })
+
+
+class StreamingDecoder:
+    """Segments one stream's audio at pauses and decodes it incrementally."""
+
+    def __init__(self, recognizer: Any, sample_rate: int, energy_threshold: float = ENERGY_THRESHOLD) -> None:
+        self.recognizer = recognizer
+        self.sample_rate = sample_rate
+        self.energy_threshold = energy_threshold
+        self._audio = np.zeros(int(MAX_SEGMENT_SECONDS * MODEL_SAMPLE_RATE) + MODEL_SAMPLE_RATE, dtype=np.float32)
+        self._length = 0
+        self._decoded_at = 0
+        self._speech_end: Optional[int] = None  # sample after the last voiced frame
+        self._last_partial = ""
+        self.segment = 0
+        self.offset_seconds = 0.0  # stream time at the start of the segment
+        self.finals: List[str] = []
+
+    def append(self, pcm: bytes) -> List[Dict[str, Any]]:
+        """Add audio and return the transcript events it produces."""
+        audio = to_model_audio(pcm, self.sample_rate)
+        events = []
+        # Look for pauses in small slices, so a backlog holding several
+        # utterances is still cut into segments, but decode only one partial
+        # for the whole batch
+        piece = int(SILENCE_SECONDS / 2 * MODEL_SAMPLE_RATE)
+        while len(audio):
+            room = min(piece, len(self._audio) - self._length)
+            chunk, audio = audio[:room], audio[room:]
+            self._audio[self._length:self._length + len(chunk)] = chunk
+            self._track_speech(self._length, self._length + len(chunk))
+            self._length += len(chunk)
+            events.extend(self._poll(partial=not len(audio)))
+        return events
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Finalize whatever is left at the end of the stream."""
+        if self._speech_end is None:
+            return []
+        return [self._finalize(self._length)]
+
+    @property
+    def text(self) -> str:
+        return " ".join(text for text in self.finals if text)
+
+    def _track_speech(self, start: int, end: int) -> None:
+        frame = int(VAD_FRAME_SECONDS * MODEL_SAMPLE_RATE)
+        first = start - start % frame
+        voiced = _voiced_frames(self._audio[first:end], self.energy_threshold)
+        hits = np.flatnonzero(voiced)
+        if len(hits):
+            self._speech_end = first + (int(hits[-1]) + 1) * frame
+
+    def _poll(self, partial: bool = True) -> List[Dict[str, Any]]:
+        if self._speech_end is None:
+            # Nothing said yet; keep only the last moment of silence
+            keep = int(SILENCE_SECONDS * MODEL_SAMPLE_RATE)
+            if self._length > 2 * keep:
+                self._audio[:keep] = self._audio[self._length - keep:self._length]
+                self.offset_seconds += (self._length - keep) / MODEL_SAMPLE_RATE
+                self._length = keep
+                self._decoded_at = 0
+            return []
+        if self._length - self._speech_end >= SILENCE_SECONDS * MODEL_SAMPLE_RATE:
+            return [self._finalize(self._speech_end)]
+        if self._length >= MAX_SEGMENT_SECONDS * MODEL_SAMPLE_RATE:
+            return [self._finalize(self._length)]
+        if not partial or self._length - self._decoded_at < STEP_SECONDS * MODEL_SAMPLE_RATE:
+            return []
+
+        self._decoded_at = self._length
+        window = self._audio[max(0, self._length - int(WINDOW_SECONDS * MODEL_SAMPLE_RATE)):self._length]
+        started = time.perf_counter()
+        text = self.recognizer.transcribe(window)
+        if not text or text == self._last_partial:
+            return []
+        self._last_partial = text
+        return [self._event(text, False, started)]
+
+    def _finalize(self, end: int) -> Dict[str, Any]:
+        started = time.perf_counter()
+        text = self.recognizer.transcribe(self._audio[:end])
+        event = self._event(text, True, started, end)
+        self.finals.append(text)
+
+        # Audio after the cut (the trailing pause) starts the next segment
+        rest = self._length - end
+        self._audio[:rest] = self._audio[end:self._length]
+        self.offset_seconds += end / MODEL_SAMPLE_RATE
+        self._length = rest
+        self._decoded_at = 0
+        self._speech_end = None
+        self._last_partial = ""
+        self.segment += 1
+        return event
+
+    def _event(self, text: str, final: bool, started: float, end: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            "segment": self.segment,
+            "final": final,
+            "text": text,
+            "audio_seconds": round(self.offset_seconds + (self._length if end is None else end) / MODEL_SAMPLE_RATE, 3),
+            "decode_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+
+def run_transcription_worker(requests: Any, results: Any, backend: str, options: Dict[str, Any]) -> None:
+    """Worker process entry point.
+
+    Requests: ("open", stream_id, sample_rate), ("audio", stream_id, pcm),
+    ("close", stream_id). Results: ("ready", info), ("transcript", stream_id,
+    event), ("closed", stream_id, text), ("error", stream_id, message).
+    """
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    started = time.perf_counter()
+    recognizer = create_recognizer(backend, options)
+    # Warm-up decode, so the first real request doesn't pay for lazy initialization
+    recognizer.transcribe(np.zeros(MODEL_SAMPLE_RATE, dtype=np.float32))
+    results.put(("ready", {"backend": recognizer.name, "load_seconds": round(time.perf_counter() - started, 3)}))
+
+    decoders: Dict[int, StreamingDecoder] = {}
+    threshold = options.get("energy_threshold", ENERGY_THRESHOLD)
+    while True:
+        batch = [requests.get()]
+        # Take everything already queued, so a backlog is decoded in one go
+        # instead of once per chunk
+        while True:
+            try:
+                batch.append(requests.get_nowait())
+            except queue.Empty:
+                break
+
+        pending: Dict[int, List[bytes]] = {}
+        for message in batch:
+            if message is None:
+                return
+            kind, stream_id = message[0], message[1]
+            try:
+                if kind == "open":
+                    decoders[stream_id] = StreamingDecoder(recognizer, message[2], threshold)
+                elif kind == "audio":
+                    pending.setdefault(stream_id, []).append(message[2])
+                elif kind == "close":
+                    decoder = decoders.pop(stream_id, None)
+                    if decoder is None:
+                        results.put(("closed", stream_id, ""))
+                        continue
+                    events = decoder.append(b"".join(pending.pop(stream_id, [])))
+                    for event in events + decoder.flush():
+                        results.put(("transcript", stream_id, event))
+                    results.put(("closed", stream_id, decoder.text))
+            except Exception as exc:
+                logger.exception("Transcription failed for stream %s", stream_id)
+                results.put(("error", stream_id, str(exc)))
+
+        for stream_id, chunks in pending.items():
+            decoder = decoders.get(stream_id)
+            if decoder is None:
+                continue
+            try:
+                for event in decoder.append(b"".join(chunks)):
+                    results.put(("transcript", stream_id, event))
+            except Exception as exc:
+                logger.exception("Transcription failed for stream %s", stream_id)
+                results.put(("error", stream_id, str(exc)))
+
+
+class TranscriptionWorker(WorkerProcess):
+    """Parent-side client of the transcription worker process."""
+
+    def __init__(self, backend: str, options: Dict[str, Any]) -> None:
+        super().__init__("stt-worker", run_transcription_worker, (backend, options))
+        self._ids = itertools.count(1)
+        # stream id -> (event callback, future resolved with the final text)
+        self._streams: Dict[int, Tuple[Optional[Callable[[Dict[str, Any]], Any]], asyncio.Future]] = {}
+
+    def open_stream(self, sample_rate: int, on_event: Optional[Callable[[Dict[str, Any]], Any]] = None) -> int:
+        """Start transcribing a new stream; on_event gets each transcript event."""
+        stream_id = next(self._ids)
+        self._streams[stream_id] = (on_event, asyncio.get_running_loop().create_future())
+        self.send(("open", stream_id, sample_rate))
+        return stream_id
+
+    def feed(self, stream_id: int, samples: np.ndarray) -> None:
+        """Send int16 samples (e.g. a ring buffer view, copied here)."""
+        self.send(("audio", stream_id, samples.tobytes()))
+
+    async def close_stream(self, stream_id: int) -> str:
+        """Finish a stream and return the text of all its final segments."""
+        entry = self._streams.get(stream_id)
+        if entry is None:
+            return ""
+        self.send(("close", stream_id))
+        try:
+            return await entry[1]
+        finally:
+            self._streams.pop(stream_id, None)
+
+    def abort_stream(self, stream_id: int) -> None:
+        """Drop a stream without waiting for its transcript."""
+        if self._streams.pop(stream_id, None) is not None:
+            self.send(("close", stream_id))
+
+    async def transcribe(self, pcm: bytes, sample_rate: int = MODEL_SAMPLE_RATE) -> str:
+        """Transcribe a complete utterance of s16le mono PCM."""
+        stream_id = self.open_stream(sample_rate)
+        self.send(("audio", stream_id, pcm))
+        return await self.close_stream(stream_id)
+
+    def handle_result(self, message: Tuple[Any, ...]) -> None:
+        kind = message[0]
+        if kind == "ready":
+            return
+        entry = self._streams.get(message[1])
+        if entry is None:
+            return
+        on_event, done = entry
+        if kind == "transcript" and on_event is not None:
+            on_event({"type": "voice/transcript", "stream_id": message[1], **message[2]})
+        elif kind == "closed" and not done.done():
+            done.set_result(message[2])
+        elif kind == "error" and not done.done():
+            done.set_exception(RuntimeError(message[2]))
+
+    def handle_exit(self, exitcode: Optional[int]) -> None:
+        for _, done in self._streams.values():
+            if not done.done():
+                done.set_exception(RuntimeError("Transcription worker stopped"))
+        self._streams.clear()
+
+
+_transcription_worker: Optional[TranscriptionWorker] = None
+
+
+def get_transcription_worker() -> TranscriptionWorker:
+    """Get the shared transcription worker (started by the caller with start())."""
+    global _transcription_worker
+    if _transcription_worker is None:
+        settings = get_settings()
+        language = settings.get("assistant.language", "nl-NL")
+        _transcription_worker = TranscriptionWorker(
+            settings.get("voice.stt_backend", "whisper"),
+            {
+                "model": settings.get("voice.stt_model", "base"),
+                "language": language.split("-")[0] if language else None,
+                "energy_threshold": settings.get("voice.energy_threshold", ENERGY_THRESHOLD),
+            },
+        )
+    return _transcription_worker
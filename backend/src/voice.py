@@ -1,32 +1,145 @@
 """
 Voice handling module for speech recognition and synthesis
 
-TODO: Integrate with:
-- Whisper (speech-to-text)
-- Text-to-speech engine
+Speech recognition runs in the transcription worker (see transcription.py),
+speech synthesis in the synthesis worker (see speech_synthesis.py).
 """
 
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+import numpy as np
+
+from settings import get_settings
+from speech_synthesis import SpeechChunk, create_synthesizer
+from transcription import create_recognizer, to_model_audio
+
+# Initial utterance buffer; grows by doubling for longer utterances
+INITIAL_UTTERANCE_SECONDS = 10
+
+_local_recognizer = None
+_local_synthesizer = None
+
+
 class VoiceProcessor:
-    """Handles voice input and output."""
-    
-    def __init__(self):
+    """Handles voice input and output.
+
+    With a running transcription worker (transcription.TranscriptionWorker)
+    streamed audio is transcribed while it arrives, and partial/final
+    transcripts are passed to the on_transcript callback. Without one, the
+    utterance is collected here and transcribed in-process at the end.
+    """
+
+    def __init__(self, transcriber: Optional[Any] = None, synthesizer: Optional[Any] = None):
         self.is_listening = False
-    
+        self.sample_rate = 16000
+        self.transcriber = transcriber
+        self.synthesizer = synthesizer
+        self._stream_id: Optional[int] = None
+        self._utterance = np.zeros(0, dtype=np.int16)
+        self._length = 0
+
     def start_listening(self):
         """Start microphone listening."""
         self.is_listening = True
         # TODO: Implement microphone input
-    
+
     def stop_listening(self):
         """Stop microphone listening."""
         self.is_listening = False
-    
+
+    def begin_utterance(
+        self,
+        sample_rate: int = 16000,
+        on_transcript: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    ) -> None:
+        """Start a new utterance of streamed audio (int16 mono PCM)."""
+        self.sample_rate = sample_rate
+        self._length = 0
+        self.is_listening = True
+        if self.transcriber is not None and self.transcriber.is_alive:
+            self._stream_id = self.transcriber.open_stream(sample_rate, on_transcript)
+            return
+        self._stream_id = None
+        if len(self._utterance) < sample_rate * INITIAL_UTTERANCE_SECONDS:
+            self._utterance = np.zeros(sample_rate * INITIAL_UTTERANCE_SECONDS, dtype=np.int16)
+
+    def feed_audio(self, samples: np.ndarray) -> None:
+        """Append a chunk of the current utterance.
+
+        The chunk may be a view on a shared buffer, so it is copied here and
+        not kept.
+        """
+        if self._stream_id is not None:
+            self.transcriber.feed(self._stream_id, samples)
+            self._length += len(samples)
+            return
+        end = self._length + len(samples)
+        if end > len(self._utterance):
+            grown = np.zeros(max(end, 2 * len(self._utterance)), dtype=np.int16)
+            grown[:self._length] = self._utterance[:self._length]
+            self._utterance = grown
+        self._utterance[self._length:end] = samples
+        self._length = end
+
+    async def finish_utterance(self) -> str:
+        """Finish the current utterance and return its transcription."""
+        self.is_listening = False
+        if self._stream_id is not None:
+            stream_id, self._stream_id = self._stream_id, None
+            return await self.transcriber.close_stream(stream_id)
+        audio = self._utterance[:self._length].tobytes()
+        self._length = 0
+        return await asyncio.to_thread(self.transcribe_audio, audio)
+
+    def abort_utterance(self) -> None:
+        """Drop the current utterance without transcribing it."""
+        self.is_listening = False
+        self._length = 0
+        if self._stream_id is not None:
+            self.transcriber.abort_stream(self._stream_id)
+            self._stream_id = None
+
+    @property
+    def buffered_seconds(self) -> float:
+        return self._length / self.sample_rate
+
     def transcribe_audio(self, audio_data: bytes) -> str:
-        """Convert audio to text."""
-        # TODO: Use Whisper or similar
-        return "Transcribed text"
-    
+        """Convert 16-bit mono PCM to text in this process (blocking).
+
+        The server uses the transcription worker instead; this is for
+        scripts and for running without the worker.
+        """
+        global _local_recognizer
+        if _local_recognizer is None:
+            settings = get_settings()
+            _local_recognizer = create_recognizer(
+                settings.get('voice.stt_backend', 'whisper'),
+                {'model': settings.get('voice.stt_model', 'base')},
+            )
+        return _local_recognizer.transcribe(to_model_audio(audio_data, self.sample_rate))
+
+    async def stream_speech(self, text: str) -> AsyncIterator[SpeechChunk]:
+        """Synthesize text in the synthesis worker, one sentence at a time.
+
+        Each SpeechChunk is yielded as soon as it's ready, while the worker
+        continues with the next sentence.
+        """
+        async for chunk in self.synthesizer.stream(text):
+            yield chunk
+
     def synthesize_speech(self, text: str) -> bytes:
-        """Convert text to audio."""
-        # TODO: Use TTS engine
-        return b"Audio bytes"
+        """Convert text to 16-bit mono PCM in this process (blocking).
+
+        The server streams speech through stream_speech() instead; this is
+        for scripts and for running without the worker.
+        """
+        global _local_synthesizer
+        if _local_synthesizer is None:
+            settings = get_settings()
+            _local_synthesizer = create_synthesizer(settings.get('voice.tts_backend', 'kokoro'), {
+                'lang_code': settings.get('voice.tts_lang_code', 'a'),
+                'voice': settings.get('voice.tts_voice', 'af_heart'),
+                'speed': settings.get('voice.tts_speed', 1.0),
+            })
+        return _local_synthesizer.synthesize(text).tobytes()
@@ -3,81 +3,403 @@ WebSocket server for communication between frontend and backend
 """
 
 import asyncio
-import json
+import contextlib
 import logging
-from typing import Callable, Dict, Any, Set
+from typing import Callable, Dict, Any, Iterable, List, Optional, Set
 
 import websockets
 from websockets.server import WebSocketServerProtocol
 
+from message_encoding import ENCODER_NAME, available_subprotocols, codec_for, encode_response, select_subprotocol
+from ws_compression import DEFAULT_LEVEL, DEFAULT_MIN_BYTES, server_extensions
+
 logger = logging.getLogger(__name__)
 
 
+class ClientSession:
+    """Dispatch state for a single connected client."""
+
+    def __init__(self, websocket: WebSocketServerProtocol, max_in_flight: int):
+        self.websocket = websocket
+        self.id = id(websocket)
+        # Wire format negotiated through the subprotocol (JSON unless the client opted in)
+        self.codec = codec_for(websocket.subprotocol)
+        # Bounds the number of handlers running for this client at once
+        self.slots = asyncio.Semaphore(max_in_flight)
+        # Message type -> lock, for types that must run in arrival order
+        self.ordering_locks: Dict[str, asyncio.Lock] = {}
+        self.tasks: Set[asyncio.Task] = set()
+        # Called when the client disconnects, e.g. to release a voice stream
+        self.close_callbacks: List[Callable[[], Any]] = []
+
+    async def send(self, message: Any) -> None:
+        """Send a message dict or EncodedMessage in this client's wire format."""
+        await self.websocket.send(encode_response(message, codec=self.codec))
+
+    async def send_binary(self, frame: bytes) -> None:
+        """Send a raw binary frame (e.g. audio), bypassing the message codec."""
+        await self.websocket.send(frame)
+
+    def on_close(self, callback: Callable[[], Any]) -> None:
+        """Run callback (sync, or returning an awaitable) when the client disconnects."""
+        self.close_callbacks.append(callback)
+
+    def remove_close_callback(self, callback: Callable[[], Any]) -> None:
+        """Forget a callback added with on_close(), e.g. once the resource it releases is gone."""
+        with contextlib.suppress(ValueError):
+            self.close_callbacks.remove(callback)
+
+
+def _subprotocol_selector() -> Callable:
+    """select_subprotocol for websockets.serve that never rejects a client.
+
+    Without it, websockets 14+ refuses clients that offer no subprotocol
+    (the frontend's plain new WebSocket(url)) instead of falling back to JSON.
+    The callback's arguments differ between the legacy server (offered,
+    supported) and the asyncio server of websockets 14+ (connection, offered).
+    """
+    if int(websockets.__version__.split(".")[0]) >= 14:
+        return lambda connection, offered: select_subprotocol(offered)
+    return lambda offered, supported: select_subprotocol(offered)
+
+
 class WebSocketServer:
-    """Handles WebSocket connections with frontend."""
+    """Handles WebSocket connections with frontend.
+
+    Incoming messages are dispatched as concurrent tasks, bounded per client
+    and globally, so a slow handler doesn't stall the client's other requests.
+    A message may carry a 'request_id', which is echoed on its response so the
+    frontend can match replies that arrive out of order. Message types
+    registered with ordered=True still run one at a time, in arrival order.
+
+    Handlers return a message dict, a message_encoding.EncodedMessage (large
+    values encoded once and reused), or an async iterator of either. Handlers
+    registered with with_client=True also receive the ClientSession, to push
+    events to that client outside the request/response cycle.
+
+    Binary frames starting with a registered 4-byte magic (e.g. streamed
+    audio) bypass message decoding and go to that magic's binary handler,
+    awaited before the next frame is read so a slow consumer pushes back on
+    the sender.
+
+    Namespaces registered with register_namespace() (e.g. 'notes/') get their
+    handlers loaded on the first message in them. Messages of a type without
+    a handler go to the fallback handler, if one is set (e.g. to report that
+    the component serving them is still loading).
+
+    Clients choose their wire format on connect through the websocket
+    subprotocol: 'atlas.json' (default) or 'atlas.msgpack' for MessagePack
+    binary frames. permessage-deflate is offered for messages of at least
+    compression_min_bytes.
+    """
     
-    def __init__(self, host: str = 'localhost', port: int = 8765):
+    def __init__(
+        self,
+        host: str = 'localhost',
+        port: int = 8765,
+        max_concurrent_per_client: int = 8,
+        max_concurrent_total: int = 32,
+        compression: bool = True,
+        compression_min_bytes: int = DEFAULT_MIN_BYTES,
+        compression_level: int = DEFAULT_LEVEL,
+    ):
         self.host = host
         self.port = port
         self.logger = logger
         self.clients: Set[WebSocketServerProtocol] = set()
         self.message_handlers: Dict[str, Callable] = {}
+        self.ordered_types: Set[str] = set()
+        self.client_handlers: Set[str] = set()
+        # 4-byte frame magic -> async handler(session, frame)
+        self.binary_handlers: Dict[bytes, Callable] = {}
+        # Topic name -> sockets subscribed to it (e.g. 'system/metrics')
+        self.subscriptions: Dict[str, Set[WebSocketServerProtocol]] = {}
+        # Message type prefix -> async loader registering that namespace's handlers
+        self.namespaces: Dict[str, Callable] = {}
+        self._namespace_locks: Dict[str, asyncio.Lock] = {}
+        # Called with the message for types without a handler (see set_fallback_handler)
+        self.fallback_handler: Optional[Callable] = None
+        # Set once the server accepts connections
+        self.listening = asyncio.Event()
+        # max_concurrent_per_client=1 restores strictly serial handling
+        self.max_concurrent_per_client = max(1, max_concurrent_per_client)
+        self._global_slots = asyncio.Semaphore(max(1, max_concurrent_total))
+        self.compression = compression
+        self.compression_min_bytes = compression_min_bytes
+        self.compression_level = compression_level
     
-    def register_handler(self, message_type: str, handler: Callable) -> None:
-        """Register a handler for a message type."""
+    def register_handler(
+        self,
+        message_type: str,
+        handler: Callable,
+        ordered: bool = False,
+        with_client: bool = False,
+    ) -> None:
+        """Register a handler for a message type.
+
+        Args:
+            message_type: Message type the handler responds to
+            handler: Async callable taking the message dict
+            ordered: Run messages of this type one at a time per client, in arrival order
+            with_client: Also pass the sender's ClientSession as second argument
+        """
         self.message_handlers[message_type] = handler
+        if ordered:
+            self.ordered_types.add(message_type)
+        else:
+            self.ordered_types.discard(message_type)
+        if with_client:
+            self.client_handlers.add(message_type)
+        else:
+            self.client_handlers.discard(message_type)
         self.logger.info(f"Registered handler for message type: {message_type}")
+
+    def unregister_handler(self, message_type: str) -> None:
+        """Remove the handler for a message type (e.g. when its module is unloaded)."""
+        self.message_handlers.pop(message_type, None)
+        self.ordered_types.discard(message_type)
+        self.client_handlers.discard(message_type)
+
+    def register_namespace(self, prefix: str, loader: Callable) -> None:
+        """Load a namespace's handlers on demand.
+
+        The first message whose type starts with prefix and has no handler
+        awaits loader() (once, however many clients ask at the same time),
+        which is expected to register the handlers, and is then dispatched.
+        """
+        self.namespaces[prefix] = loader
+
+    async def _load_namespace(self, message_type: str) -> None:
+        for prefix, loader in self.namespaces.items():
+            if message_type.startswith(prefix):
+                async with self._namespace_locks.setdefault(prefix, asyncio.Lock()):
+                    if message_type not in self.message_handlers:
+                        try:
+                            await loader()
+                        except Exception as e:
+                            self.logger.error(f"Loading handlers for {prefix} failed: {e}")
+                return
+
+    def set_fallback_handler(self, handler: Optional[Callable]) -> None:
+        """Set an async handler(data) for message types nothing is registered for.
+
+        Used to answer messages for components that are still loading; it
+        may return None to send no response.
+        """
+        self.fallback_handler = handler
+
+    def register_binary_handler(self, magic: bytes, handler: Callable) -> None:
+        """Register an async handler(session, frame) for binary frames starting with magic."""
+        if len(magic) != 4:
+            raise ValueError("Binary frame magic must be 4 bytes")
+        self.binary_handlers[magic] = handler
+        self.logger.info(f"Registered binary handler for frame magic: {magic!r}")
     
+    def _fan_out(self, sockets: Iterable[WebSocketServerProtocol], message: Dict[str, Any]) -> None:
+        """Send a message to many sockets, encoding it once per wire format."""
+        groups: Dict[Optional[str], List[WebSocketServerProtocol]] = {}
+        for websocket in sockets:
+            groups.setdefault(websocket.subprotocol, []).append(websocket)
+        for subprotocol, members in groups.items():
+            websockets.broadcast(members, codec_for(subprotocol).encode(message))
+
     async def broadcast(self, message: Dict[str, Any]) -> None:
         """Send message to all connected clients."""
         if self.clients:
-            message_json = json.dumps(message)
-            websockets.broadcast(self.clients, message_json)
+            self._fan_out(self.clients, message)
             self.logger.info(f"Broadcast message to {len(self.clients)} clients: {message.get('type', 'unknown')}")
+
+    def has_subscribers(self, topic: str) -> bool:
+        """Check whether any client is subscribed to a topic."""
+        return bool(self.subscriptions.get(topic))
+
+    def publish(self, topic: str, message: Dict[str, Any]) -> int:
+        """Send a message to every client subscribed to a topic.
+
+        The message is serialized once per wire format and fanned out without awaiting the
+        individual sockets, so producers can publish from anywhere on the loop.
+
+        Returns:
+            Number of clients the message was sent to
+        """
+        subscribers = self.subscriptions.get(topic)
+        if not subscribers:
+            return 0
+        self._fan_out(subscribers, {**message, 'topic': topic})
+        return len(subscribers)
+
+    def subscribe(self, websocket: WebSocketServerProtocol, topics: List[str]) -> None:
+        """Subscribe a client to one or more topics."""
+        for topic in topics:
+            self.subscriptions.setdefault(topic, set()).add(websocket)
+
+    def unsubscribe(self, websocket: WebSocketServerProtocol, topics: Optional[List[str]] = None) -> None:
+        """Unsubscribe a client from the given topics, or from all topics."""
+        for topic in list(self.subscriptions if topics is None else topics):
+            subscribers = self.subscriptions.get(topic)
+            if subscribers is None:
+                continue
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self.subscriptions[topic]
+
+    def _handle_subscription(self, websocket: WebSocketServerProtocol, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle 'subscribe'/'unsubscribe' messages, which need the socket itself."""
+        topics = data.get('topics')
+        if topics is None and data.get('topic'):
+            topics = [data['topic']]
+        if isinstance(topics, str):
+            topics = [topics]
+
+        if data.get('type') == 'subscribe':
+            self.subscribe(websocket, topics or [])
+        else:
+            self.unsubscribe(websocket, topics)
+
+        return {
+            'type': 'subscriptions',
+            'topics': sorted(t for t, subs in self.subscriptions.items() if websocket in subs),
+        }
     
+    async def _send_response(self, session: ClientSession, response: Any, request_id: Any) -> None:
+        await session.websocket.send(encode_response(response, request_id, session.codec))
+
+    async def _dispatch(self, session: ClientSession, message_type: str, data: Dict[str, Any]) -> None:
+        """Run one handler and send its response, tagged with the request_id.
+
+        A handler may also return an async iterator of messages (e.g. result
+        pages); each one is sent as its own frame as soon as it is produced.
+        """
+        request_id = data.get('request_id')
+        ordering_lock = None
+        if message_type in self.ordered_types:
+            ordering_lock = session.ordering_locks.setdefault(message_type, asyncio.Lock())
+
+        try:
+            async with ordering_lock or contextlib.nullcontext():
+                async with self._global_slots:
+                    handler = self.message_handlers.get(message_type, self.fallback_handler)
+                    if message_type in self.client_handlers:
+                        response = await handler(data, session)
+                    else:
+                        response = await handler(data)
+
+                # Stream frames outside the global slot so a slow reader
+                # doesn't hold up other clients' handlers
+                if hasattr(response, '__aiter__'):
+                    try:
+                        async for frame in response:
+                            await self._send_response(session, frame, request_id)
+                    finally:
+                        # Also when sending failed, so the handler can clean up
+                        aclose = getattr(response, 'aclose', None)
+                        if aclose is not None:
+                            await aclose()
+                elif response:
+                    await self._send_response(session, response, request_id)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        except Exception as e:
+            self.logger.error(f"Error handling {message_type} from {session.id}: {e}")
+            if request_id is not None:
+                # Let the caller stop waiting for this request
+                try:
+                    await session.websocket.send(session.codec.encode({
+                        'type': 'error',
+                        'message': f'Handling {message_type} failed',
+                        'request_id': request_id,
+                    }))
+                except websockets.exceptions.ConnectionClosed:
+                    pass
+        finally:
+            session.slots.release()
+
     async def handle_client(self, websocket: WebSocketServerProtocol) -> None:
         """Handle a client connection."""
         self.clients.add(websocket)
-        client_id = id(websocket)
+        session = ClientSession(websocket, self.max_concurrent_per_client)
+        client_id = session.id
         self.logger.info(f"Client {client_id} connected. Total clients: {len(self.clients)}")
         
         try:
             # Send welcome message
-            await websocket.send(json.dumps({
+            await websocket.send(session.codec.encode({
                 'type': 'connection',
                 'status': 'connected',
-                'message': 'Connected to ATLAS Assistant'
+                'message': 'Connected to ATLAS Assistant',
+                'protocol': session.codec.name,
             }))
             
             # Listen for messages
             async for message in websocket:
                 try:
-                    data = json.loads(message)
+                    if isinstance(message, bytes) and message[:4] in self.binary_handlers:
+                        await self.binary_handlers[message[:4]](session, message)
+                        continue
+
+                    data = session.codec.decode(message)
                     message_type = data.get('type', 'unknown')
                     self.logger.info(f"Received message from {client_id}: {message_type}")
                     
+                    if message_type not in self.message_handlers and self.namespaces:
+                        # First message of a lazily loaded namespace; this
+                        # client's later messages wait, keeping their order
+                        await self._load_namespace(message_type)
+
+                    if message_type in ('subscribe', 'unsubscribe'):
+                        response = self._handle_subscription(websocket, data)
+                        await websocket.send(session.codec.encode(response))
                     # Call registered handler if exists
-                    if message_type in self.message_handlers:
-                        response = await self.message_handlers[message_type](data)
-                        if response:
-                            await websocket.send(json.dumps(response))
+                    elif message_type in self.message_handlers or self.fallback_handler:
+                        # Waiting for a free slot stops reading from this
+                        # client, which pushes back on a flooding frontend
+                        await session.slots.acquire()
+                        task = asyncio.create_task(self._dispatch(session, message_type, data))
+                        session.tasks.add(task)
+                        task.add_done_callback(session.tasks.discard)
                     else:
                         self.logger.warning(f"No handler for message type: {message_type}")
                         
-                except json.JSONDecodeError:
-                    self.logger.error(f"Invalid JSON from client {client_id}")
+                except ValueError:  # json.JSONDecodeError and msgpack's unpack errors
+                    self.logger.error(f"Invalid {session.codec.name} message from client {client_id}")
                 except Exception as e:
                     self.logger.error(f"Error handling message from {client_id}: {e}")
                     
         except websockets.exceptions.ConnectionClosed:
             self.logger.info(f"Client {client_id} disconnected")
         finally:
+            for task in list(session.tasks):
+                task.cancel()
+            for callback in session.close_callbacks:
+                try:
+                    result = callback()
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    self.logger.error(f"Close callback failed for {client_id}: {e}")
             self.clients.remove(websocket)
+            self.unsubscribe(websocket)
             self.logger.info(f"Client {client_id} removed. Total clients: {len(self.clients)}")
     
     async def start(self) -> None:
         """Start the WebSocket server."""
-        self.logger.info(f"WebSocket server starting on ws://{self.host}:{self.port}")
-        async with websockets.serve(self.handle_client, self.host, self.port):
+        subprotocols = available_subprotocols()
+        self.logger.info(
+            f"WebSocket server starting on ws://{self.host}:{self.port} "
+            f"(encoder: {ENCODER_NAME}, protocols: {', '.join(subprotocols)}, "
+            f"compression: {f'>= {self.compression_min_bytes} bytes' if self.compression else 'off'})"
+        )
+        async with websockets.serve(
+            self.handle_client,
+            self.host,
+            self.port,
+            subprotocols=subprotocols,
+            select_subprotocol=_subprotocol_selector(),
+            **server_extensions(self.compression, self.compression_min_bytes, self.compression_level),
+        ):
             self.logger.info("WebSocket server is running")
-            await asyncio.Future()  # Run forever
+            self.listening.set()
+            try:
+                await asyncio.Future()  # Run forever
+            finally:
+                self.listening.clear()
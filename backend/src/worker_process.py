@@ -0,0 +1,195 @@
+"""Child processes for CPU-heavy engines (speech recognition, synthesis, LLM).
+
+Model inference holds the GIL or saturates cores for seconds at a time, so
+it runs in a separate process that keeps its model loaded between requests.
+The parent talks to it through two multiprocessing queues:
+
+- requests: tuples sent with WorkerProcess.send(); None asks the child to exit
+- results: tuples put by the child, delivered on the event loop to
+  WorkerProcess.handle_result()
+
+The child's entry point is a module-level function taking
+(requests, results, *args); it should put ("ready", info) once its model is
+loaded, so the parent can report readiness. If it raises instead (e.g. the
+model doesn't load), the error is sent as ("failed", message) and kept in
+WorkerProcess.error.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# How often the result reader checks whether the child is still alive
+POLL_INTERVAL_SECONDS = 0.5
+
+
+def create_engine(kind: str, backend: str, factories: Dict[str, Callable[[], Any]]) -> Any:
+    """Build and load the engine configured as backend.
+
+    Stub engines are only used when configured explicitly ('stub'): a model
+    that fails to load must fail its component, not be replaced by canned
+    output that looks like the real thing.
+
+    Raises:
+        ValueError: If backend isn't one of factories
+        Exception: Whatever loading the engine raises
+    """
+    factory = factories.get(backend)
+    if factory is None:
+        raise ValueError(f"Unknown {kind} backend {backend!r} (expected one of: {', '.join(factories)})")
+    engine = factory()
+    engine.load()
+    return engine
+
+
+def _run_child(target: Callable[..., None], requests: Any, results: Any, *args: Any) -> None:
+    try:
+        target(requests, results, *args)
+    except Exception as exc:
+        results.put(("failed", f"{type(exc).__name__}: {exc}"))
+        raise
+
+
+class WorkerProcess:
+    """Owns one child process and pumps its results into the event loop.
+
+    Subclasses implement handle_result() (and optionally handle_exit()),
+    which always run on the event loop thread.
+    """
+
+    def __init__(self, name: str, target: Callable[..., None], args: Tuple[Any, ...] = ()) -> None:
+        self.name = name
+        self.target = target
+        self.args = args
+        self.ready = False
+        self.ready_info: Dict[str, Any] = {}
+        self.started_at: Optional[float] = None
+        # Why the child failed, if it raised (e.g. while loading its model)
+        self.error: Optional[str] = None
+        self._context = multiprocessing.get_context("spawn")
+        self._process: Optional[multiprocessing.Process] = None
+        self._requests: Any = None
+        self._results: Any = None
+        self._reader: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready_event: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    @property
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self) -> None:
+        """Spawn the child; it loads its model in the background. Call from the event loop."""
+        if self.is_alive:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._ready_event = asyncio.Event()
+        self.ready = False
+        self.error = None
+        self._stopping = False
+        self._requests = self._context.Queue()
+        self._results = self._context.Queue()
+        self._process = self._context.Process(
+            target=_run_child,
+            args=(self.target, self._requests, self._results, *self.args),
+            name=self.name,
+            daemon=True,
+        )
+        self.started_at = time.perf_counter()
+        self._process.start()
+        self._reader = threading.Thread(target=self._read_results, name=f"{self.name}-results", daemon=True)
+        self._reader.start()
+        logger.info("Worker %s started (pid %s)", self.name, self._process.pid)
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the child reported ready; False on timeout or if it isn't running."""
+        if self.ready:
+            return True
+        if self._ready_event is None:
+            return False
+        try:
+            await asyncio.wait_for(self._ready_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return self.ready
+
+    def send(self, message: Tuple[Any, ...]) -> None:
+        """Queue a request for the child (never blocks)."""
+        if self._requests is None:
+            raise RuntimeError(f"Worker {self.name} is not running")
+        self._requests.put(message)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Ask the child to exit, terminating it if it doesn't in time."""
+        if self._process is None:
+            return
+        self._stopping = True
+        try:
+            self._requests.put(None)
+        except (OSError, ValueError):
+            pass
+        self._process.join(timeout)
+        if self._process.is_alive():
+            logger.warning("Worker %s did not exit, terminating", self.name)
+            self._process.terminate()
+            self._process.join(1.0)
+        self._process = None
+        self.ready = False
+
+    def _read_results(self) -> None:
+        process = self._process
+        results = self._results
+        while True:
+            try:
+                message = results.get(timeout=POLL_INTERVAL_SECONDS)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+                self._call_soon(self._on_exit, process.exitcode)
+                return
+            except (EOFError, OSError):
+                self._call_soon(self._on_exit, process.exitcode)
+                return
+            self._call_soon(self._on_result, message)
+
+    def _call_soon(self, callback: Callable[..., None], *args: Any) -> None:
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass  # event loop already closed during shutdown
+
+    def _on_result(self, message: Tuple[Any, ...]) -> None:
+        if message[0] == "ready":
+            self.ready = True
+            self.ready_info = {**message[1], "startup_seconds": round(time.perf_counter() - self.started_at, 3)}
+            self._ready_event.set()
+            logger.info("Worker %s ready: %s", self.name, self.ready_info)
+        elif message[0] == "failed":
+            self.error = message[1]
+            logger.error("Worker %s failed: %s", self.name, self.error)
+            return
+        try:
+            self.handle_result(message)
+        except Exception as exc:
+            logger.error("Worker %s result handling failed: %s", self.name, exc)
+
+    def _on_exit(self, exitcode: Optional[int]) -> None:
+        self.ready = False
+        if self._ready_event is not None:
+            self._ready_event.set()
+        if not self._stopping:
+            logger.error("Worker %s exited unexpectedly (exit code %s)", self.name, exitcode)
+        self.handle_exit(exitcode)
+
+    def handle_result(self, message: Tuple[Any, ...]) -> None:
+        """Handle one result tuple from the child; runs on the event loop."""
+
+    def handle_exit(self, exitcode: Optional[int]) -> None:
+        """Called on the event loop after the child exited; fail pending work here."""
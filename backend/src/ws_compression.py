@@ -0,0 +1,82 @@
+"""permessage-deflate for the websocket server, skipping small messages.
+
+Compressing every frame costs CPU on both ends for no gain on small
+messages (state changes, metrics ticks, acknowledgements), which often come
+out larger once deflated. permessage-deflate marks compression per message,
+so messages below a size threshold are simply sent uncompressed while large
+part pages and circuit lists are still deflated.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from websockets import frames
+from websockets.extensions.permessage_deflate import PerMessageDeflate, ServerPerMessageDeflateFactory
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_BYTES = 1024
+DEFAULT_LEVEL = 6
+
+
+class ThresholdPerMessageDeflate(PerMessageDeflate):
+    """PerMessageDeflate that leaves single-frame messages under min_bytes uncompressed."""
+
+    def __init__(self, *args: Any, min_bytes: int = DEFAULT_MIN_BYTES, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.min_bytes = min_bytes
+
+    def encode(self, frame: frames.Frame) -> frames.Frame:
+        # Continuation frames belong to a message whose first frame was
+        # compressed, since only complete (fin) messages are ever skipped
+        if frame.fin and frame.opcode in (frames.Opcode.TEXT, frames.Opcode.BINARY) and len(frame.data) < self.min_bytes:
+            return frame
+        return super().encode(frame)
+
+
+class ThresholdDeflateFactory(ServerPerMessageDeflateFactory):
+    """Negotiates permessage-deflate and hands out ThresholdPerMessageDeflate instances."""
+
+    def __init__(self, min_bytes: int = DEFAULT_MIN_BYTES, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.min_bytes = min_bytes
+
+    def process_request_params(
+        self,
+        params: Sequence[Tuple[str, Optional[str]]],
+        accepted_extensions: Sequence[Any],
+    ) -> Tuple[List[Tuple[str, Optional[str]]], PerMessageDeflate]:
+        response_params, extension = super().process_request_params(params, accepted_extensions)
+        return response_params, ThresholdPerMessageDeflate(
+            extension.remote_no_context_takeover,
+            extension.local_no_context_takeover,
+            extension.remote_max_window_bits,
+            extension.local_max_window_bits,
+            self.compress_settings,
+            min_bytes=self.min_bytes,
+        )
+
+
+def server_extensions(
+    enabled: bool = True,
+    min_bytes: int = DEFAULT_MIN_BYTES,
+    level: int = DEFAULT_LEVEL,
+) -> Dict[str, Any]:
+    """Keyword arguments for websockets.serve configuring compression.
+
+    Args:
+        enabled: Offer permessage-deflate to clients at all
+        min_bytes: Messages smaller than this are sent uncompressed
+        level: zlib compression level (1 fastest - 9 smallest)
+    """
+    if not enabled:
+        return {"compression": None}
+    # Same window and memory settings as the websockets default, which keep
+    # per-connection zlib state around 64 KiB
+    factory = ThresholdDeflateFactory(
+        min_bytes=max(0, int(min_bytes)),
+        server_max_window_bits=12,
+        client_max_window_bits=12,
+        compress_settings={"memLevel": 5, "level": max(1, min(9, int(level)))},
+    )
+    return {"compression": None, "extensions": [factory]}
@@ -13,14 +13,20 @@ function App() {
   const [isConnected, setIsConnected] = useState(false)
   const [currentTime, setCurrentTime] = useState(new Date().toLocaleTimeString())
   const [notes, setNotes] = useState([])
+  const [notesCursor, setNotesCursor] = useState(null)
   const [hardwareParts, setHardwareParts] = useState([])
   const [hardwareMeta, setHardwareMeta] = useState({})
+  const [hardwareFacets, setHardwareFacets] = useState(null)
   const [hardwareSync, setHardwareSync] = useState(null)
+  // Background components (voice, assistant) and whether they have loaded
+  const [components, setComponents] = useState({})
   const [selectedIndex, setSelectedIndex] = useState(0)
   const [openedModuleId, setOpenedModuleId] = useState(null)
   const [isClosing, setIsClosing] = useState(false)
   const [fabOpen, setFabOpen] = useState(false)
   const wsRef = useRef(null)
+  // Last notes change version applied locally (see notes/sync)
+  const notesVersionRef = useRef(0)
 
   // Define available modules (each own component file)
   const modules = useMemo(() => ([
@@ -29,21 +35,21 @@ function App() {
       label: 'Notes',
       icon: '🗒️',
       component: NoteModule,
-      props: { notes },
+      props: { notes, notesCursor },
     },
     {
       id: 'system',
       label: 'System',
       icon: '📊',
       component: SystemModule,
-      props: { systemInfo },
+      props: { systemInfo, components },
     },
     {
       id: 'hardware',
       label: 'Hardware',
       icon: '🔌',
       component: HardwareModule,
-      props: { parts: hardwareParts, meta: hardwareMeta },
+      props: { parts: hardwareParts, meta: hardwareMeta, facets: hardwareFacets },
     },
     {
       id: 'designer',
@@ -66,7 +72,7 @@ function App() {
       component: ModuleTemplate,
       props: {},
     },
-  ]), [notes, systemInfo, hardwareParts, hardwareMeta, hardwareSync])
+  ]), [notes, notesCursor, systemInfo, components, hardwareParts, hardwareMeta, hardwareFacets, hardwareSync])
 
   // WebSocket connection
   useEffect(() => {
@@ -77,14 +83,18 @@ function App() {
       ws.onopen = () => {
         console.log('Connected to ATLAS Backend')
         setIsConnected(true)
-        // Request initial system info
+        // Request initial system info, then let the backend push updates
         ws.send(JSON.stringify({ type: 'get_system_info' }))
+        ws.send(JSON.stringify({ type: 'system/components' }))
+        ws.send(JSON.stringify({ type: 'subscribe', topics: ['system/metrics', 'system/components', 'notes/changed'] }))
       }
 
       ws.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data)
           console.log('Received:', data)
+          // Modules that keep their own state (e.g. the designer) listen for this
+          window.dispatchEvent(new CustomEvent('ws-message', { detail: data }))
 
           switch (data.type) {
             case 'connection':
@@ -93,29 +103,66 @@ function App() {
             case 'system_info':
               setSystemInfo(data.data)
               break
+            case 'system/components':
+              setComponents(data.components || {})
+              break
+            case 'system/loading':
+              console.log(`${data.component} is still loading; ${data.for} was not handled`)
+              break
             case 'state_changed':
               setAssistantState(data.state)
               break
             case 'notes/list':
-              setNotes(data.notes || [])
+              // A response with a cursor continues the list we already have
+              setNotes((prev) => (data.cursor ? [...prev, ...(data.notes || [])] : (data.notes || [])))
+              setNotesCursor(data.next_cursor || null)
+              if (!data.cursor) notesVersionRef.current = data.version || 0
               break
             case 'notes/added':
-              setNotes(data.notes || [])
+              applyNoteChange(data.version, addNote(data.note))
               break
             case 'notes/deleted':
-              setNotes(data.notes || [])
+              applyNoteChange(data.version, removeNote(data.id))
+              break
+            case 'notes/changed':
+              // Pushed when another window adds or deletes a note
+              if (data.action === 'added' && data.note) {
+                applyNoteChange(data.version, addNote(data.note))
+              } else if (data.action === 'deleted') {
+                applyNoteChange(data.version, removeNote(data.id))
+              }
+              break
+            case 'notes/sync':
+              applyNoteSync(data)
+              break
+            case 'subscriptions':
+              console.log('Subscribed topics:', data.topics)
               break
             case 'notes/error':
               console.warn('Notes error:', data.message)
               break
             case 'hardware/parts/list':
             case 'hardware/parts/search':
-              setHardwareParts(data.parts || [])
+              setHardwareParts((prev) => (data.meta?.cursor ? [...prev, ...(data.parts || [])] : (data.parts || [])))
               setHardwareMeta(data.meta || {})
               break
+            case 'hardware/parts/page':
+              // Streamed result: first page replaces, later pages append
+              setHardwareParts((prev) => (data.page > 0 ? [...prev, ...(data.parts || [])] : (data.parts || [])))
+              break
+            case 'hardware/parts/facets':
+              setHardwareFacets({ total: data.total, ...data.facets })
+              break
+            case 'hardware/import/progress':
+              setHardwareSync({
+                message: `Importeren… ${data.percent ?? 0}%`,
+                progress: data,
+              })
+              break
             case 'hardware/import/status':
               setHardwareSync({ message: data.message, summary: data.summary })
               sendMessage({ type: 'hardware/parts/list' })
+              sendMessage({ type: 'hardware/parts/facets' })
               break
             case 'hardware/error':
               console.warn('Hardware error:', data.message)
@@ -164,23 +211,10 @@ function App() {
     return () => clearInterval(timer)
   }, [])
 
-  // Request system info every 2 seconds
-  useEffect(() => {
-    if (!isConnected) return
-
-    const interval = setInterval(() => {
-      if (wsRef.current?.readyState === WebSocket.OPEN) {
-        wsRef.current.send(JSON.stringify({ type: 'get_system_info' }))
-      }
-    }, 2000)
-
-    return () => clearInterval(interval)
-  }, [isConnected])
-
   // Fetch notes once connected
   useEffect(() => {
     if (isConnected && wsRef.current?.readyState === WebSocket.OPEN) {
-      wsRef.current.send(JSON.stringify({ type: 'notes/list' }))
+      wsRef.current.send(JSON.stringify({ type: 'notes/list', limit: 100 }))
       wsRef.current.send(JSON.stringify({ type: 'hardware/parts/list' }))
     }
   }, [isConnected])
@@ -191,6 +225,38 @@ function App() {
     }
   }
 
+  const addNote = (note) => (prev) => (
+    prev.some((n) => n.id === note.id) ? prev : [note, ...prev]
+  )
+
+  const removeNote = (id) => (prev) => prev.filter((n) => n.id !== id)
+
+  // Apply one versioned note change. Changes are idempotent, so a change we
+  // already have is skipped and a gap in versions is filled with notes/sync.
+  const applyNoteChange = (version, update) => {
+    const current = notesVersionRef.current
+    if (!version || version <= current) return
+    setNotes(update)
+    if (version === current + 1) {
+      notesVersionRef.current = version
+    } else {
+      sendMessage({ type: 'notes/sync', since_version: current })
+    }
+  }
+
+  const applyNoteSync = (data) => {
+    const deleted = new Set(data.deleted || [])
+    const changed = new Map((data.notes || []).map((n) => [n.id, n]))
+    setNotes((prev) => {
+      const kept = data.full ? [] : prev.filter((n) => !deleted.has(n.id) && !changed.has(n.id))
+      return [...kept, ...changed.values()].sort(
+        (a, b) => b.created_at.localeCompare(a.created_at) || b.id - a.id
+      )
+    })
+    if (data.full) setNotesCursor(null)
+    notesVersionRef.current = data.version
+  }
+
   const handleWheel = (event) => {
     event.preventDefault()
     if (!modules.length) return
@@ -321,7 +387,7 @@ function App() {
                 className="fab__item"
                 style={{ '--i': 0 }}
                 onClick={() => {
-                  sendMessage({ type: 'notes/list' })
+                  sendMessage({ type: 'notes/list', limit: 100 })
                   sendMessage({ type: 'get_system_info' })
                   setFabOpen(false)
                 }}
@@ -13,6 +13,8 @@ function CircuitDesigner({ isConnected, sendMessage }) {
   const [isPanning, setIsPanning] = useState(false)
   const [panStart, setPanStart] = useState({ x: 0, y: 0 })
   const [circuitName, setCircuitName] = useState('Nieuw Circuit')
+  // Set after the first save so later saves update the same circuit
+  const [savedCircuit, setSavedCircuit] = useState(null)
   const [searchQuery, setSearchQuery] = useState('')
 
   useEffect(() => {
@@ -25,10 +27,22 @@ function CircuitDesigner({ isConnected, sendMessage }) {
     const handleMessage = (data) => {
       if (data.type === 'hardware/parts/list') {
         setParts(data.parts || [])
+      } else if (data.type === 'hardware/circuits/saved' && data.circuit) {
+        setSavedCircuit({ id: data.circuit.id, version: data.version })
+      } else if (data.type === 'hardware/circuits/loaded' && data.circuit) {
+        // Loaded, restored, undone or redone: show that revision's layout
+        const layout = data.circuit.layout || {}
+        setSavedCircuit({ id: data.circuit.id, version: data.circuit.version })
+        setCircuitName(data.circuit.name)
+        setPlacedComponents(layout.components || [])
+        setWires(layout.wires || [])
+        setZoom(layout.zoom || 1)
+        setPan(layout.pan || { x: 0, y: 0 })
       }
     }
-    window.addEventListener('ws-message', (e) => handleMessage(e.detail))
-    return () => window.removeEventListener('ws-message', handleMessage)
+    const listener = (e) => handleMessage(e.detail)
+    window.addEventListener('ws-message', listener)
+    return () => window.removeEventListener('ws-message', listener)
   }, [])
 
   const handleCatalogDragStart = (e, part) => {
@@ -183,6 +197,8 @@ function CircuitDesigner({ isConnected, sendMessage }) {
 
   const handleSaveCircuit = () => {
     const circuitData = {
+      id: savedCircuit?.id,
+      version: savedCircuit?.version,
       name: circuitName,
       platform: 'Mixed',
       description: `Circuit met ${placedComponents.length} onderdelen`,
@@ -229,6 +245,18 @@ function CircuitDesigner({ isConnected, sendMessage }) {
           💾 Opslaan
         </button>
         <button onClick={() => setPlacedComponents([])}>🗑️ Wissen</button>
+        <button
+          onClick={() => sendMessage?.({ type: 'hardware/circuits/undo', id: savedCircuit.id })}
+          disabled={!isConnected || !savedCircuit}
+        >
+          ↶ Ongedaan maken
+        </button>
+        <button
+          onClick={() => sendMessage?.({ type: 'hardware/circuits/redo', id: savedCircuit.id })}
+          disabled={!isConnected || !savedCircuit}
+        >
+          ↷ Opnieuw
+        </button>
         <div className="zoom-controls">
           <button onClick={() => setZoom(prev => Math.min(3, prev * 1.2))}>🔍+</button>
           <span>{Math.round(zoom * 100)}%</span>
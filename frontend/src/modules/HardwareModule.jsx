@@ -2,26 +2,63 @@ import { useEffect, useMemo, useState } from 'react'
 
 const platformOptions = ['Alle', 'Arduino', 'Raspberry Pi', 'Cross-platform']
 
-function HardwareModule({ parts = [], meta = {}, isConnected, sendMessage }) {
+// "flash_kb>=32, usb=Type-B" -> [{ key, op, value }]
+const parseSpecFilters = (text) => text
+  .split(',')
+  .map((chunk) => chunk.trim().match(/^([\w.-]+)\s*(>=|<=|!=|=|<|>|~)\s*(.+)$/))
+  .filter(Boolean)
+  .map(([, key, op, raw]) => {
+    const value = raw.trim()
+    const number = Number(value)
+    return {
+      key,
+      op: op === '~' ? 'contains' : op,
+      value: value !== '' && !Number.isNaN(number) ? number : value,
+    }
+  })
+
+function HardwareModule({ parts = [], meta = {}, facets = null, isConnected, sendMessage }) {
   const [query, setQuery] = useState('')
   const [platform, setPlatform] = useState('Alle')
   const [category, setCategory] = useState('')
+  const [specFilter, setSpecFilter] = useState('')
 
   useEffect(() => {
     if (!isConnected) return
     sendMessage?.({ type: 'hardware/parts/list', limit: 200 })
+    sendMessage?.({ type: 'hardware/parts/facets' })
   }, [isConnected, sendMessage])
 
+  const platformCounts = useMemo(() => {
+    const counts = { Alle: facets?.total }
+    ;(facets?.platform || []).forEach((item) => { counts[item.value] = item.count })
+    return counts
+  }, [facets])
+
   const filteredParts = useMemo(() => {
     return parts.map((part) => ({ ...part, specs: part.specs || {} }))
   }, [parts])
 
+  const handleLoadMore = () => {
+    sendMessage?.({
+      type: 'hardware/parts/list',
+      query: meta.query || undefined,
+      platform: meta.platform || undefined,
+      category: meta.category || undefined,
+      specs: meta.specs || undefined,
+      limit: meta.limit,
+      cursor: meta.next_cursor,
+    })
+  }
+
   const handleSearch = () => {
+    const specs = parseSpecFilters(specFilter)
     sendMessage?.({
-      type: 'hardware/parts/search',
+      type: specs.length ? 'hardware/parts/query' : 'hardware/parts/search',
       query: query.trim() || undefined,
       platform: platform === 'Alle' ? undefined : platform,
       category: category.trim() || undefined,
+      specs: specs.length ? specs : undefined,
       limit: 200,
     })
   }
@@ -40,7 +77,9 @@ function HardwareModule({ parts = [], meta = {}, isConnected, sendMessage }) {
         />
         <select value={platform} onChange={(e) => setPlatform(e.target.value)} disabled={!isConnected}>
           {platformOptions.map((opt) => (
-            <option key={opt} value={opt}>{opt}</option>
+            <option key={opt} value={opt}>
+              {opt}{platformCounts[opt] != null ? ` (${platformCounts[opt]})` : ''}
+            </option>
           ))}
         </select>
         <input
@@ -48,6 +87,19 @@ function HardwareModule({ parts = [], meta = {}, isConnected, sendMessage }) {
           value={category}
           onChange={(e) => setCategory(e.target.value)}
           placeholder="Categorie (bijv. Sensor)"
+          list="hardware-categories"
+          disabled={!isConnected}
+        />
+        <datalist id="hardware-categories">
+          {(facets?.category || []).filter((item) => item.value).map((item) => (
+            <option key={item.value} value={item.value}>{item.count} onderdelen</option>
+          ))}
+        </datalist>
+        <input
+          type="text"
+          value={specFilter}
+          onChange={(e) => setSpecFilter(e.target.value)}
+          placeholder="Specs (bijv. flash_kb>=32)"
           disabled={!isConnected}
         />
         <button onClick={handleSearch} disabled={!isConnected}>Zoeken</button>
@@ -82,6 +134,11 @@ function HardwareModule({ parts = [], meta = {}, isConnected, sendMessage }) {
             )}
           </div>
         ))}
+        {meta?.next_cursor && (
+          <button className="hardware-more" onClick={handleLoadMore} disabled={!isConnected}>
+            Meer laden
+          </button>
+        )}
       </div>
     </div>
   )
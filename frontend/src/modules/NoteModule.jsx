@@ -1,6 +1,6 @@
 import { useState } from 'react'
 
-function NoteModule({ notes = [], isConnected, sendMessage }) {
+function NoteModule({ notes = [], notesCursor = null, isConnected, sendMessage }) {
   const [draft, setDraft] = useState('')
 
   const handleAdd = () => {
@@ -74,6 +74,15 @@ function NoteModule({ notes = [], isConnected, sendMessage }) {
             </div>
           </div>
         ))}
+        {notesCursor && (
+          <button
+            className="note-module__more"
+            onClick={() => sendMessage?.({ type: 'notes/list', limit: 100, cursor: notesCursor })}
+            disabled={!isConnected}
+          >
+            Load more
+          </button>
+        )}
       </div>
     </div>
   )
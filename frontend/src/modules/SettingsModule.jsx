@@ -23,6 +23,12 @@ function SettingsModule({ isConnected, sendMessage, hardwareSync }) {
           <div className="settings-help">
             {hardwareSync?.message || 'Nog niet gesynchroniseerd.'}
           </div>
+          {hardwareSync?.progress && (
+            <div className="settings-help">
+              {hardwareSync.progress.rows} rijen · {Math.round(hardwareSync.progress.rows_per_sec)} rijen/s
+              {hardwareSync.progress.eta_seconds != null && ` · nog ~${Math.ceil(hardwareSync.progress.eta_seconds)}s`}
+            </div>
+          )}
           {hardwareSync?.summary && (
             <div className="settings-help">
               {hardwareSync.summary.imported} geimporteerd · totaal {hardwareSync.summary.total}
@@ -1,4 +1,11 @@
-function SystemModule({ systemInfo }) {
+const COMPONENT_STATES = {
+  pending: 'Wachten',
+  loading: 'Laden…',
+  ready: 'Gereed',
+  failed: 'Niet beschikbaar',
+}
+
+function SystemModule({ systemInfo, components = {} }) {
   const cpu = systemInfo?.cpu_percent ?? 0
   const ram = systemInfo?.memory?.percent ?? 0
 
@@ -14,6 +21,12 @@ function SystemModule({ systemInfo }) {
           <div className="metric__label">RAM</div>
           <div className="metric__value">{ram.toFixed(1)}%</div>
         </div>
+        {Object.entries(components).map(([name, component]) => (
+          <div className="metric" key={name} title={component.error || ''}>
+            <div className="metric__label">{name}</div>
+            <div className="metric__value">{COMPONENT_STATES[component.state] || component.state}</div>
+          </div>
+        ))}
       </div>
     </div>
   )
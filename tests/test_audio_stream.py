@@ -0,0 +1,75 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from audio_stream import AudioRingBuffer, pack_audio_frame, parse_audio_frame  # noqa: E402
+
+
+def read_all(ring: AudioRingBuffer) -> np.ndarray:
+    views = ring.peek()
+    data = np.concatenate(views) if views else np.array([], dtype=np.int16)
+    ring.consume(len(data))
+    return data
+
+
+def test_ring_keeps_order_across_wrap_around():
+    ring = AudioRingBuffer(10)
+    assert ring.write(np.arange(8, dtype=np.int16)) == 8
+    ring.consume(6)
+    # Starts at index 8 and wraps to the front of the buffer
+    assert ring.write(np.arange(100, 107, dtype=np.int16)) == 7
+    views = ring.peek()
+    assert len(views) == 2
+    assert list(np.concatenate(views)) == [6, 7, 100, 101, 102, 103, 104, 105, 106]
+
+
+def test_ring_write_stops_when_full():
+    ring = AudioRingBuffer(4)
+    assert ring.write(np.arange(6, dtype=np.int16)) == 4
+    assert ring.free == 0
+    assert ring.write(np.arange(2, dtype=np.int16)) == 0
+    assert list(read_all(ring)) == [0, 1, 2, 3]
+    assert ring.available == 0
+
+
+def test_ring_peek_limits_samples():
+    ring = AudioRingBuffer(8)
+    ring.write(np.arange(8, dtype=np.int16))
+    ring.consume(5)
+    ring.write(np.arange(10, 14, dtype=np.int16))
+    views = ring.peek(4)
+    assert [list(view) for view in views] == [[5, 6, 7], [10]]
+    ring.consume(4)
+    assert list(read_all(ring)) == [11, 12, 13]
+
+
+def test_ring_many_wrap_arounds():
+    ring = AudioRingBuffer(7)
+    written, read = [], []
+    value = 0
+    for chunk in range(50):
+        samples = np.arange(value, value + 1 + chunk % 5, dtype=np.int16)
+        value += len(samples)
+        count = ring.write(samples)
+        written.extend(samples[:count])
+        # Leave a sample behind now and then, so reads start mid-buffer
+        keep = chunk % 2
+        views = ring.peek(ring.available - keep)
+        for view in views:
+            read.extend(view)
+            ring.consume(len(view))
+    read.extend(read_all(ring))
+    assert read == written
+
+
+def test_audio_frame_round_trip():
+    samples = np.array([0, 1, -1, 32767, -32768], dtype=np.int16)
+    stream_id, sequence, parsed = parse_audio_frame(pack_audio_frame(3, 9, samples))
+    assert (stream_id, sequence) == (3, 9)
+    assert list(parsed) == list(samples)
+
+
+@pytest.mark.parametrize("frame", [b"", b"XXXX" + bytes(10), pack_audio_frame(1, 0, [1]) + b"\x00"])
+def test_malformed_audio_frames_raise_value_error(frame):
+    with pytest.raises(ValueError):
+        parse_audio_frame(frame)
@@ -0,0 +1,43 @@
+import asyncio
+import os
+
+import pytest
+
+import hardware_service
+from modules.hardware import HardwareModule
+
+
+@pytest.fixture
+def import_dir(tmp_path):
+    directory = tmp_path / "imports"
+    directory.mkdir()
+    (directory / "parts.jsonl").write_text('{"name": "LED"}\n')
+    return directory
+
+
+def test_paths_inside_the_import_dir_resolve(import_dir):
+    expected = import_dir / "parts.jsonl"
+    assert hardware_service.resolve_import_path("parts.jsonl", str(import_dir)) == expected
+    assert hardware_service.resolve_import_path(str(expected), str(import_dir)) == expected
+    assert hardware_service.resolve_import_path("sub/../parts.jsonl", str(import_dir)) == expected
+
+
+@pytest.mark.parametrize("path", ["../secret.csv", "/etc/passwd", "~/.ssh/id_rsa.csv"])
+def test_paths_outside_the_import_dir_are_rejected(import_dir, path):
+    with pytest.raises(ValueError):
+        hardware_service.resolve_import_path(path, str(import_dir))
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="needs symlinks")
+def test_symlinks_out_of_the_import_dir_are_rejected(import_dir, tmp_path):
+    outside = tmp_path / "outside.csv"
+    outside.write_text("name\nLED\n")
+    (import_dir / "link.csv").symlink_to(outside)
+    with pytest.raises(ValueError):
+        hardware_service.resolve_import_path("link.csv", str(import_dir))
+
+
+def test_import_file_handler_rejects_paths_outside_the_import_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    response = asyncio.run(HardwareModule().handle_import_file({"path": "/etc/passwd"}))
+    assert response["type"] == "hardware/error"
@@ -0,0 +1,35 @@
+import pytest
+
+import hardware_service
+
+
+@pytest.fixture
+def scratch_catalog(tmp_path, monkeypatch):
+    """Run against throwaway databases (the backend's data paths are relative)."""
+    monkeypatch.chdir(tmp_path)
+    yield
+    hardware_service.release_resources()
+
+
+def save(layout, circuit_id=None):
+    return hardware_service.save_circuit("Schakeling", "Arduino", None, None, [], layout, circuit_id=circuit_id)
+
+
+def test_restore_rebuilds_an_earlier_revision(scratch_catalog):
+    circuit = save({"components": [{"id": "a", "x": 0}]})
+    for x in range(1, 5):
+        save({"components": [{"id": "a", "x": x}]}, circuit["id"])
+
+    restored = hardware_service.restore_circuit_revision(circuit["id"], 2)
+    assert restored["layout"] == {"components": [{"id": "a", "x": 1}]}
+    assert restored["head_revision"] == 6
+
+
+@pytest.mark.parametrize("revision", [0, 999])
+def test_restore_of_a_missing_revision_raises(scratch_catalog, revision):
+    circuit = save({"components": [{"id": "a", "x": 0}]})
+    save({"components": [{"id": "a", "x": 1}]}, circuit["id"])
+
+    with pytest.raises(ValueError):
+        hardware_service.restore_circuit_revision(circuit["id"], revision)
+    assert hardware_service.list_circuit_revisions(circuit["id"])["head"] == 2
@@ -0,0 +1,62 @@
+import copy
+
+import pytest
+
+from layout_delta import apply_delta, diff_layout
+
+
+def make_layout(components: int) -> dict:
+    placed = [{"id": f"comp-{index}", "x": index * 10, "y": 0, "pins": [{"id": "pin-0"}]} for index in range(components)]
+    return {"components": placed, "wires": [], "zoom": 1, "pan": {"x": 0, "y": 0}}
+
+
+def round_trip(old: dict, new: dict) -> list:
+    ops = diff_layout(old, new)
+    assert apply_delta(copy.deepcopy(old), ops) == new
+    return ops
+
+
+def test_identical_layouts_have_an_empty_delta():
+    layout = make_layout(5)
+    assert diff_layout(layout, copy.deepcopy(layout)) == []
+
+
+def test_moved_component_is_one_small_set():
+    old = make_layout(20)
+    new = copy.deepcopy(old)
+    new["components"][7]["x"] = 999
+    assert round_trip(old, new) == [{"op": "set", "path": ["components", 7, "x"], "value": 999}]
+
+
+def test_inserted_component_is_one_splice():
+    old = make_layout(20)
+    new = copy.deepcopy(old)
+    new["components"].insert(3, {"id": "comp-new", "x": 1, "y": 2, "pins": []})
+    ops = round_trip(old, new)
+    assert ops == [{"op": "splice", "path": ["components"], "index": 3, "delete": 0, "insert": [new["components"][3]]}]
+
+
+def test_removed_component_and_keys_round_trip():
+    old = make_layout(10)
+    new = copy.deepcopy(old)
+    del new["components"][4]
+    del new["pan"]
+    new["grid"] = True
+    round_trip(old, new)
+
+
+def test_type_changes_and_nested_lists_round_trip():
+    old = {"a": [1, 2, 3], "b": {"c": 1}, "d": 1}
+    new = {"a": [1, [2, 2], 3, 4], "b": [1], "d": 1.0}
+    round_trip(old, new)
+
+
+def test_whole_document_replacement():
+    assert apply_delta({"a": 1}, diff_layout({"a": 1}, [1, 2])) == [1, 2]
+
+
+def test_delta_that_does_not_fit_raises_value_error():
+    with pytest.raises(ValueError):
+        apply_delta({"components": []}, [{"op": "set", "path": ["components", 5, "x"], "value": 1}])
+    with pytest.raises(ValueError):
+        apply_delta({}, [{"op": "remove", "path": ["missing"]}])
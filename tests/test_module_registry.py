@@ -0,0 +1,61 @@
+import asyncio
+import gc
+
+from module_registry import ModuleRegistry, ModuleSpec
+
+
+class FakeServer:
+    def __init__(self):
+        self.handlers = {}
+
+    def register_handler(self, message_type, handler, **options):
+        self.handlers[message_type] = handler
+
+
+async def frames():
+    yield {"type": "page", "index": 0}
+    yield {"type": "page", "index": 1}
+
+
+def registry_with_stream():
+    server = FakeServer()
+    registry = ModuleRegistry(server)
+    spec = ModuleSpec("test/", "test_module", "TestModule")
+
+    async def handle_pages(data):
+        return frames()
+
+    registry._register_handler(spec, "test/pages", handle_pages)
+    return server.handlers["test/pages"], spec
+
+
+def test_stream_keeps_module_active_until_exhausted():
+    async def run():
+        handler, spec = registry_with_stream()
+        stream = await handler({})
+        assert spec.active == 1
+        assert [frame["index"] async for frame in stream] == [0, 1]
+        assert spec.active == 0
+
+    asyncio.run(run())
+
+
+def test_stream_closed_before_first_frame_releases_module():
+    async def run():
+        handler, spec = registry_with_stream()
+        stream = await handler({})
+        await stream.aclose()
+        await stream.aclose()
+        assert spec.active == 0
+
+    asyncio.run(run())
+
+
+def test_stream_dropped_unread_releases_module():
+    async def run():
+        handler, spec = registry_with_stream()
+        await handler({})
+        gc.collect()
+        assert spec.active == 0
+
+    asyncio.run(run())
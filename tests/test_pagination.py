@@ -0,0 +1,33 @@
+import pytest
+
+from pagination import MAX_PAGE_SIZE, clamp_limit, decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("key", [
+    ["2026-01-01T00:00:00Z", 42],
+    ["Temperatuursensor éè \U0001f321", 1],
+    [None, 0.5, "a/b+c"],
+])
+def test_cursor_round_trip(key):
+    cursor = encode_cursor(key)
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+    assert decode_cursor(cursor, len(key)) == key
+
+
+def test_empty_cursor_is_the_first_page():
+    assert decode_cursor(None, 2) is None
+    assert decode_cursor("", 2) is None
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor(["a"]), "e30", "bnVsbA"])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 2)
+
+
+def test_clamp_limit():
+    assert clamp_limit(None) == 100
+    assert clamp_limit("25") == 25
+    assert clamp_limit(0) == 1
+    assert clamp_limit(10 ** 6) == MAX_PAGE_SIZE
+    assert clamp_limit("veel", default=7) == 7
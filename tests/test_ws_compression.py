@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+websockets = pytest.importorskip("websockets")
+from websockets.frames import Frame, Opcode  # noqa: E402
+
+from ws_compression import ThresholdDeflateFactory, server_extensions  # noqa: E402
+
+
+def negotiate(min_bytes: int):
+    _, extension = ThresholdDeflateFactory(min_bytes=min_bytes).process_request_params([], [])
+    return extension
+
+
+@pytest.mark.parametrize("opcode", [Opcode.TEXT, Opcode.BINARY])
+def test_messages_under_min_bytes_are_sent_uncompressed(opcode):
+    frame = Frame(opcode, b"x" * 99)
+    encoded = negotiate(100).encode(frame)
+    assert not encoded.rsv1
+    assert encoded.data == frame.data
+
+
+@pytest.mark.parametrize("opcode", [Opcode.TEXT, Opcode.BINARY])
+def test_messages_over_min_bytes_are_compressed(opcode):
+    frame = Frame(opcode, b"x" * 5000)
+    encoded = negotiate(100).encode(frame)
+    assert encoded.rsv1
+    assert len(encoded.data) < len(frame.data)
+
+
+def test_real_messages_round_trip_through_the_extension():
+    sizes = [10, 99, 100, 5000, 20]
+
+    async def handler(websocket, *args):
+        for size in sizes:
+            await websocket.send("a" * size)
+            await websocket.send(b"b" * size)
+
+    async def exchange():
+        async with websockets.serve(handler, "localhost", 0, **server_extensions(min_bytes=100)) as server:
+            port = next(iter(server.sockets)).getsockname()[1]
+            client = await websockets.connect(f"ws://localhost:{port}")
+            try:
+                return [await client.recv() for _ in range(len(sizes) * 2)]
+            finally:
+                await client.close()
+
+    received = asyncio.run(exchange())
+    expected = [message for size in sizes for message in ("a" * size, b"b" * size)]
+    assert received == expected